@@ -3,7 +3,7 @@
 tracker_list=$(curl -Ns https://ngosang.github.io/trackerslist/trackers_all_http.txt | 
                awk '$0' | tr '\n\n' ',')
 
-xria \
+exec xria \
     --allow-overwrite=true \
     --auto-file-renaming=true \
     --bt-enable-lpd=true \
@@ -19,7 +19,7 @@ xria \
     --seed-ratio=0 \
     --check-integrity=true \
     --continue=true \
-    --daemon=true \
+    --daemon=false \
     --disk-cache=40M \
     --force-save=true \
     --min-split-size=10M \
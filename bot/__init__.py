@@ -3,8 +3,11 @@ from uvloop import install
 
 install()
 
+from .helper.ext_utils.boot_profile import install as install_boot_profile
+
+install_boot_profile()
+
 import os
-import subprocess
 from asyncio import Lock, new_event_loop, set_event_loop
 from datetime import datetime
 from logging import (
@@ -115,24 +118,6 @@ sabnzbd_client = SabnzbdClient(
     api_key="mltb",
     port="8070",
 )
-subprocess.run(["xnox", "-d", f"--profile={os.getcwd()}"], check=False)
-subprocess.run(
-    [
-        "xnzb",
-        "-f",
-        "sabnzbd/SABnzbd.ini",
-        "-s",
-        ":::8070",
-        "-b",
-        "0",
-        "-d",
-        "-c",
-        "-l",
-        "0",
-        "--console",
-    ],
-    check=False,
-)
 
 
 scheduler = AsyncIOScheduler(event_loop=bot_loop)
@@ -1,9 +1,10 @@
 # ruff: noqa: E402
 from asyncio import gather
+from signal import SIGINT, SIGTERM
 
 from pyrogram.types import BotCommand
 
-from . import LOGGER, bot_loop
+from . import LOGGER, bot_loop, sabnzbd_client
 from .core.config_manager import Config, SystemEnv
 
 LOGGER.info("Loading config...")
@@ -15,6 +16,11 @@ from .core.startup import load_settings
 bot_loop.run_until_complete(load_settings())
 
 from .core.aeon_client import TgClient
+from .core.engine_supervisor import supervisor
+from .helper.ext_utils import boot_profile
+from .helper.ext_utils.boot_profile import timed
+from .helper.ext_utils.loop_watchdog import loop_watchdog
+from .helper.ext_utils.metrics import export_metrics, instrument_client
 from .helper.telegram_helper.bot_commands import BotCommands
 
 COMMANDS = {
@@ -74,38 +80,57 @@ async def main():
         update_variables,
     )
 
-    await gather(TgClient.start_bot(), TgClient.start_user())
-    await gather(load_configurations(), update_variables())
+    async def start_bot():
+        await timed(
+            "start clients",
+            gather(TgClient.start_bot(), TgClient.start_user()),
+        )
+        await timed(
+            "load configurations",
+            gather(load_configurations(), update_variables()),
+        )
+        # aria2 reads the .netrc written by load_configurations
+        await timed("start aria2", supervisor.start("aria2"))
+
+    # the daemons boot while the clients log in
+    await gather(
+        start_bot(),
+        timed("start qbittorrent", supervisor.start("qbittorrent")),
+        timed("start sabnzbd", supervisor.start("sabnzbd")),
+    )
     from .core.torrent_manager import TorrentManager
 
-    await TorrentManager.initiate()
-    await gather(
-        update_qb_options(),
-        update_aria2_options(),
-        update_nzb_options(),
+    await timed("start torrent clients", TorrentManager.initiate())
+    await timed(
+        "update engine options",
+        gather(
+            update_qb_options(),
+            update_aria2_options(),
+            update_nzb_options(),
+        ),
     )
     from .core.jdownloader_booter import jdownloader
     from .helper.ext_utils.files_utils import clean_all
     from .helper.ext_utils.telegraph_helper import telegraph
     from .helper.mirror_leech_utils.rclone_utils.serve import rclone_serve_booter
-    from .modules import (
-        get_packages_version,
-        initiate_search_tools,
-        restart_notification,
-    )
+    from .modules import restart_notification
 
+    instrument_client(sabnzbd_client, "sabnzbd", exclude=("call",))
+    bot_loop.create_task(loop_watchdog.heartbeat())
+    loop_watchdog.start()
+    bot_loop.create_task(export_metrics())
     await gather(
-        set_commands(),
-        jdownloader.boot(),
+        timed("set commands", set_commands()),
+        timed("boot jdownloader", jdownloader.boot()),
     )
+    # the download directory must be empty before any task is accepted,
+    # the rest of the cleanup runs in the background
     await gather(
-        save_settings(),
-        clean_all(),
-        initiate_search_tools(),
-        get_packages_version(),
-        restart_notification(),
-        telegraph.create_account(),
-        rclone_serve_booter(),
+        timed("save settings", save_settings()),
+        timed("clean downloads", clean_all(background=True)),
+        timed("restart notification", restart_notification()),
+        timed("telegraph account", telegraph.create_account()),
+        timed("rclone serve", rclone_serve_booter()),
     )
 
 
@@ -113,11 +138,48 @@ bot_loop.run_until_complete(main())
 
 from .core.handlers import add_handlers
 from .helper.ext_utils.bot_utils import create_help_buttons
+from .helper.ext_utils.task_manager import watch_disk
 from .helper.listeners.aria2_listener import add_aria2_callbacks
+from .helper.mirror_leech_utils.rclone_utils.rcd import stop_rcds
+from .modules import get_packages_version, initiate_search_tools
+
+
+async def after_boot():
+    """Steps nothing depends on at startup, run once the bot is online."""
+    results = await gather(
+        timed("search plugins", initiate_search_tools()),
+        timed("packages version", get_packages_version()),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            LOGGER.error(f"Deferred boot step failed: {result}")
+    boot_profile.report()
+
+
+with boot_profile.step("add handlers"):
+    add_aria2_callbacks()
+    create_help_buttons()
+    add_handlers()
+bot_loop.create_task(after_boot())
+bot_loop.create_task(watch_disk())
+
+
+async def shutdown():
+    """Stops the daemons the bot started before the loop ends."""
+    results = await gather(
+        supervisor.stop_all(),
+        stop_rcds(),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            LOGGER.error(f"Shutdown step failed: {result}")
+    bot_loop.stop()
+
 
-add_aria2_callbacks()
-create_help_buttons()
-add_handlers()
+for sig in (SIGINT, SIGTERM):
+    bot_loop.add_signal_handler(sig, lambda: bot_loop.create_task(shutdown()))
 
 
 # Run Bot
@@ -3,6 +3,9 @@ from asyncio import Lock
 from pyrogram import Client, enums
 
 from bot import LOGGER
+from bot.helper.ext_utils.metrics import instrument_telegram
+from bot.helper.mirror_leech_utils.parallel_upload import enable_parallel_upload
+from bot.helper.mirror_leech_utils.telegram_sessions import stop_media_sessions
 
 from .config_manager import Config
 
@@ -30,6 +33,8 @@ class TgClient:
             parse_mode=enums.ParseMode.HTML,
             max_concurrent_transmissions=10,
         )
+        instrument_telegram(cls.bot, "bot")
+        enable_parallel_upload(cls.bot)
         await cls.bot.start()
         cls.NAME = cls.bot.me.username
 
@@ -48,6 +53,8 @@ class TgClient:
                     no_updates=True,
                     max_concurrent_transmissions=10,
                 )
+                instrument_telegram(cls.user, "user")
+                enable_parallel_upload(cls.user)
                 await cls.user.start()
                 cls.IS_PREMIUM_USER = cls.user.me.is_premium
                 if cls.IS_PREMIUM_USER:
@@ -59,6 +66,7 @@ class TgClient:
 
     @classmethod
     async def stop(cls):
+        await stop_media_sessions()
         if cls.bot:
             await cls.bot.stop()
             cls.bot = None
@@ -75,6 +83,7 @@ class TgClient:
     @classmethod
     async def reload(cls):
         async with cls._lock:
+            await stop_media_sessions()
             await cls.bot.restart()
             if cls.user:
                 await cls.user.restart()
@@ -15,11 +15,14 @@ class Config:
     BASE_URL_PORT: int = 80
     BOT_TOKEN: str = ""
     CMD_SUFFIX: str = ""
+    COMPRESS_PROFILES: ClassVar[dict[str, str]] = {}
     DATABASE_URL: str = ""
     DEFAULT_UPLOAD: str = "gd"
     EXCLUDED_EXTENSIONS: str = ""
     FFMPEG_CMDS: ClassVar[dict[str, list[str]]] = {}
     FILELION_API: str = ""
+    GDRIVE_DOWNLOAD_SEGMENTS: int = 0
+    GDRIVE_DOWNLOAD_WORKERS: int = 1
     GDRIVE_ID: str = ""
     INCOMPLETE_TASK_NOTIFIER: bool = False
     INDEX_URL: str = ""
@@ -30,6 +33,8 @@ class Config:
     LEECH_FILENAME_PREFIX: str = ""
     LEECH_SPLIT_SIZE: int = 2097152000
     MEDIA_GROUP: bool = False
+    METRICS_ENABLED: bool = False
+    METRICS_TOKEN: str = ""
     HYBRID_LEECH: bool = False
     HYDRA_IP: str = ""
     HYDRA_API_KEY: str = ""
@@ -38,6 +43,8 @@ class Config:
     QUEUE_ALL: int = 0
     QUEUE_DOWNLOAD: int = 0
     QUEUE_UPLOAD: int = 0
+    QUEUE_ENGINE_LIMITS: ClassVar[dict[str, int]] = {}
+    QUEUE_FREE_SPACE: int = 0
     RCLONE_FLAGS: str = ""
     RCLONE_PATH: str = ""
     RCLONE_SERVE_URL: str = ""
@@ -52,7 +59,9 @@ class Config:
     SUDO_USERS: str = ""
     TELEGRAM_API: int = 0
     TELEGRAM_HASH: str = ""
+    TG_DOWNLOAD_CONNECTIONS: int = 4
     TG_PROXY: ClassVar[dict[str, str]] = {}
+    TG_UPLOAD_CONNECTIONS: int = 4
     THUMBNAIL_LAYOUT: str = ""
     TORRENT_TIMEOUT: int = 0
     UPLOAD_PATHS: ClassVar[dict[str, str]] = {}
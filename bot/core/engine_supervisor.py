@@ -0,0 +1,290 @@
+import os
+import signal
+from asyncio import create_subprocess_exec, gather, shield, sleep, wait_for
+from asyncio.subprocess import DEVNULL
+from time import monotonic
+
+import aiohttp
+
+from bot import LOGGER, aria2_options, bot_loop
+from bot.helper.ext_utils.metrics import Counter, Gauge, registry
+
+from .torrent_manager import TorrentManager
+
+# readiness is polled with back-off from PROBE_DELAY up to PROBE_MAX_DELAY
+PROBE_DELAY = 0.1
+PROBE_MAX_DELAY = 2
+# a daemon that exits more than MAX_RESTARTS times in RESTART_WINDOW
+# seconds is left stopped
+MAX_RESTARTS = 5
+RESTART_WINDOW = 300
+STOP_TIMEOUT = 10
+
+engine_up = registry.add(
+    Gauge("mltb_engine_up", "Whether an engine daemon is ready", ("engine",)),
+)
+engine_restarts = registry.add(
+    Counter(
+        "mltb_engine_restarts_total",
+        "Times an engine daemon was restarted after exiting",
+        ("engine",),
+    ),
+)
+
+
+async def http_probe(url):
+    """An engine is ready once its web server answers, whatever the status."""
+    try:
+        async with (
+            aiohttp.ClientSession(timeout=aiohttp.ClientTimeout(total=3)) as session,
+            session.get(url) as response,
+        ):
+            return response.status < 500
+    except Exception:
+        return False
+
+
+class Engine:
+    """
+    A daemon the bot depends on, run in the foreground so its exit is seen.
+
+    Args:
+        name: The engine name used in logs, metrics and /stats.
+        command: Async callable returning the argv to run, or None when the
+            engine isn't configured.
+        probe: Async callable returning True once the engine answers.
+        ready_timeout: Seconds to wait for the probe before giving up.
+        on_restart: Async callable run once the engine is ready again after
+            a crash, to reconnect clients and reapply options.
+        clean_exit_codes: Exit codes the daemon uses when it quits on purpose,
+            such as to restart itself. Those restart at once without counting
+            toward MAX_RESTARTS, as does an exit announced with expect_exit.
+    """
+
+    STOPPED = "stopped"
+    STARTING = "starting"
+    READY = "ready"
+    RESTARTING = "restarting"
+    FAILED = "failed"
+
+    def __init__(
+        self,
+        name,
+        command,
+        probe,
+        ready_timeout=30,
+        on_restart=None,
+        clean_exit_codes=(),
+    ):
+        self.name = name
+        self.state = self.STOPPED
+        self.restarts = 0
+        self.since = monotonic()
+        self._command = command
+        self._probe = probe
+        self._ready_timeout = ready_timeout
+        self._on_restart = on_restart
+        self._clean_exit_codes = clean_exit_codes
+        self._proc = None
+        self._watcher = None
+        self._exits = []
+        self._exit_expected = False
+
+    @property
+    def pid(self):
+        return self._proc.pid if self._proc else None
+
+    @property
+    def running(self):
+        return self.state in (self.STARTING, self.READY)
+
+    def expect_exit(self):
+        """Announces that the daemon was told to quit, so its next exit isn't a crash."""
+        self._exit_expected = True
+
+    def _set_state(self, state):
+        self.state = state
+        self.since = monotonic()
+        engine_up.set(int(state == self.READY), engine=self.name)
+
+    async def start(self):
+        """
+        Starts the daemon and waits until it's ready.
+
+        Returns:
+            True if the daemon answered its probe within the ready timeout.
+        """
+        if self.running:
+            return self.state == self.READY
+        if not (cmd := await self._command()):
+            return False
+        try:
+            self._proc = await create_subprocess_exec(
+                *cmd,
+                stdout=DEVNULL,
+                stderr=DEVNULL,
+                start_new_session=True,
+            )
+        except OSError as e:
+            LOGGER.error(f"Can't start {self.name}: {e}")
+            self._set_state(self.FAILED)
+            return False
+        self._set_state(self.STARTING)
+        self._watcher = bot_loop.create_task(self._watch(self._proc))
+        ready = bot_loop.create_task(self._wait_ready())
+        try:
+            return await wait_for(shield(ready), self._ready_timeout)
+        except TimeoutError:
+            # keep probing, the state turns ready whenever it answers
+            LOGGER.warning(
+                f"{self.name} didn't answer within {self._ready_timeout}s"
+            )
+            return False
+
+    async def _wait_ready(self):
+        delay = PROBE_DELAY
+        while self.state == self.STARTING:
+            if await self._probe():
+                self._set_state(self.READY)
+                LOGGER.info(f"{self.name} is ready")
+                return True
+            await sleep(delay)
+            delay = min(delay * 2, PROBE_MAX_DELAY)
+        return False
+
+    async def _watch(self, proc):
+        code = await proc.wait()
+        if proc is not self._proc or self.state in (self.STOPPED, self.FAILED):
+            return
+        if self._exit_expected or code in self._clean_exit_codes:
+            self._exit_expected = False
+            delay = 0
+            LOGGER.info(f"{self.name} exited with {code} on purpose, restarting")
+        else:
+            now = monotonic()
+            self._exits = [t for t in self._exits if now - t < RESTART_WINDOW]
+            self._exits.append(now)
+            if len(self._exits) > MAX_RESTARTS:
+                LOGGER.error(
+                    f"{self.name} exited {len(self._exits)} times in "
+                    f"{RESTART_WINDOW}s, leaving it stopped",
+                )
+                self._set_state(self.FAILED)
+                return
+            delay = 2 ** (len(self._exits) - 1)
+            LOGGER.warning(f"{self.name} exited with {code}, restarting in {delay}s")
+        self._set_state(self.RESTARTING)
+        await sleep(delay)
+        if self.state != self.RESTARTING:
+            return
+        self.restarts += 1
+        engine_restarts.inc(engine=self.name)
+        self._set_state(self.STOPPED)
+        if await self.start() and self._on_restart:
+            try:
+                await self._on_restart()
+            except Exception as e:
+                LOGGER.error(f"Reconnecting to {self.name} failed: {e}")
+
+    async def stop(self):
+        """Stops the daemon and everything it spawned, without restarting it."""
+        self._set_state(self.STOPPED)
+        self._exits.clear()
+        self._exit_expected = False
+        if (proc := self._proc) is None or proc.returncode is not None:
+            return
+        try:
+            os.killpg(proc.pid, signal.SIGTERM)
+            await wait_for(proc.wait(), STOP_TIMEOUT)
+        except ProcessLookupError:
+            pass
+        except TimeoutError:
+            os.killpg(proc.pid, signal.SIGKILL)
+            await proc.wait()
+
+    async def restart(self):
+        await self.stop()
+        return await self.start()
+
+
+class EngineSupervisor:
+    """Starts the engine daemons in parallel and keeps them running."""
+
+    def __init__(self):
+        self.engines = {}
+
+    def register(self, engine):
+        self.engines[engine.name] = engine
+        return engine
+
+    async def start(self, *names):
+        """Starts the named engines, or all of them, and waits until ready."""
+        engines = (
+            [self.engines[n] for n in names] if names else self.engines.values()
+        )
+        await gather(*(engine.start() for engine in engines))
+
+    async def stop_all(self):
+        await gather(*(engine.stop() for engine in self.engines.values()))
+
+    def states(self):
+        """
+        Returns:
+            (name, state, restarts, seconds in state) tuples.
+        """
+        now = monotonic()
+        return [
+            (e.name, e.state, e.restarts, now - e.since)
+            for e in self.engines.values()
+        ]
+
+
+async def _aria2_command():
+    # aria.sh fetches the tracker list and execs xria in the foreground
+    return ["./aria.sh"]
+
+
+async def _aria2_probe():
+    return await http_probe("http://localhost:6800/jsonrpc")
+
+
+async def _aria2_restarted():
+    await TorrentManager.connect_aria2()
+    if aria2_options:
+        await TorrentManager.aria2.changeGlobalOption(aria2_options)
+
+
+async def _qbittorrent_command():
+    return ["xnox", f"--profile={os.getcwd()}"]
+
+
+async def _qbittorrent_probe():
+    return await http_probe("http://localhost:8090/api/v2/app/version")
+
+
+async def _sabnzbd_command():
+    return [
+        "xnzb",
+        "-f",
+        "sabnzbd/SABnzbd.ini",
+        "-s",
+        ":::8070",
+        "-b",
+        "0",
+        "-c",
+        "-l",
+        "0",
+        "--console",
+    ]
+
+
+async def _sabnzbd_probe():
+    return await http_probe("http://localhost:8070/api?mode=version")
+
+
+supervisor = EngineSupervisor()
+supervisor.register(
+    Engine("aria2", _aria2_command, _aria2_probe, on_restart=_aria2_restarted),
+)
+supervisor.register(Engine("qbittorrent", _qbittorrent_command, _qbittorrent_probe))
+supervisor.register(Engine("sabnzbd", _sabnzbd_command, _sabnzbd_probe))
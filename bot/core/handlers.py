@@ -215,6 +215,16 @@ def add_handlers():
             BotCommands.SoxCommand,
             CustomFilters.authorized,
         ),
+        "zip_benchmark": (
+            zip_benchmark,
+            BotCommands.ZipBenchCommand,
+            CustomFilters.sudo,
+        ),
+        "blocking_sites": (
+            blocking_sites,
+            BotCommands.BlockingCommand,
+            CustomFilters.sudo,
+        ),
     }
 
     for handler_func, command_name, custom_filter in command_filters.values():
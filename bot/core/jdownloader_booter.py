@@ -1,16 +1,36 @@
+from asyncio import Lock
 from json import dump
 from random import randint
 from re import match
+from time import monotonic
 
 from aiofiles.os import listdir, makedirs, path, rename
 from aioshutil import rmtree
 
 from bot import LOGGER
 from bot.helper.ext_utils.bot_utils import cmd_exec, new_task
+from bot.helper.ext_utils.metrics import engine_rpc_errors, engine_rpc_seconds
 from myjd import MyJdApi
 
 from .aeon_client import TgClient
 from .config_manager import Config
+from .engine_supervisor import Engine, http_probe, supervisor
+
+# seconds a downloads package snapshot is shared between status and listener calls
+PACKAGES_TTL = 1
+PACKAGE_FIELDS = {
+    "bytesLoaded": True,
+    "bytesTotal": True,
+    "enabled": True,
+    "maxResults": -1,
+    "running": True,
+    "speed": True,
+    "eta": True,
+    "status": True,
+    "hosts": True,
+    "finished": True,
+    "saveTo": True,
+}
 
 
 class JDownloader(MyJdApi):
@@ -19,17 +39,55 @@ class JDownloader(MyJdApi):
         self._username = ""
         self._password = ""
         self._device_name = ""
-        self.is_connected = False
         self.error = "JDownloader Credentials not provided!"
+        self._packages = None
+        self._packages_time = 0
+        self._packages_lock = Lock()
+
+    async def request_api(self, path, params=None):
+        start = monotonic()
+        try:
+            return await super().request_api(path, params)
+        except Exception:
+            engine_rpc_errors.inc(engine="jdownloader", method=path)
+            raise
+        finally:
+            engine_rpc_seconds.observe(
+                monotonic() - start,
+                engine="jdownloader",
+                method=path,
+            )
+
+    async def download_packages(self):
+        """
+        Returns all packages of the download list with the fields every status
+        and the listener need. Concurrent callers share one query per tick.
+        """
+        async with self._packages_lock:
+            if (
+                self._packages is None
+                or monotonic() - self._packages_time >= PACKAGES_TTL
+            ):
+                self._packages = await self.device.downloads.query_packages(
+                    [PACKAGE_FIELDS],
+                )
+                self._packages_time = monotonic()
+            return self._packages
+
+    def invalidate_packages(self):
+        self._packages = None
+
+    @property
+    def is_connected(self):
+        return jd_engine.running
 
     @new_task
     async def boot(self):
         """Initializes and starts the JDownloader process,
         configuring it with credentials and necessary settings.
         """
-        await cmd_exec(["pkill", "-9", "-f", "java"])
         if not Config.JD_EMAIL or not Config.JD_PASS:
-            self.is_connected = False
+            await jd_engine.stop()
             self.error = "JDownloader Credentials not provided!"
             return
         self.error = "Connecting... Try again after a few seconds."
@@ -90,13 +148,43 @@ class JDownloader(MyJdApi):
             except Exception:
                 pass
 
-        cmd = "cpulimit -l 30 -- java -Xms256m -Xmx500m -Dsun.jnu.encoding=UTF-8 -Dfile.encoding=UTF-8 -Djava.awt.headless=true -jar /JDownloader/JDownloader.jar"
+        await jd_engine.restart()
+
+
+async def _jd_command():
+    if not Config.JD_EMAIL or not Config.JD_PASS:
+        return None
+    # a JDownloader that restarted itself to update isn't ours to watch
+    await cmd_exec(["pkill", "-9", "-f", "java"])
+    return [
+        "cpulimit",
+        "-l",
+        "30",
+        "--",
+        "java",
+        "-Xms256m",
+        "-Xmx500m",
+        "-Dsun.jnu.encoding=UTF-8",
+        "-Dfile.encoding=UTF-8",
+        "-Djava.awt.headless=true",
+        "-jar",
+        "/JDownloader/JDownloader.jar",
+    ]
+
 
-        self.is_connected = True
-        _, __, code = await cmd_exec(cmd, shell=True)
-        self.is_connected = False
-        if code != -9:
-            await self.boot()
+async def _jd_probe():
+    # the local API enabled in RemoteAPIConfig
+    return await http_probe("http://127.0.0.1:3128/")
 
 
 jdownloader = JDownloader()
+jd_engine = supervisor.register(
+    # JDownloader exits with 0 when it restarts itself after an update
+    Engine(
+        "jdownloader",
+        _jd_command,
+        _jd_probe,
+        ready_timeout=120,
+        clean_exit_codes=(0,),
+    ),
+)
@@ -312,7 +312,7 @@ async def load_configurations():
             pass
     await (
         await create_subprocess_shell(
-            "chmod 600 .netrc && cp .netrc /root/.netrc && chmod +x aria.sh && ./aria.sh",
+            "chmod 600 .netrc && cp .netrc /root/.netrc && chmod +x aria.sh",
         )
     ).wait()
 
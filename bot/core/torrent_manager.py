@@ -14,6 +14,7 @@ from tenacity import (
 )
 
 from bot import LOGGER, aria2_options
+from bot.helper.ext_utils.metrics import instrument_client
 
 
 def wrap_with_retry(obj, max_retries=3):
@@ -55,10 +56,24 @@ class TorrentManager:
     @classmethod
     async def initiate(cls):
         """Initializes and wraps Aria2c and qBittorrent client instances."""
-        cls.aria2 = await Aria2WebsocketClient.new("http://localhost:6800/jsonrpc")
-        cls.qbittorrent = await create_client("http://localhost:8090/api/v2/")
+        await cls.connect_aria2()
+        cls.qbittorrent = instrument_client(
+            await create_client("http://localhost:8090/api/v2/"),
+            "qbittorrent",
+        )
         cls.qbittorrent = wrap_with_retry(cls.qbittorrent)
 
+    @classmethod
+    async def connect_aria2(cls):
+        """(Re)opens the Aria2c websocket, which doesn't survive a restart of aria2."""
+        if cls.aria2 is not None:
+            with contextlib.suppress(Exception):
+                await cls.aria2.close()
+        cls.aria2 = instrument_client(
+            await Aria2WebsocketClient.new("http://localhost:6800/jsonrpc"),
+            "aria2",
+        )
+
     @classmethod
     async def close_all(cls):
         """Closes connections to both Aria2c and qBittorrent clients."""
@@ -80,6 +95,27 @@ class TorrentManager:
             with contextlib.suppress(Exception):
                 await cls.aria2.removeDownloadResult(download.get("gid", ""))
 
+    @classmethod
+    async def aria2_remove_many(cls, downloads):
+        """Removes many Aria2c downloads like aria2_remove, in one multicall.
+
+        Args:
+            downloads: Dictionaries containing download information from Aria2c.
+        """
+        methods = [
+            {
+                "methodName": "aria2.forceRemove"
+                if download.get("status", "") in ["active", "paused", "waiting"]
+                else "aria2.removeDownloadResult",
+                "params": [download.get("gid", "")],
+            }
+            for download in downloads
+        ]
+        if methods:
+            # failed calls come back as faults in the results, not as errors
+            with contextlib.suppress(Exception):
+                await cls.aria2.multicall(methods)
+
     @classmethod
     async def remove_all(cls):
         """Pauses all downloads and then removes them from both Aria2c and qBittorrent."""
@@ -1,17 +1,17 @@
 import json
 import os
 from contextlib import suppress
-from hashlib import md5
 
 from aiofiles.os import path as aiopath
 from langcodes import Language
 
 from bot import LOGGER
-from bot.helper.ext_utils.bot_utils import cmd_exec
+from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async
 from bot.helper.ext_utils.status_utils import (
     get_readable_file_size,
     get_readable_time,
 )
+from cpu_jobs import calculate_md5
 
 
 class DefaultDict(dict):
@@ -72,7 +72,7 @@ async def generate_caption(filename, directory, caption_template):
     audio_languages = audio_languages if audio_languages else "Unknown"
     subtitle_languages = subtitle_languages if subtitle_languages else "Unknown"
     video_quality = video_quality if video_quality else "Unknown"
-    file_md5_hash = calculate_md5(file_path)
+    file_md5_hash = await sync_to_async(calculate_md5, file_path, pool="cpu")
 
     caption_data = DefaultDict(
         filename=filename,
@@ -155,20 +155,3 @@ def parse_subtitle_language(existing_subtitles, subtitle_stream):
                 LOGGER.debug(f"Parsed subtitle language: {subtitle_name}")
                 existing_subtitles += f"{subtitle_name}, "
     return existing_subtitles.strip(", ")
-
-
-def calculate_md5(file_path):
-    """
-    Calculates the MD5 hash of the given file.
-
-    Args:
-        file_path: The path to the file.
-
-    Returns:
-        A hexadecimal string representing the MD5 hash.
-    """
-    md5_hash = md5()
-    with open(file_path, "rb") as file:
-        for chunk in iter(lambda: file.read(4096), b""):
-            md5_hash.update(chunk)
-    return md5_hash.hexdigest()
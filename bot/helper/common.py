@@ -1,15 +1,13 @@
 import contextlib
-import os
-from asyncio import gather, sleep
+from asyncio import Lock, Semaphore, create_task, gather, sleep
 from collections import Counter
 from copy import deepcopy
 from os import path as ospath
-from os import walk
 from re import IGNORECASE, findall, sub
 from secrets import token_hex
 from shlex import split
 
-from aiofiles.os import listdir, makedirs, remove
+from aiofiles.os import listdir, makedirs, remove, replace
 from aiofiles.os import path as aiopath
 from aioshutil import move, rmtree
 from pyrogram.enums import ChatAction
@@ -33,15 +31,19 @@ from bot.helper.aeon_utils.command_gen import (
     get_watermark_cmd,
 )
 
-from .ext_utils.bot_utils import get_size_bytes, new_task, sync_to_async
+from .ext_utils.bot_utils import get_size_bytes, new_task
 from .ext_utils.bulk_links import extract_bulk_links
 from .ext_utils.files_utils import (
+    DEFAULT_ZIP_PROFILE,
+    SEVENZ_MAX_JOBS,
+    ZIP_PROFILES,
     SevenZ,
+    get_archive_parts,
     get_base_name,
-    get_path_size,
     is_archive,
     is_archive_split,
     is_first_archive_split,
+    merge_extracted,
     split_file,
 )
 from .ext_utils.links_utils import (
@@ -51,12 +53,14 @@ from .ext_utils.links_utils import (
     is_telegram_link,
 )
 from .ext_utils.media_utils import (
+    FRAME_JOBS,
     FFMpeg,
     create_thumb,
     get_document_type,
     is_mkv,
     take_ss,
 )
+from .ext_utils.metrics import timed_stage
 from .mirror_leech_utils.gdrive_utils.list import GoogleDriveList
 from .mirror_leech_utils.rclone_utils.list import RcloneList
 from .mirror_leech_utils.status_utils.ffmpeg_status import FFmpegStatus
@@ -91,6 +95,7 @@ class TaskConfig:
         self.metadata = ""
         self.watermark = ""
         self.thumbnail_layout = ""
+        self.compress_profile = ""
         self.folder_name = ""
         self.split_size = 0
         self.max_split_size = 0
@@ -134,6 +139,7 @@ class TaskConfig:
         self.chat_thread_id = None
         self.subproc = None
         self.thumb = None
+        self.tree = None
         self.excluded_extensions = []
         self.files_to_proceed = []
         self.is_super_chat = self.message.chat.type.name in ["SUPERGROUP", "CHANNEL"]
@@ -310,7 +316,7 @@ class TaskConfig:
             else:
                 chosen_service = default_upload
 
-            if chosen_service not in ["yt"] and not self.up_dest:
+            if chosen_service != "yt" and not self.up_dest:
                 raise ValueError(
                     f"No Upload Destination path/ID for service '{chosen_service}'! Please set an upload path or a default for it."
                 )
@@ -637,6 +643,7 @@ class TaskConfig:
                 f"Reply to a text file or a Telegram message with links separated by new lines. Error: {e}",
             )
 
+    @timed_stage("extract")
     async def proceed_extract(self, dl_path, gid):
         """Extracts archives from the downloaded path."""
         pswd = self.extract if isinstance(self.extract, str) else ""
@@ -644,11 +651,7 @@ class TaskConfig:
         if self.is_file and is_archive(dl_path):
             self.files_to_proceed.append(dl_path)
         else:
-            for dirpath, _, files in await sync_to_async(
-                walk,
-                dl_path,
-                topdown=False,
-            ):
+            for dirpath, _, files in self.tree.walk(dl_path, topdown=False):
                 for file_ in files:
                     if is_first_archive_split(file_) or (
                         is_archive(file_)
@@ -659,44 +662,110 @@ class TaskConfig:
 
         if not self.files_to_proceed:
             return dl_path
-        t_path = dl_path
         sevenz = SevenZ(self)
         LOGGER.info(f"Extracting: {self.name}")
         async with task_dict_lock:
             task_dict[self.mid] = SevenZStatus(self, sevenz, gid, "Extract")
-        for dirpath, _, files in await sync_to_async(
-            walk,
+        archives = {}
+        for dirpath, _, files in self.tree.walk(
             self.up_dir or self.dir,
             topdown=False,
         ):
-            for file_ in files:
+            if firsts := [
+                file_
+                for file_ in files
+                if is_first_archive_split(file_)
+                or (is_archive(file_) and not file_.strip().lower().endswith(".rar"))
+            ]:
+                archives[dirpath] = (firsts, files)
+        semaphore = Semaphore(SEVENZ_MAX_JOBS)
+        targets = []
+
+        async def remove_archive_files(dirpath, names):
+            for file_ in names:
+                del_path = ospath.join(dirpath, file_)
+                try:
+                    await remove(del_path)
+                except FileNotFoundError:
+                    pass
+                except Exception:
+                    self.is_cancelled = True
+                self.tree.discard(del_path)
+
+        async def extract_archive(dirpath, file_, files, merge_lock):
+            async with semaphore:
                 if self.is_cancelled:
                     return False
-                if is_first_archive_split(file_) or (
-                    is_archive(file_) and not file_.strip().lower().endswith(".rar")
-                ):
-                    self.proceed_count += 1
-                    f_path = ospath.join(dirpath, file_)
-                    t_path = get_base_name(f_path) if self.is_file else dirpath
-                    if not self.is_file:
-                        self.subname = file_
-                    code = await sevenz.extract(f_path, t_path, pswd)
+                self.proceed_count += 1
+                f_path = ospath.join(dirpath, file_)
+                if self.is_file:
+                    t_path = get_base_name(f_path)
+                    targets.append(t_path)
                 else:
-                    code = 0
-            if self.is_cancelled:
-                return code
-            if code == 0:
-                for file_ in files:
-                    if is_archive_split(file_) or is_archive(file_):
-                        del_path = ospath.join(dirpath, file_)
-                        try:
-                            await remove(del_path)
-                        except Exception:
-                            self.is_cancelled = True
+                    # each archive of a folder gets its own scratch target so
+                    # they extract at once, merged into the folder afterwards
+                    self.subname = file_
+                    t_path = ospath.join(dirpath, f".extract-{token_hex(4)}")
+                    targets.append(dirpath)
+                code = await sevenz.extract(f_path, t_path, pswd)
+            if not self.is_file:
+                if self.is_cancelled:
+                    await rmtree(t_path, ignore_errors=True)
+                elif await aiopath.isdir(t_path):
+                    async with merge_lock:
+                        await merge_extracted(t_path, dirpath)
+            if code == 0 and not self.is_cancelled:
+                await remove_archive_files(
+                    dirpath,
+                    get_archive_parts(file_, files),
+                )
+            return code
+
+        async def extract_dir(dirpath, firsts, files, below):
+            # a folder's archives only merge into it once every folder below
+            # it is done, so nothing lands in a folder still being extracted
+            await gather(*below, return_exceptions=True)
+            merge_lock = Lock()
+            codes = await gather(
+                *(
+                    extract_archive(dirpath, file_, files, merge_lock)
+                    for file_ in firsts
+                ),
+            )
+            if not self.is_cancelled and not any(codes):
+                await remove_archive_files(
+                    dirpath,
+                    [
+                        file_
+                        for file_ in files
+                        if (is_archive_split(file_) or is_archive(file_))
+                        and self.tree.is_file(ospath.join(dirpath, file_))
+                    ],
+                )
+            return codes
+
+        # folders run in parallel only when neither is inside the other
+        jobs = {}
+        for dirpath in sorted(archives, key=lambda d: d.count("/"), reverse=True):
+            below = [job for d, job in jobs.items() if d.startswith(f"{dirpath}/")]
+            jobs[dirpath] = create_task(
+                extract_dir(dirpath, *archives[dirpath], below)
+            )
+        results = await gather(*jobs.values())
+        rescanned = []
+        for path in sorted(set(targets)):
+            if not any(path.startswith(f"{done}/") for done in rescanned):
+                await self.tree.rescan(path)
+                rescanned.append(path)
+        if self.is_cancelled:
+            return False
         if self.proceed_count == 0:
             LOGGER.info("No extractable files found!")
-        return t_path if self.is_file and code == 0 else dl_path
+        if self.is_file and results and results[0][0] == 0:
+            return targets[0]
+        return dl_path
 
+    @timed_stage("ffmpeg")
     async def proceed_ffmpeg(self, dl_path, gid):
         """Processes media files using FFmpeg commands defined in the task."""
         checked = False
@@ -761,6 +830,7 @@ class TaskConfig:
                     await makedirs(new_folder, exist_ok=True)
                     file_path = f"{new_folder}/{name}"
                     await move(dl_path, file_path)
+                    self.tree.move(dl_path, file_path)
                     if not checked:
                         checked = True
                         async with task_dict_lock:
@@ -785,8 +855,11 @@ class TaskConfig:
                     self.subsize = self.size
                     res = await ffmpeg.ffmpeg_cmds(cmd, file_path)
                     if res:
+                        for output in res:
+                            await self.tree.rescan(output)
                         if delete_files:
                             await remove(file_path)
+                            self.tree.discard(file_path)
                             if len(await listdir(new_folder)) == 1:
                                 folder = new_folder.rsplit("/", 1)[0]
                                 self.name = ospath.basename(res[0])
@@ -795,6 +868,8 @@ class TaskConfig:
                                 dl_path = ospath.join(folder, self.name)
                                 await move(res[0], dl_path)
                                 await rmtree(new_folder)
+                                self.tree.move(res[0], dl_path)
+                                self.tree.discard(new_folder)
                             else:
                                 dl_path = new_folder
                                 self.name = new_folder.rsplit("/", 1)[-1]
@@ -804,12 +879,10 @@ class TaskConfig:
                     else:
                         await move(file_path, dl_path)
                         await rmtree(new_folder)
+                        self.tree.move(file_path, dl_path)
+                        self.tree.discard(new_folder)
                 else:
-                    for dirpath, _, files in await sync_to_async(
-                        walk,
-                        dl_path,
-                        topdown=False,
-                    ):
+                    for dirpath, _, files in self.tree.walk(dl_path, topdown=False):
                         for file_ in files:
                             var_cmd = cmd.copy()
                             if self.is_cancelled:
@@ -845,17 +918,21 @@ class TaskConfig:
                                 await cpu_eater_lock.acquire()
                                 self.progress = True
                             LOGGER.info(f"Running FFmpeg command for: {f_path}")
-                            self.subsize = await get_path_size(f_path)
+                            self.subsize = self.tree.size(f_path)
                             self.subname = file_
                             res = await ffmpeg.ffmpeg_cmds(var_cmd, f_path)
+                            for output in res or []:
+                                await self.tree.rescan(output)
                             if res and delete_files:
                                 await remove(f_path)
+                                self.tree.discard(f_path)
                                 if len(res) == 1:
                                     file_name = ospath.basename(res[0])
                                     if file_name.startswith("ffmpeg"):
                                         newname = file_name.split(".", 1)[-1]
                                         newres = ospath.join(dirpath, newname)
                                         await move(res[0], newres)
+                                        self.tree.move(res[0], newres)
                 for inp in inputs.values():
                     if "/temp/" in inp and aiopath.exists(inp):
                         await remove(inp)
@@ -864,6 +941,7 @@ class TaskConfig:
                 cpu_eater_lock.release()
         return dl_path
 
+    @timed_stage("substitute")
     async def substitute(self, dl_path):
         """Performs name substitution on downloaded files/folders based on task settings."""
 
@@ -906,15 +984,18 @@ class TaskConfig:
             new_path = ospath.join(up_dir, new_name)
             with contextlib.suppress(Exception):
                 await move(dl_path, new_path)
+                self.tree.move(dl_path, new_path)
             return new_path
-        for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+        for dirpath, _, files in self.tree.walk(dl_path, topdown=False):
             for file_ in files:
                 f_path = ospath.join(dirpath, file_)
                 new_name = perform_substitution(file_, self.name_sub)
                 if not new_name:
                     continue
+                new_path = ospath.join(dirpath, new_name)
                 with contextlib.suppress(Exception):
-                    await move(f_path, ospath.join(dirpath, new_name))
+                    await move(f_path, new_path)
+                    self.tree.move(f_path, new_path)
         return dl_path
 
     async def remove_www_prefix(self, dl_path):
@@ -936,19 +1017,23 @@ class TaskConfig:
             new_path = ospath.join(up_dir, new_name)
             with contextlib.suppress(Exception):
                 await move(dl_path, new_path)
+                self.tree.move(dl_path, new_path)
             return new_path
 
-        for dirpath, _, files in await sync_to_async(walk, dl_path, topdown=False):
+        for dirpath, _, files in self.tree.walk(dl_path, topdown=False):
             for file_ in files:
                 f_path = ospath.join(dirpath, file_)
                 new_name = clean_filename(file_)
                 if new_name == file_:
                     continue
+                new_path = ospath.join(dirpath, new_name)
                 with contextlib.suppress(Exception):
-                    await move(f_path, ospath.join(dirpath, new_name))
+                    await move(f_path, new_path)
+                    self.tree.move(f_path, new_path)
 
         return dl_path
 
+    @timed_stage("screenshots")
     async def generate_screenshots(self, dl_path):
         """Generates screenshots for video files."""
         ss_nb = int(self.screen_shots) if isinstance(self.screen_shots, str) else 10
@@ -964,20 +1049,29 @@ class TaskConfig:
                         move(dl_path, f"{new_folder}/{name}"),
                         move(res, new_folder),
                     )
+                    self.tree.discard(dl_path)
+                    self.tree.discard(res)
+                    await self.tree.rescan(new_folder)
                     return new_folder
         else:
             LOGGER.info(f"Creating Screenshot for: {dl_path}")
-            for dirpath, _, files in await sync_to_async(
-                walk,
-                dl_path,
-                topdown=False,
-            ):
-                for file_ in files:
-                    f_path = ospath.join(dirpath, file_)
+            sem = Semaphore(FRAME_JOBS)
+
+            async def _screenshots(f_path):
+                async with sem:
+                    if self.is_cancelled:
+                        return None
                     if (await get_document_type(f_path))[0]:
-                        await take_ss(f_path, ss_nb)
+                        return await take_ss(f_path, ss_nb)
+                return None
+
+            files = [f_path for f_path, _ in self.tree.files(dl_path)]
+            for res in await gather(*(_screenshots(f) for f in files)):
+                if res:
+                    await self.tree.rescan(res)
         return dl_path
 
+    @timed_stage("convert")
     async def convert_media(self, dl_path, gid):
         """Converts video/audio files to specified formats based on task settings."""
         fvext = []
@@ -1021,14 +1115,7 @@ class TaskConfig:
         if self.is_file:
             all_files.append(dl_path)
         else:
-            for dirpath, _, files in await sync_to_async(
-                walk,
-                dl_path,
-                topdown=False,
-            ):
-                for file_ in files:
-                    f_path = ospath.join(dirpath, file_)
-                    all_files.append(f_path)
+            all_files.extend(f_path for f_path, _ in self.tree.files(dl_path))
 
         for f_path in all_files:
             is_video, is_audio, _ = await get_document_type(f_path)
@@ -1082,7 +1169,7 @@ class TaskConfig:
                     if self.is_file:
                         self.subsize = self.size
                     else:
-                        self.subsize = await get_path_size(f_path)
+                        self.subsize = self.tree.size(f_path)
                         self.subname = ospath.basename(f_path)
                     if f_type == "video":
                         res = await ffmpeg.convert_video(f_path, vext)
@@ -1094,10 +1181,13 @@ class TaskConfig:
                         except Exception:
                             self.is_cancelled = True
                             return False
+                        self.tree.discard(f_path)
+                        await self.tree.rescan(res)
                         if self.is_file:
                             return res
         return dl_path
 
+    @timed_stage("sample_video")
     async def generate_sample_video(self, dl_path, gid):
         """Generates a sample video from the input file."""
         data = (
@@ -1117,15 +1207,9 @@ class TaskConfig:
             file_ = ospath.basename(dl_path)
             self.files_to_proceed[dl_path] = file_
         else:
-            for dirpath, _, files in await sync_to_async(
-                walk,
-                dl_path,
-                topdown=False,
-            ):
-                for file_ in files:
-                    f_path = ospath.join(dirpath, file_)
-                    if (await get_document_type(f_path))[0]:
-                        self.files_to_proceed[f_path] = file_
+            for f_path, _ in self.tree.files(dl_path):
+                if (await get_document_type(f_path))[0]:
+                    self.files_to_proceed[f_path] = ospath.basename(f_path)
         if self.files_to_proceed:
             ffmpeg = FFMpeg(self)
             async with task_dict_lock:
@@ -1139,7 +1223,7 @@ class TaskConfig:
                     if self.is_file:
                         self.subsize = self.size
                     else:
-                        self.subsize = await get_path_size(f_path)
+                        self.subsize = self.tree.size(f_path)
                         self.subname = file_
                     res = await ffmpeg.sample_video(
                         f_path,
@@ -1153,46 +1237,75 @@ class TaskConfig:
                             move(f_path, f"{new_folder}/{file_}"),
                             move(res, f"{new_folder}/SAMPLE.{file_}"),
                         )
+                        self.tree.discard(f_path)
+                        await self.tree.rescan(new_folder)
                         return new_folder
+                    if res:
+                        await self.tree.rescan(res)
         return dl_path
 
+    def get_zip_profile(self, pswd):
+        """
+        Picks the -z profile: -zp, then COMPRESS_PROFILES for the destination
+        ("leech", "gd", "rc" or "yt"), then its "default" entry.
+        """
+        if self.is_leech:
+            dest = "leech"
+        elif self.raw_up_dest == "yt":
+            dest = "yt"
+        elif is_gdrive_id(self.up_dest):
+            dest = "gd"
+        else:
+            dest = "rc"
+        profile = (
+            self.compress_profile
+            or Config.COMPRESS_PROFILES.get(dest)
+            or Config.COMPRESS_PROFILES.get("default")
+            or DEFAULT_ZIP_PROFILE
+        )
+        if profile not in ZIP_PROFILES:
+            LOGGER.warning(f"Unknown zip profile {profile}, using store")
+            return DEFAULT_ZIP_PROFILE
+        if ZIP_PROFILES[profile][1] is None and (pswd or self.is_leech):
+            LOGGER.info(f"{profile} can't split or encrypt, using store")
+            return DEFAULT_ZIP_PROFILE
+        return profile
+
+    @timed_stage("compress")
     async def proceed_compress(self, dl_path, gid):
-        """Compresses the downloaded file/folder into a zip archive."""
+        """Compresses the downloaded file/folder using the selected zip profile."""
         pswd = self.compress if isinstance(self.compress, str) else ""
+        profile = self.get_zip_profile(pswd)
+        ext, _, cpu_bound = ZIP_PROFILES[profile]
         if self.is_leech and self.is_file:
             new_folder = ospath.splitext(dl_path)[0]
             name = ospath.basename(dl_path)
             await makedirs(new_folder, exist_ok=True)
             new_dl_path = f"{new_folder}/{name}"
             await move(dl_path, new_dl_path)
+            self.tree.move(dl_path, new_dl_path)
             dl_path = new_dl_path
-            up_path = f"{new_dl_path}.zip"
+            up_path = f"{new_dl_path}{ext}"
             self.is_file = False
         else:
-            up_path = f"{dl_path}.zip"
+            up_path = f"{dl_path}{ext}"
         sevenz = SevenZ(self)
         async with task_dict_lock:
             task_dict[self.mid] = SevenZStatus(self, sevenz, gid, "Zip")
-        return await sevenz.zip(dl_path, up_path, pswd)
+        if not cpu_bound:
+            return await sevenz.zip(dl_path, up_path, pswd, profile)
+        self.progress = False
+        async with cpu_eater_lock:
+            self.progress = True
+            return await sevenz.zip(dl_path, up_path, pswd, profile)
 
+    @timed_stage("split")
     async def proceed_split(self, dl_path, gid):
         """Splits files larger than the specified split size."""
         self.files_to_proceed = {}
-        if self.is_file:
-            f_size = await get_path_size(dl_path)
+        for f_path, f_size in self.tree.files(dl_path):
             if f_size > self.split_size:
-                self.files_to_proceed[dl_path] = [f_size, ospath.basename(dl_path)]
-        else:
-            for dirpath, _, files in await sync_to_async(
-                walk,
-                dl_path,
-                topdown=False,
-            ):
-                for file_ in files:
-                    f_path = ospath.join(dirpath, file_)
-                    f_size = await get_path_size(f_path)
-                    if f_size > self.split_size:
-                        self.files_to_proceed[f_path] = [f_size, file_]
+                self.files_to_proceed[f_path] = [f_size, ospath.basename(f_path)]
         if self.files_to_proceed:
             ffmpeg = FFMpeg(self)
             async with task_dict_lock:
@@ -1220,9 +1333,11 @@ class TaskConfig:
                         await remove(f_path)
                     except Exception:
                         self.is_cancelled = True
+                await self.tree.refresh_files(ospath.dirname(f_path))
             return None
         return None
 
+    @timed_stage("metadata")
     async def proceed_metadata(self, dl_path, gid):
         """Adds metadata to MKV files based on the task's metadata key."""
         key = self.metadata
@@ -1247,15 +1362,12 @@ class TaskConfig:
                     self.subsize = self.size
                     res = await ffmpeg.metadata_watermark_cmds(cmd, dl_path)
                     if res:
-                        os.replace(temp_file, dl_path)
+                        await replace(temp_file, dl_path)
+                        await self.tree.rescan(dl_path)
                     elif await aiopath.exists(temp_file):
-                        os.remove(temp_file)
+                        await remove(temp_file)
         else:
-            for dirpath, _, files in await sync_to_async(
-                walk,
-                dl_path,
-                topdown=False,
-            ):
+            for dirpath, _, files in self.tree.walk(dl_path, topdown=False):
                 for file_ in files:
                     file_path = ospath.join(dirpath, file_)
                     if self.is_cancelled:
@@ -1278,20 +1390,22 @@ class TaskConfig:
                                 await cpu_eater_lock.acquire()
                                 self.progress = True
                             LOGGER.info(f"Running metadata command for: {file_path}")
-                            self.subsize = await aiopath.getsize(file_path)
+                            self.subsize = self.tree.size(file_path)
                             self.subname = file_
                             res = await ffmpeg.metadata_watermark_cmds(
                                 cmd,
                                 file_path,
                             )
                             if res:
-                                os.replace(temp_file, file_path)
+                                await replace(temp_file, file_path)
+                                await self.tree.rescan(file_path)
                             elif await aiopath.exists(temp_file):
-                                os.remove(temp_file)
+                                await remove(temp_file)
         if checked:
             cpu_eater_lock.release()
         return dl_path
 
+    @timed_stage("watermark")
     async def proceed_watermark(self, dl_path, gid):
         """Adds a text watermark to MKV video files."""
         key = self.watermark
@@ -1316,15 +1430,12 @@ class TaskConfig:
                     self.subsize = self.size
                     res = await ffmpeg.metadata_watermark_cmds(cmd, dl_path)
                     if res:
-                        os.replace(temp_file, dl_path)
+                        await replace(temp_file, dl_path)
+                        await self.tree.rescan(dl_path)
                     elif await aiopath.exists(temp_file):
-                        os.remove(temp_file)
+                        await remove(temp_file)
         else:
-            for dirpath, _, files in await sync_to_async(
-                walk,
-                dl_path,
-                topdown=False,
-            ):
+            for dirpath, _, files in self.tree.walk(dl_path, topdown=False):
                 for file_ in files:
                     file_path = ospath.join(dirpath, file_)
                     if self.is_cancelled:
@@ -1348,20 +1459,22 @@ class TaskConfig:
                             LOGGER.info(
                                 f"Running watermark command for: {file_path}"
                             )
-                            self.subsize = await aiopath.getsize(file_path)
+                            self.subsize = self.tree.size(file_path)
                             self.subname = file_
                             res = await ffmpeg.metadata_watermark_cmds(
                                 cmd,
                                 file_path,
                             )
                             if res:
-                                os.replace(temp_file, file_path)
+                                await replace(temp_file, file_path)
+                                await self.tree.rescan(file_path)
                             elif await aiopath.exists(temp_file):
-                                os.remove(temp_file)
+                                await remove(temp_file)
         if checked:
             cpu_eater_lock.release()
         return dl_path
 
+    @timed_stage("embed_thumb")
     async def proceed_embed_thumb(self, dl_path, gid):
         """Embeds a thumbnail into MKV video files."""
         thumb = self.e_thumb
@@ -1386,15 +1499,12 @@ class TaskConfig:
                     self.subsize = self.size
                     res = await ffmpeg.metadata_watermark_cmds(cmd, dl_path)
                     if res:
-                        os.replace(temp_file, dl_path)
+                        await replace(temp_file, dl_path)
+                        await self.tree.rescan(dl_path)
                     elif await aiopath.exists(temp_file):
-                        os.remove(temp_file)
+                        await remove(temp_file)
         else:
-            for dirpath, _, files in await sync_to_async(
-                walk,
-                dl_path,
-                topdown=False,
-            ):
+            for dirpath, _, files in self.tree.walk(dl_path, topdown=False):
                 for file_ in files:
                     file_path = ospath.join(dirpath, file_)
                     if self.is_cancelled:
@@ -1416,16 +1526,17 @@ class TaskConfig:
                                 await cpu_eater_lock.acquire()
                                 self.progress = True
                             LOGGER.info(f"Running cmd for: {file_path}")
-                            self.subsize = await aiopath.getsize(file_path)
+                            self.subsize = self.tree.size(file_path)
                             self.subname = file_
                             res = await ffmpeg.metadata_watermark_cmds(
                                 cmd,
                                 file_path,
                             )
                             if res:
-                                os.replace(temp_file, file_path)
+                                await replace(temp_file, file_path)
+                                await self.tree.rescan(file_path)
                             elif await aiopath.exists(temp_file):
-                                os.remove(temp_file)
+                                await remove(temp_file)
         if checked:
             cpu_eater_lock.release()
         return dl_path
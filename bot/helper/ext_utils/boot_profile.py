@@ -0,0 +1,81 @@
+import builtins
+import sys
+from contextlib import contextmanager
+from logging import getLogger
+from os import environ
+from threading import get_ident
+from time import perf_counter
+
+LOGGER = getLogger(__name__)
+
+# set BOOT_PROFILE=1 in the environment to log what the boot spends time on
+ENABLED = environ.get("BOOT_PROFILE", "").lower() in ("1", "true", "yes")
+REPORT_LIMIT = 15
+
+_original_import = builtins.__import__
+# top level package -> seconds spent importing it, minus its nested imports
+_imports = {}
+# boot step -> seconds
+_steps = {}
+# thread id -> [started, seconds taken by nested imports]
+_stacks = {}
+_started = perf_counter()
+
+
+def _profiled_import(name, globals=None, locals=None, fromlist=(), level=0):
+    if level or name in sys.modules:
+        return _original_import(name, globals, locals, fromlist, level)
+    stack = _stacks.setdefault(get_ident(), [])
+    frame = [perf_counter(), 0.0]
+    stack.append(frame)
+    try:
+        return _original_import(name, globals, locals, fromlist, level)
+    finally:
+        stack.pop()
+        took = perf_counter() - frame[0]
+        package = name.partition(".")[0]
+        _imports[package] = _imports.get(package, 0.0) + took - frame[1]
+        if stack:
+            stack[-1][1] += took
+
+
+def install():
+    """Starts timing first imports, when BOOT_PROFILE is set."""
+    if ENABLED and builtins.__import__ is _original_import:
+        builtins.__import__ = _profiled_import
+
+
+@contextmanager
+def step(name):
+    """Times a synchronous boot step."""
+    start = perf_counter()
+    try:
+        yield
+    finally:
+        if ENABLED:
+            _steps[name] = perf_counter() - start
+
+
+async def timed(name, awaitable):
+    """Awaits `awaitable` and records how long it took as the boot step `name`."""
+    start = perf_counter()
+    try:
+        return await awaitable
+    finally:
+        if ENABLED:
+            _steps[name] = perf_counter() - start
+
+
+def report():
+    """Logs the slowest imports and steps, then stops timing imports."""
+    if not ENABLED:
+        return
+    builtins.__import__ = _original_import
+    lines = [f"Boot took {perf_counter() - _started:.2f}s"]
+    steps = sorted(_steps.items(), key=lambda s: s[1], reverse=True)
+    imports = sorted(_imports.items(), key=lambda i: i[1], reverse=True)
+    lines.append("Steps:")
+    lines.extend(f"  {took:7.3f}s {name}" for name, took in steps)
+    lines.append(f"Imports ({sum(_imports.values()):.2f}s in total):")
+    lines.extend(f"  {took:7.3f}s {name}" for name, took in imports[:REPORT_LIMIT])
+    LOGGER.info("\n".join(lines))
@@ -6,15 +6,13 @@ from asyncio import (
     sleep,
 )
 from asyncio.subprocess import PIPE
-from concurrent.futures import ThreadPoolExecutor
 from functools import partial, wraps
 
-from httpx import AsyncClient
-
 from bot import bot_loop, user_data
 from bot.core.config_manager import Config
 from bot.helper.telegram_helper.button_build import ButtonMaker
 
+from .executors import get_pool
 from .help_messages import (
     CLONE_HELP_DICT,
     MIRROR_HELP_DICT,
@@ -24,8 +22,6 @@ from .telegraph_helper import telegraph
 
 COMMAND_USAGE = {}
 
-THREAD_POOL = ThreadPoolExecutor(max_workers=500)
-
 
 class SetInterval:
     """
@@ -248,26 +244,6 @@ def get_size_bytes(size):
     return size
 
 
-async def get_content_type(url):
-    """
-    Fetches the Content-Type header for a given URL.
-
-    Args:
-        url: The URL to check.
-
-    Returns:
-        The Content-Type string or None if an error occurs or header is not found.
-    """
-    try:
-        async with AsyncClient(follow_redirects=True, verify=False) as client:
-            response = await client.head(url)
-            if "Content-Type" not in response.headers:
-                response = await client.get(url)
-            return response.headers.get("Content-Type")
-    except Exception:
-        return None
-
-
 def update_user_ldata(id_, key, value):
     """
     Updates or adds a key-value pair to a user's data in the global user_data dictionary.
@@ -318,21 +294,24 @@ def new_task(func):
     return wrapper
 
 
-async def sync_to_async(func, *args, wait=True, **kwargs):
+async def sync_to_async(func, *args, wait=True, pool=None, **kwargs):
     """
-    Runs a synchronous function asynchronously in a dedicated thread pool.
+    Runs a synchronous function asynchronously in one of the named executor pools.
 
     Args:
         func: The synchronous function to run.
         *args: Arguments to pass to the function.
         wait: If True (default), awaits the result. Otherwise, returns the future.
+        pool: Workload class to run on: "fs" (default), "net", "transfer" or
+              "cpu". "cpu" runs in a worker process, so `func` and its
+              arguments must be picklable.
         **kwargs: Keyword arguments to pass to the function.
 
     Returns:
         The result of the function if wait is True, otherwise the Future object.
     """
     pfunc = partial(func, *args, **kwargs)
-    future = bot_loop.run_in_executor(THREAD_POOL, pfunc)
+    future = get_pool(pool).run(bot_loop, pfunc)
     return await future if wait else future
 
 
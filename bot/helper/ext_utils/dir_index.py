@@ -0,0 +1,245 @@
+from os import path as ospath
+from os import scandir
+
+from .bot_utils import sync_to_async
+
+
+def _scan_dir(dirpath, stack=None):
+    """
+    Lists one directory with os.scandir and returns [dirs, {file: size}].
+
+    Mirrors os.walk: symlinked directories are listed but never pushed onto
+    `stack` and symlinked files report the size of their target.
+    """
+    dirs, files = [], {}
+    with scandir(dirpath) as it:
+        for entry in it:
+            try:
+                is_dir = entry.is_dir()
+            except OSError:
+                is_dir = False
+            if is_dir:
+                dirs.append(entry.name)
+                if stack is not None and not entry.is_symlink():
+                    stack.append(entry.path)
+                continue
+            try:
+                files[entry.name] = entry.stat().st_size
+            except OSError:
+                files[entry.name] = 0
+    return [dirs, files]
+
+
+def _scan_tree(top):
+    """Scans `top` recursively and returns {dirpath: [dirs, {file: size}]}."""
+    nodes = {}
+    stack = [top]
+    while stack:
+        dirpath = stack.pop()
+        try:
+            nodes[dirpath] = _scan_dir(dirpath, stack)
+        except OSError:
+            continue
+    return nodes
+
+
+def _scan_path(path):
+    if ospath.isdir(path):
+        return "dir", _scan_tree(path)
+    try:
+        return "file", ospath.getsize(path)
+    except OSError:
+        return None, None
+
+
+class DirIndex:
+    """
+    In-memory index of a task directory, built with a single scandir pass.
+
+    Post-download stages read file listings and sizes from the index and keep
+    it up to date as they add, remove or rename files, so the total size is
+    always known without walking the tree again.
+    """
+
+    def __init__(self, root):
+        self.root = ospath.normpath(root)
+        self._dirs = {}
+        self._total = 0
+
+    @classmethod
+    async def build(cls, root):
+        index = cls(root)
+        await index.rescan(index.root)
+        return index
+
+    @property
+    def total_size(self):
+        return self._total
+
+    @staticmethod
+    def _norm(path):
+        return ospath.normpath(path)
+
+    def _ensure_dir(self, dirpath):
+        if (node := self._dirs.get(dirpath)) is not None:
+            return node
+        node = self._dirs[dirpath] = [[], {}]
+        if dirpath != self.root and dirpath.startswith(f"{self.root}/"):
+            parent, name = ospath.split(dirpath)
+            pdirs = self._ensure_dir(parent)[0]
+            if name not in pdirs:
+                pdirs.append(name)
+        return node
+
+    def _subtree(self, dirpath):
+        prefix = f"{dirpath}/"
+        return [d for d in self._dirs if d == dirpath or d.startswith(prefix)]
+
+    def is_file(self, path):
+        parent, name = ospath.split(self._norm(path))
+        node = self._dirs.get(parent)
+        return node is not None and name in node[1]
+
+    def is_dir(self, path):
+        return self._norm(path) in self._dirs
+
+    def listdir(self, path):
+        """Returns the names directly inside an indexed directory."""
+        node = self._dirs.get(self._norm(path))
+        return [*node[0], *node[1]] if node is not None else []
+
+    def size(self, path=None):
+        """Returns the size of a file or directory, O(1) for the index root."""
+        path = self._norm(path) if path else self.root
+        if path == self.root:
+            return self._total
+        parent, name = ospath.split(path)
+        node = self._dirs.get(parent)
+        if node is not None and name in node[1]:
+            return node[1][name]
+        return sum(sum(self._dirs[d][1].values()) for d in self._subtree(path))
+
+    def discard(self, path):
+        """Drops a file or a whole directory from the index."""
+        path = self._norm(path)
+        parent, name = ospath.split(path)
+        node = self._dirs.get(parent)
+        if node is not None and name in node[1]:
+            self._total -= node[1].pop(name)
+            return
+        for d in self._subtree(path):
+            self._total -= sum(self._dirs.pop(d)[1].values())
+        if node is not None and name in node[0]:
+            node[0].remove(name)
+
+    def move(self, src, dst):
+        """Records a rename of a file or directory without touching the disk."""
+        src, dst = self._norm(src), self._norm(dst)
+        if src == dst:
+            return
+        sparent, sname = ospath.split(src)
+        snode = self._dirs.get(sparent)
+        dparent, dname = ospath.split(dst)
+        if snode is not None and sname in snode[1]:
+            size = snode[1].pop(sname)
+            self._total -= size
+            self.discard(dst)
+            self._ensure_dir(dparent)[1][dname] = size
+            self._total += size
+            return
+        moved = self._subtree(src)
+        if not moved:
+            return
+        self.discard(dst)
+        for d in moved:
+            self._dirs[f"{dst}{d[len(src) :]}"] = self._dirs.pop(d)
+        if snode is not None and sname in snode[0]:
+            snode[0].remove(sname)
+        dnode = self._ensure_dir(dparent)
+        if dname not in dnode[0] and dst != self.root:
+            dnode[0].append(dname)
+
+    async def rescan(self, path):
+        """Re-reads a file or directory from disk and replaces its entries."""
+        path = self._norm(path)
+        self.discard(path)
+        kind, data = await sync_to_async(_scan_path, path)
+        if kind == "file":
+            parent, name = ospath.split(path)
+            self._ensure_dir(parent)[1][name] = data
+            self._total += data
+        elif kind == "dir":
+            for dirpath, node in data.items():
+                self._dirs[dirpath] = node
+                self._total += sum(node[1].values())
+            if path != self.root:
+                parent, name = ospath.split(path)
+                pdirs = self._ensure_dir(parent)[0]
+                if name not in pdirs:
+                    pdirs.append(name)
+
+    async def refresh_files(self, dirpath):
+        """
+        Re-reads the files directly inside `dirpath`, keeping known
+        subdirectories and scanning only the new ones.
+        """
+        dirpath = self._norm(dirpath)
+        known = self._dirs.get(dirpath)
+        if known is None:
+            await self.rescan(dirpath)
+            return
+        try:
+            dirs, files = await sync_to_async(_scan_dir, dirpath)
+        except OSError:
+            self.discard(dirpath)
+            return
+        self._total += sum(files.values()) - sum(known[1].values())
+        known[1] = files
+        for name in list(known[0]):
+            if name not in dirs:
+                self.discard(f"{dirpath}/{name}")
+        for name in dirs:
+            if name not in known[0]:
+                await self.rescan(f"{dirpath}/{name}")
+
+    def walk(self, path=None, topdown=True):
+        """Returns an os.walk-like snapshot of the indexed tree under `path`."""
+        path = self._norm(path) if path else self.root
+        result = []
+        if path not in self._dirs:
+            return result
+        stack = [(path, False)]
+        while stack:
+            dirpath, visited = stack.pop()
+            dirs, files = self._dirs[dirpath]
+            entry = (dirpath, list(dirs), list(files))
+            if visited:
+                result.append(entry)
+                continue
+            if topdown:
+                result.append(entry)
+            else:
+                stack.append((dirpath, True))
+            stack.extend(
+                (f"{dirpath}/{d}", False)
+                for d in reversed(dirs)
+                if f"{dirpath}/{d}" in self._dirs
+            )
+        return result
+
+    def files(self, path=None, predicate=None):
+        """Yields (file_path, size) under `path`, optionally filtered by name."""
+        path = self._norm(path) if path else self.root
+        if self.is_file(path):
+            parent, name = ospath.split(path)
+            if predicate is None or predicate(name):
+                yield path, self._dirs[parent][1][name]
+            return
+        for dirpath, _, names in self.walk(path, topdown=False):
+            node = self._dirs.get(dirpath)
+            for name in names:
+                if predicate is None or predicate(name):
+                    yield (
+                        ospath.join(dirpath, name),
+                        node[1].get(name, 0) if node else 0,
+                    )
@@ -0,0 +1,156 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+from threading import Lock
+from time import monotonic
+
+from bot import cpu_no
+
+# Workload classes and their worker limits. Each class gets its own executor so
+# a burst in one (e.g. yt-dlp extractions) can't starve another (e.g. libmagic).
+POOL_LIMITS = {
+    # walk(), libmagic, os/shutil calls: short and disk bound
+    "fs": min(32, cpu_no * 4),
+    # short blocking network calls: Drive API, direct links, yt-dlp extract_info
+    "net": 64,
+    # long-lived blocking transfers that hold a thread for the whole task
+    "transfer": 200,
+    # CPU bound work (PIL, hashing) in worker processes
+    "cpu": max(1, cpu_no - 1),
+}
+
+DEFAULT_POOL = "fs"
+
+
+class ExecutorPool:
+    """
+    A named executor with per-pool limits and queue/latency accounting.
+
+    Thread pools record queue wait and run time separately. Process pools can
+    only be timed from the parent, so their wait is folded into the run time.
+    """
+
+    def __init__(self, name, max_workers, process=False):
+        self.name = name
+        self.max_workers = max_workers
+        self.process = process
+        self._executor = None
+        self._lock = Lock()
+        self.submitted = 0
+        self.completed = 0
+        self.failed = 0
+        self.active = 0
+        self.total_wait = 0.0
+        self.total_run = 0.0
+        self.max_wait = 0.0
+
+    @property
+    def executor(self):
+        if self._executor is None:
+            with self._lock:
+                if self._executor is None:
+                    if self.process:
+                        self._executor = ProcessPoolExecutor(
+                            max_workers=self.max_workers,
+                            # forking the threaded bot could copy held locks
+                            mp_context=get_context("spawn"),
+                        )
+                    else:
+                        self._executor = ThreadPoolExecutor(
+                            max_workers=self.max_workers,
+                            thread_name_prefix=f"{self.name}-pool",
+                        )
+        return self._executor
+
+    @property
+    def queued(self):
+        return self.submitted - self.completed - self.failed - self.active
+
+    def _timed(self, func, submitted_at):
+        started = monotonic()
+        wait = started - submitted_at
+        with self._lock:
+            self.active += 1
+            self.total_wait += wait
+            self.max_wait = max(self.max_wait, wait)
+        ok = False
+        try:
+            result = func()
+            ok = True
+            return result
+        finally:
+            with self._lock:
+                self.active -= 1
+                self.total_run += monotonic() - started
+                if ok:
+                    self.completed += 1
+                else:
+                    self.failed += 1
+
+    def _process_done(self, future, submitted_at):
+        with self._lock:
+            self.active -= 1
+            self.total_run += monotonic() - submitted_at
+            if future.cancelled() or future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def run(self, loop, pfunc):
+        """Schedules `pfunc` on this pool and returns an asyncio future."""
+        submitted_at = monotonic()
+        with self._lock:
+            self.submitted += 1
+        if self.process:
+            with self._lock:
+                self.active += 1
+            future = loop.run_in_executor(self.executor, pfunc)
+            future.add_done_callback(
+                lambda fut: self._process_done(fut, submitted_at),
+            )
+            return future
+        return loop.run_in_executor(
+            self.executor,
+            self._timed,
+            pfunc,
+            submitted_at,
+        )
+
+    def stats(self):
+        done = self.completed + self.failed
+        return {
+            "max_workers": self.max_workers,
+            "submitted": self.submitted,
+            "completed": self.completed,
+            "failed": self.failed,
+            "active": self.active,
+            "queued": self.queued,
+            "avg_wait": self.total_wait / done if done else 0.0,
+            "max_wait": self.max_wait,
+            "avg_run": self.total_run / done if done else 0.0,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+POOLS = {
+    name: ExecutorPool(name, limit, process=name == "cpu")
+    for name, limit in POOL_LIMITS.items()
+}
+
+
+def get_pool(name=None):
+    """Returns the named pool, raising KeyError for unknown workload classes."""
+    return POOLS[name or DEFAULT_POOL]
+
+
+def executor_stats():
+    """Returns a snapshot of the accounting counters of every pool."""
+    return {name: pool.stats() for name, pool in POOLS.items()}
+
+
+def shutdown_pools():
+    for pool in POOLS.values():
+        pool.shutdown()
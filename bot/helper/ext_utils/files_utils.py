@@ -1,16 +1,20 @@
+import contextlib
 from asyncio import create_subprocess_exec, sleep, wait_for
 from asyncio.subprocess import PIPE
+from fcntl import ioctl
+from os import link, makedirs, readlink, replace, scandir, symlink, unlink, walk
 from os import path as ospath
-from os import readlink, walk
 from re import IGNORECASE, escape
 from re import search as re_search
 from re import split as re_split
+from shutil import copystat, rmtree
+from time import time_ns
 
 from aiofiles.os import (
     listdir,
     remove,
+    rename,
     rmdir,
-    symlink,
 )
 from aiofiles.os import (
     makedirs as aiomakedirs,
@@ -24,10 +28,11 @@ from aiofiles.os import (
 from aioshutil import rmtree as aiormtree
 from magic import Magic
 
-from bot import DOWNLOAD_DIR, LOGGER
+from bot import DOWNLOAD_DIR, LOGGER, bot_loop, cpu_no
 from bot.core.torrent_manager import TorrentManager
 
 from .bot_utils import cmd_exec, sync_to_async
+from .dir_index import DirIndex
 from .exceptions import NotSupportedExtractionArchive
 
 # List of recognized archive file extensions
@@ -106,12 +111,63 @@ FIRST_SPLIT_REGEX = (
 # Regex to identify parts of a split archive (e.g., .r01, .7z.002, .part2.rar)
 SPLIT_REGEX = r"\.r\d+$|\.7z\.\d+$|\.z\d+$|\.zip\.\d+$|\.part\d+\.rar$"
 
+# Independent archive sets extracted at the same time within one task
+SEVENZ_MAX_JOBS = max(1, min(4, cpu_no // 2))
+
+# Compression profiles for -z: extension, 7z arguments (None means a streamed
+# tar | zstd pipe) and whether the profile is CPU bound. Mainline 7z has no
+# zstd codec, so the fast zstd profile streams through the zstd binary.
+ZIP_PROFILES = {
+    "store": (".zip", ["-tzip", "-mx=0"], False),
+    "lzma2-mt": (".7z", ["-t7z", "-m0=lzma2", "-mx=5"], True),
+    "zstd-fast": (".tar.zst", None, True),
+}
+DEFAULT_ZIP_PROFILE = "store"
+
 
 def is_first_archive_split(file: str) -> bool:
     """Checks if the filename matches the pattern for the first part of a split archive."""
     return bool(re_search(FIRST_SPLIT_REGEX, file.lower(), IGNORECASE))
 
 
+def get_archive_parts(first: str, files: list[str]) -> list[str]:
+    """Returns the files in `files` that belong to the archive set opened by `first`."""
+    name = first.lower()
+    if match := re_search(r"^(.+)\.part0*1\.rar$", name):
+        pattern = rf"^{escape(match[1])}\.part\d+\.rar$"
+    elif match := re_search(r"^(.+)\.(7z|zip)\.0*1$", name):
+        pattern = rf"^{escape(match[1])}\.{match[2]}\.\d+$"
+    elif name.endswith(".rar"):
+        pattern = rf"^{escape(name[:-4])}\.(rar|r\d+)$"
+    elif name.endswith(".zip"):
+        pattern = rf"^{escape(name[:-4])}\.(zip|z\d+)$"
+    else:
+        return [f for f in files if f.lower() == name]
+    return [f for f in files if re_search(pattern, f.lower())]
+
+
+def get_zip_cmd(profile, src, dst, pswd="", volume=0, threads=None):
+    """
+    Builds the command that compresses `src` into `dst` with `profile`.
+    Streamed profiles return a (tar_cmd, zstd_cmd) pair instead.
+    """
+    _, args, _ = ZIP_PROFILES[profile]
+    threads = threads or cpu_no
+    if args is None:
+        parent, name = ospath.split(src.rstrip("/"))
+        return (
+            ["tar", "-C", parent, "-cf", "-", name],
+            ["zstd", "-3", f"-T{threads}", "-q", "-f", "-o", dst],
+        )
+    cmd = ["7z", "a", *args, f"-mmt={threads}"]
+    if volume:
+        cmd.append(f"-v{volume}b")
+    if pswd:
+        cmd.append(f"-p{pswd}")
+    cmd.extend([dst, src, "-bsp1", "-bse1", "-bb3"])
+    return cmd
+
+
 def is_archive(file: str) -> bool:
     """Checks if the file is an archive based on its extension."""
     return file.strip().lower().endswith(tuple(ARCH_EXT))
@@ -145,27 +201,51 @@ async def clean_download(path: str):
             LOGGER.error(str(e))
 
 
-async def clean_all():
-    """Cleans up all torrents and the main download directory."""
+async def clean_all(background=False):
+    """
+    Cleans up all torrents and the main download directory.
+
+    Args:
+        background: Move the old downloads aside and delete them in a
+            background task, so an empty DOWNLOAD_DIR is ready right away.
+    """
     await TorrentManager.remove_all()
     LOGGER.info("Cleaning Download Directory...")
-    await (await create_subprocess_exec("rm", "-rf", DOWNLOAD_DIR)).wait()
+    target = DOWNLOAD_DIR
+    if background and await aiopath.exists(DOWNLOAD_DIR):
+        trash = f"{DOWNLOAD_DIR.rstrip('/')}.trash"
+        try:
+            await aiomakedirs(trash, exist_ok=True)
+            await rename(DOWNLOAD_DIR, f"{trash}/{time_ns()}")
+            target = trash
+        except OSError:
+            # DOWNLOAD_DIR is a mount point or on another filesystem
+            background = False
+    rm = await create_subprocess_exec("rm", "-rf", target)
+    if background:
+        bot_loop.create_task(rm.wait())
+    else:
+        await rm.wait()
     await aiomakedirs(DOWNLOAD_DIR, exist_ok=True)
 
 
 async def clean_unwanted(opath: str):
     """Removes unwanted files (e.g., .parts) and empty .unwanted directories."""
     LOGGER.info(f"Cleaning unwanted files/folders from: {opath}")
-    for dirpath, _, files in await sync_to_async(walk, opath, topdown=False):
+    tree = await DirIndex.build(opath)
+    for dirpath, _, files in tree.walk(topdown=False):
         for filee in files:
             f_path = ospath.join(dirpath, filee)
             if filee.strip().endswith(".parts") and filee.startswith("."):
                 await remove(f_path)
+                tree.discard(f_path)
         if dirpath.strip().endswith(".unwanted"):
             await aiormtree(dirpath, ignore_errors=True)
-    for dirpath, _, __ in await sync_to_async(walk, opath, topdown=False):
-        if not await listdir(dirpath):
+            tree.discard(dirpath)
+    for dirpath, _, __ in tree.walk(topdown=False):
+        if not tree.listdir(dirpath):
             await rmdir(dirpath)
+            tree.discard(dirpath)
 
 
 async def get_path_size(opath: str) -> int:
@@ -209,24 +289,112 @@ def get_base_name(orig_path: str) -> str:
     raise NotSupportedExtractionArchive("File format not supported for extraction")
 
 
-async def create_recursive_symlink(source: str, destination: str):
-    """Creates symbolic links recursively from source to destination.
-    If source is a directory, it replicates the directory structure with symlinks.
-    If source is a file, it creates a symlink for that file.
+# linux/fs.h FICLONE: makes a file share the extents of another, copy on write
+FICLONE = 0x40049409
+SEED_LINK_MODES = ("reflink", "hardlink", "symlink")
+
+
+def _reflink(source, destination):
+    with open(source, "rb") as src, open(destination, "wb") as dst:
+        try:
+            ioctl(dst.fileno(), FICLONE, src.fileno())
+        except OSError:
+            unlink(destination)
+            raise
+    copystat(source, destination)
+
+
+def _link_file(source, destination, modes):
+    """
+    Mirrors one file with the first of `modes` that works, dropping the
+    ones the filesystem refuses so later files don't retry them.
     """
-    if ospath.isdir(source):
-        await aiomakedirs(destination, exist_ok=True)
-        for item in await listdir(source):
-            item_source = ospath.join(source, item)
-            item_dest = ospath.join(destination, item)
-            await create_recursive_symlink(item_source, item_dest)
-    elif ospath.isfile(source):
+    while modes:
+        mode = modes[0]
         try:
-            await symlink(source, destination)
+            if mode == "reflink":
+                _reflink(source, destination)
+            elif mode == "hardlink":
+                link(source, destination)
+            else:
+                symlink(source, destination)
+            return
         except FileExistsError:
-            LOGGER.error(f"Shortcut already exists: {destination}")
-        except Exception as e:
-            LOGGER.error(f"Error creating shortcut for {source}: {e}")
+            LOGGER.error(f"Seeding copy already exists: {destination}")
+            return
+        except OSError as e:
+            if len(modes) == 1:
+                LOGGER.error(f"Error mirroring {source} for seeding: {e}")
+                return
+            modes.pop(0)
+
+
+def _build_seed_workspace(source, destination):
+    modes = list(SEED_LINK_MODES)
+    if not ospath.isdir(source):
+        _link_file(source, destination, modes)
+        return modes[0]
+    stack = [(source, destination)]
+    while stack:
+        src_dir, dst_dir = stack.pop()
+        makedirs(dst_dir, exist_ok=True)
+        with scandir(src_dir) as it:
+            for entry in it:
+                target = ospath.join(dst_dir, entry.name)
+                if entry.is_dir():
+                    stack.append((entry.path, target))
+                elif entry.is_file():
+                    _link_file(entry.path, target, modes)
+    return modes[0]
+
+
+async def create_seed_workspace(source: str, destination: str) -> str:
+    """Mirrors source into destination so post-processing can rename, replace
+    and delete files there while the torrent keeps seeding the originals.
+    Files are reflinked where the filesystem supports it, hardlinked
+    otherwise and symlinked as a last resort, all in one pass off the loop.
+
+    Returns:
+        The link mode the mirror ended up using.
+    """
+    return await sync_to_async(_build_seed_workspace, source, destination)
+
+
+def _free_name(path):
+    base, ext = ospath.splitext(path)
+    n = 1
+    while ospath.lexists(f"{base}_{n}{ext}"):
+        n += 1
+    return f"{base}_{n}{ext}"
+
+
+def _merge_tree(source, destination):
+    stack = [(source, destination)]
+    while stack:
+        src_dir, dst_dir = stack.pop()
+        with scandir(src_dir) as it:
+            entries = list(it)
+        for entry in entries:
+            target = ospath.join(dst_dir, entry.name)
+            if (
+                entry.is_dir(follow_symlinks=False)
+                and ospath.isdir(target)
+                and not ospath.islink(target)
+            ):
+                stack.append((entry.path, target))
+                continue
+            if ospath.lexists(target):
+                # same as 7z -aot, the entry already there gets renamed
+                replace(target, _free_name(target))
+            replace(entry.path, target)
+    # only the emptied folders that were merged into existing ones are left
+    rmtree(source, ignore_errors=True)
+
+
+async def merge_extracted(source: str, destination: str):
+    """Moves everything extracted into source over to destination, merging
+    folders that exist in both, then removes source."""
+    await sync_to_async(_merge_tree, source, destination)
 
 
 def get_mime_type(file_path: str) -> str:
@@ -238,10 +406,18 @@ def get_mime_type(file_path: str) -> str:
     return mime_type or "text/plain"
 
 
-async def remove_excluded_files(fpath, ee):
+async def remove_excluded_files(fpath, ee, tree=None):
+    ee = tuple(ee)
+    if tree is not None:
+        for f_path, _ in list(
+            tree.files(fpath, lambda f: f.strip().lower().endswith(ee)),
+        ):
+            await remove(f_path)
+            tree.discard(f_path)
+        return
     for root, _, files in await sync_to_async(walk, fpath):
         for f in files:
-            if f.strip().lower().endswith(tuple(ee)):
+            if f.strip().lower().endswith(ee):
                 await remove(ospath.join(root, f))
 
 
@@ -305,43 +481,91 @@ async def split_file(f_path, split_size, listener):
     return True
 
 
+class SevenZJob:
+    """State of one 7z process: its subprocess, input size and progress.
+    Only named jobs are shown as the task's subname.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.proc = None
+        self.pipe = None
+        self.size = 0
+        self.processed_bytes = 0
+        self.percentage = "0%"
+
+
 class SevenZ:
     def __init__(self, listener):
         self._listener = listener
-        self._processed_bytes = 0
-        self._percentage = "0%"
+        self._jobs = []
 
     @property
     def processed_bytes(self):
-        return self._processed_bytes
+        return sum(job.processed_bytes for job in self._jobs)
 
     @property
     def progress(self):
-        return self._percentage
-
-    async def _sevenz_progress(self):
+        if len(self._jobs) == 1:
+            return self._jobs[0].percentage
+        if size := sum(job.size for job in self._jobs):
+            return f"{round(self.processed_bytes / size * 100, 2)}%"
+        return "0%"
+
+    def _update_listener(self):
+        self._listener.subsize = sum(job.size for job in self._jobs)
+        names = [job.name for job in self._jobs if job.name]
+        if names and not self._listener.is_file:
+            self._listener.subname = ", ".join(names)
+
+    def kill(self):
+        """Kills every running 7z process of this task."""
+        for job in self._jobs:
+            for proc in (job.proc, job.pipe):
+                if proc is not None and proc.returncode is None:
+                    with contextlib.suppress(Exception):
+                        proc.kill()
+
+    async def _run(self, job, cmd):
+        job.proc = self._listener.subproc = await create_subprocess_exec(
+            *cmd,
+            stdout=PIPE,
+            stderr=PIPE,
+        )
+        self._jobs.append(job)
+        self._update_listener()
+        try:
+            await self._sevenz_progress(job)
+            _, stderr = await job.proc.communicate()
+        finally:
+            self._jobs.remove(job)
+            self._update_listener()
+        return job.proc.returncode, stderr
+
+    async def _sevenz_progress(self, job):
         pattern = r"(\d+)\s+bytes|Total Physical Size\s*=\s*(\d+)"
         while not (
-            self._listener.subproc.returncode is not None
+            job.proc.returncode is not None
             or self._listener.is_cancelled
-            or self._listener.subproc.stdout.at_eof()
+            or job.proc.stdout.at_eof()
         ):
             try:
-                line = await wait_for(self._listener.subproc.stdout.readline(), 2)
+                line = await wait_for(job.proc.stdout.readline(), 2)
             except Exception:
                 break
             line = line.decode().strip()
             if match := re_search(pattern, line):
-                self._listener.subsize = int(match[1] or match[2])
+                job.size = int(match[1] or match[2])
+                self._update_listener()
             await sleep(0.05)
         s = b""
         while not (
             self._listener.is_cancelled
-            or self._listener.subproc.returncode is not None
-            or self._listener.subproc.stdout.at_eof()
+            or job.proc.returncode is not None
+            or job.proc.stdout.at_eof()
         ):
             try:
-                char = await wait_for(self._listener.subproc.stdout.read(1), 60)
+                char = await wait_for(job.proc.stdout.read(1), 60)
             except Exception:
                 break
             if not char:
@@ -349,18 +573,18 @@ class SevenZ:
             s += char
             if char == b"%":
                 try:
-                    self._percentage = s.decode().rsplit(" ", 1)[-1].strip()
-                    self._processed_bytes = (
-                        int(self._percentage.strip("%")) / 100
-                    ) * self._listener.subsize
+                    job.percentage = s.decode().rsplit(" ", 1)[-1].strip()
+                    job.processed_bytes = (
+                        int(job.percentage.strip("%")) / 100
+                    ) * job.size
                 except Exception:
-                    self._processed_bytes = 0
-                    self._percentage = "0%"
+                    job.processed_bytes = 0
+                    job.percentage = "0%"
                 s = b""
             await sleep(0.05)
 
-        self._processed_bytes = 0
-        self._percentage = "0%"
+        job.processed_bytes = 0
+        job.percentage = "0%"
 
     async def extract(self, f_path, t_path, pswd):
         cmd = [
@@ -379,14 +603,7 @@ class SevenZ:
             del cmd[2]
         if self._listener.is_cancelled:
             return False
-        self._listener.subproc = await create_subprocess_exec(
-            *cmd,
-            stdout=PIPE,
-            stderr=PIPE,
-        )
-        await self._sevenz_progress()
-        _, stderr = await self._listener.subproc.communicate()
-        code = self._listener.subproc.returncode
+        code, stderr = await self._run(SevenZJob(ospath.basename(f_path)), cmd)
         if self._listener.is_cancelled:
             return False
         if code == -9:
@@ -400,40 +617,58 @@ class SevenZ:
             LOGGER.error(f"{stderr}. Unable to extract archive!. Path: {f_path}")
         return code
 
-    async def zip(self, dl_path, up_path, pswd):
-        size = await get_path_size(dl_path)
-        split_size = self._listener.split_size
-        cmd = [
-            "7z",
-            f"-v{split_size}b",
-            "a",
-            "-mx=0",
-            f"-p{pswd}",
-            up_path,
-            dl_path,
-            "-bsp1",
-            "-bse1",
-            "-bb3",
-        ]
-        if self._listener.is_leech and int(size) > self._listener.split_size:
-            if not pswd:
-                del cmd[4]
-            LOGGER.info(f"Zip: orig_path: {dl_path}, zip_path: {up_path}.0*")
-        else:
-            del cmd[1]
-            if not pswd:
-                del cmd[3]
-            LOGGER.info(f"Zip: orig_path: {dl_path}, zip_path: {up_path}")
-        if self._listener.is_cancelled:
-            return False
-        self._listener.subproc = await create_subprocess_exec(
-            *cmd,
+    async def _stream(self, job, tar_cmd, zstd_cmd):
+        job.proc = self._listener.subproc = await create_subprocess_exec(
+            *tar_cmd,
             stdout=PIPE,
             stderr=PIPE,
         )
-        await self._sevenz_progress()
-        _, stderr = await self._listener.subproc.communicate()
-        code = self._listener.subproc.returncode
+        job.pipe = await create_subprocess_exec(*zstd_cmd, stdin=PIPE, stderr=PIPE)
+        self._jobs.append(job)
+        self._update_listener()
+        try:
+            while not self._listener.is_cancelled:
+                chunk = await job.proc.stdout.read(4194304)
+                if not chunk:
+                    break
+                try:
+                    job.pipe.stdin.write(chunk)
+                    await job.pipe.stdin.drain()
+                except (BrokenPipeError, ConnectionResetError):
+                    break
+                job.processed_bytes += len(chunk)
+                if job.size:
+                    job.percentage = f"{min(100, round(job.processed_bytes / job.size * 100, 2))}%"
+            job.pipe.stdin.close()
+            _, tar_err = await job.proc.communicate()
+            _, zstd_err = await job.pipe.communicate()
+        finally:
+            self._jobs.remove(job)
+            self._update_listener()
+        code = job.proc.returncode or job.pipe.returncode
+        return code, tar_err + zstd_err
+
+    async def zip(self, dl_path, up_path, pswd, profile=DEFAULT_ZIP_PROFILE):
+        if self._listener.tree is not None:
+            size = self._listener.tree.size(dl_path)
+        else:
+            size = await get_path_size(dl_path)
+        split_size = self._listener.split_size
+        volume = (
+            split_size if self._listener.is_leech and int(size) > split_size else 0
+        )
+        cmd = get_zip_cmd(profile, dl_path, up_path, pswd, volume)
+        LOGGER.info(
+            f"Zip ({profile}): orig_path: {dl_path}, zip_path: {up_path}{'.0*' if volume else ''}",
+        )
+        if self._listener.is_cancelled:
+            return False
+        job = SevenZJob(None)
+        if isinstance(cmd, tuple):
+            job.size = size
+            code, stderr = await self._stream(job, *cmd)
+        else:
+            code, stderr = await self._run(job, cmd)
         if self._listener.is_cancelled:
             return False
         if code == -9:
@@ -441,6 +676,9 @@ class SevenZ:
             return False
         if code == 0:
             await clean_target(dl_path)
+            if self._listener.tree is not None:
+                self._listener.tree.discard(dl_path)
+                await self._listener.tree.refresh_files(ospath.dirname(up_path))
             return up_path
         if await aiopath.exists(up_path):
             await remove(up_path)
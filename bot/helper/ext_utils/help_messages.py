@@ -182,7 +182,7 @@ Private: tg://openmessage?user_id=xxxxxx&message_id=xxxxx
 Super: https://t.me/c/channel_id/message_id
 Range: https://t.me/channel_name/first_message_id-last_message_id
 Range Example: tg://openmessage?user_id=xxxxxx&message_id=555-560 or https://t.me/channel_name/100-150
-Note: Range link will work only by replying cmd to it"""
+Note: A range downloads every media in it into one folder as a single task. Use -n to name the folder."""
 
 sample_video = """<b>Sample Video</b>: -sv
 
@@ -202,10 +202,12 @@ seed = """<b>Bittorrent seed</b>: -d
 To specify ratio and seed time add -d ratio:time.
 Example: -d 0.7:10 (ratio and time) or -d 0.7 (only ratio) or -d :10 (only time) where time in minutes"""
 
-zip_arg = """<b>Zip</b>: -z password
+zip_arg = """<b>Zip</b>: -z password -zp profile
 
 /cmd link -z (zip)
-/cmd link -z password (zip password protected)"""
+/cmd link -z password (zip password protected)
+/cmd link -z -zp lzma2-mt (compress with a specific profile)
+Profiles: store (default, no compression), lzma2-mt (.7z, multithreaded), zstd-fast (.tar.zst, mirror only, no password)"""
 
 qual = """<b>Quality Buttons</b>: -s
 
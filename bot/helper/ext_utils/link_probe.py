@@ -0,0 +1,106 @@
+from re import search as re_search
+from time import monotonic
+from urllib.parse import unquote, urlparse
+
+from httpx import AsyncClient, Limits, Timeout
+
+# seconds a probe result is reused for the same url
+PROBE_TTL = 120
+# url -> (expiry, LinkInfo)
+_probe_cache = {}
+_client = AsyncClient(
+    follow_redirects=True,
+    verify=False,
+    timeout=Timeout(20, connect=10),
+    limits=Limits(max_connections=32, max_keepalive_connections=8),
+)
+
+
+class LinkInfo:
+    """What the headers of a direct link say about the file behind it."""
+
+    __slots__ = (
+        "accept_ranges",
+        "content_type",
+        "filename",
+        "size",
+        "status",
+        "url",
+    )
+
+    def __init__(self, response):
+        headers = response.headers
+        self.status = response.status_code
+        self.url = str(response.url)
+        self.content_type = headers.get("Content-Type")
+        self.accept_ranges = response.status_code == 206 or (
+            headers.get("Accept-Ranges", "").lower() == "bytes"
+        )
+        self.size = _content_size(response)
+        self.filename = _content_filename(headers.get("Content-Disposition", ""))
+        if not self.filename:
+            self.filename = unquote(urlparse(self.url).path.rsplit("/", 1)[-1])
+
+    @property
+    def ok(self):
+        return self.status < 400
+
+
+def _content_size(response):
+    if response.status_code >= 400:
+        return 0
+    if response.status_code == 206:
+        # Content-Range: bytes 0-0/12345
+        total = response.headers.get("Content-Range", "").rsplit("/", 1)[-1]
+        return int(total) if total.isdigit() else 0
+    length = response.headers.get("Content-Length", "")
+    return int(length) if length.isdigit() else 0
+
+
+def _content_filename(disposition):
+    if match := re_search(r"filename\*\s*=\s*[\w-]+'[^']*'([^;]+)", disposition):
+        return unquote(match.group(1).strip().strip('"'))
+    if match := re_search(r'filename\s*=\s*"([^"]+)"', disposition):
+        return match.group(1)
+    if match := re_search(r"filename\s*=\s*([^;]+)", disposition):
+        return match.group(1).strip()
+    return ""
+
+
+async def _fetch(url):
+    response = await _client.head(url)
+    if response.status_code < 400 and "Content-Type" in response.headers:
+        return response
+    # some servers refuse HEAD or leave out the headers, so ask for one byte
+    # and close the stream as soon as the headers are in
+    async with _client.stream(
+        "GET", url, headers={"Range": "bytes=0-0"}
+    ) as response:
+        return response
+
+
+async def probe_link(url):
+    """
+    Probes a direct link with HEAD, falling back to a one byte ranged GET that
+    never reads the body. Results are cached for PROBE_TTL seconds so the
+    mirror command, the aria2 options and the queue status share one request.
+
+    Args:
+        url: The http(s) URL to probe.
+
+    Returns:
+        A LinkInfo, or None if the URL isn't http(s) or the request fails.
+    """
+    if not isinstance(url, str) or not url.startswith(("http://", "https://")):
+        return None
+    now = monotonic()
+    if (cached := _probe_cache.get(url)) and cached[0] > now:
+        return cached[1]
+    try:
+        info = LinkInfo(await _fetch(url))
+    except Exception:
+        return None
+    for key in [k for k, v in _probe_cache.items() if v[0] < now]:
+        del _probe_cache[key]
+    _probe_cache[url] = (now + PROBE_TTL, info)
+    return info
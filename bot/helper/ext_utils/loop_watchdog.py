@@ -0,0 +1,145 @@
+import sys
+from asyncio import sleep
+from logging import getLogger
+from threading import Lock, Thread, get_ident
+from time import monotonic
+from time import sleep as thread_sleep
+from traceback import extract_stack, format_list
+
+from bot.helper.ext_utils.metrics import (
+    Counter,
+    loop_lag,
+    loop_lag_seconds,
+    registry,
+)
+
+LOGGER = getLogger(__name__)
+
+# a callback holding the loop longer than this is reported as blocking
+STALL_THRESHOLD = 0.25
+CHECK_INTERVAL = 0.1
+BEAT_INTERVAL = 0.05
+STACK_DEPTH = 12
+
+loop_blocked = registry.add(
+    Counter(
+        "mltb_event_loop_blocked_total",
+        "Callbacks that held the event loop past the stall threshold",
+        ("site",),
+    ),
+)
+loop_blocked_seconds = registry.add(
+    Counter(
+        "mltb_event_loop_blocked_seconds_total",
+        "Seconds the event loop was held by each blocking site",
+        ("site",),
+    ),
+)
+
+
+def _site(stack):
+    """The innermost frame of the bot itself, which is the call to fix."""
+    for frame in reversed(stack):
+        if "/bot/" in frame.filename and not frame.filename.endswith(__file__):
+            return (
+                f"{frame.filename.split('/bot/', 1)[1]}:{frame.lineno} {frame.name}"
+            )
+    last = stack[-1]
+    return f"{last.filename}:{last.lineno} {last.name}"
+
+
+class LoopWatchdog:
+    """
+    Detects callbacks that block the event loop.
+
+    `heartbeat` runs on the loop and stamps the time every BEAT_INTERVAL,
+    reporting how late each beat wakes up as the event loop lag. A daemon
+    thread checks the stamp, and when it goes stale past
+    STALL_THRESHOLD it samples the loop thread's stack. Once the loop
+    resumes, the stall is recorded against the innermost bot frame.
+    """
+
+    def __init__(self):
+        self._beat = monotonic()
+        self._loop_thread = None
+        self._lock = Lock()
+        self._sites = {}
+        self._thread = None
+
+    async def heartbeat(self):
+        self._loop_thread = get_ident()
+        self._beat = monotonic()
+        while True:
+            await sleep(BEAT_INTERVAL)
+            beat = monotonic()
+            lag = max(0.0, beat - self._beat - BEAT_INTERVAL)
+            self._beat = beat
+            loop_lag.set(lag)
+            loop_lag_seconds.observe(lag)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = Thread(
+                target=self._watch, name="loop-watchdog", daemon=True
+            )
+            self._thread.start()
+
+    def _sample(self):
+        frame = sys._current_frames().get(self._loop_thread)
+        if frame is None:
+            return None
+        return extract_stack(frame)[-STACK_DEPTH:]
+
+    def _watch(self):
+        stall_beat = None
+        stack = None
+        while True:
+            thread_sleep(CHECK_INTERVAL)
+            if self._loop_thread is None:
+                continue
+            beat = self._beat
+            if monotonic() - beat > STALL_THRESHOLD:
+                if stall_beat != beat:
+                    stall_beat = beat
+                    stack = self._sample()
+            elif stall_beat is not None:
+                # the loop stamped again after the stall, so it's over
+                if stack:
+                    self._record(stack, beat - stall_beat - BEAT_INTERVAL)
+                stall_beat = None
+                stack = None
+
+    def _record(self, stack, duration):
+        site = _site(stack)
+        with self._lock:
+            count, total, worst, _ = self._sites.get(site, (0, 0.0, 0.0, None))
+            self._sites[site] = (
+                count + 1,
+                total + duration,
+                max(worst, duration),
+                stack,
+            )
+        loop_blocked.inc(site=site)
+        loop_blocked_seconds.inc(duration, site=site)
+        LOGGER.warning(f"Event loop blocked for {duration:.2f}s at {site}")
+
+    def top(self, limit=10):
+        """
+        Returns:
+            (site, count, total, worst, stack) tuples, longest total first.
+        """
+        with self._lock:
+            sites = [(site, *stats) for site, stats in self._sites.items()]
+        sites.sort(key=lambda s: s[2], reverse=True)
+        return sites[:limit]
+
+    def reset(self):
+        with self._lock:
+            self._sites.clear()
+
+    @staticmethod
+    def format_stack(stack):
+        return "".join(format_list(stack))
+
+
+loop_watchdog = LoopWatchdog()
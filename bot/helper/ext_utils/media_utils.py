@@ -1,23 +1,32 @@
 import contextlib
-from asyncio import create_subprocess_exec, gather, sleep, wait_for
+from asyncio import Semaphore, create_subprocess_exec, sleep, wait_for
 from asyncio.subprocess import PIPE
+from collections import OrderedDict
+from hashlib import sha1
 from os import path as ospath
 from re import escape
 from re import search as re_search
 from time import time
 
-from aiofiles.os import makedirs, remove
+from aiofiles.os import listdir, makedirs, remove
 from aiofiles.os import path as aiopath
+from aiofiles.os import stat as aiostat
 from aioshutil import rmtree
 from PIL import Image
 
 from bot import DOWNLOAD_DIR, LOGGER, cpu_no
+from cpu_jobs import convert_to_jpeg
 
 from .bot_utils import cmd_exec, sync_to_async
 from .files_utils import get_mime_type, is_archive, is_archive_split
 from .status_utils import time_to_seconds
 
 
+def get_image_size(path):
+    with Image.open(path) as img:
+        return img.size
+
+
 async def create_thumb(msg, _id=""):
     if not _id:
         _id = time()
@@ -27,7 +36,7 @@ async def create_thumb(msg, _id=""):
     await makedirs(path, exist_ok=True)
     photo_dir = await msg.download()
     output = ospath.join(path, f"{_id}.jpg")
-    await sync_to_async(Image.open(photo_dir).convert("RGB").save, output, "JPEG")
+    await sync_to_async(convert_to_jpeg, photo_dir, output, pool="cpu")
     await remove(photo_dir)
     return output
 
@@ -117,6 +126,97 @@ async def get_document_type(path):
     return is_video, is_audio, is_image
 
 
+# Screenshots and thumbnails are pulled through one ffmpeg process per file,
+# and at most FRAME_JOBS of those run at once across all tasks.
+FRAME_JOBS = max(1, cpu_no // 2)
+FRAME_THREADS = max(1, cpu_no // FRAME_JOBS)
+frame_semaphore = Semaphore(FRAME_JOBS)
+
+
+class ThumbnailCache:
+    """
+    LRU of generated thumbnails keyed by the source file identity.
+
+    The key is built from the inode, size and mtime of the source, so renamed
+    files and upload retries reuse the thumbnail while rewritten files don't.
+    """
+
+    def __init__(self, path, max_entries=256):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+
+    async def key(self, src, *params):
+        try:
+            st = await aiostat(src)
+        except OSError:
+            return None
+        ident = f"{st.st_dev}:{st.st_ino}:{st.st_size}:{st.st_mtime_ns}:{params}"
+        return sha1(ident.encode()).hexdigest()
+
+    async def get(self, key):
+        if key is None or key not in self._entries:
+            return None
+        output = self._entries[key]
+        if not await aiopath.exists(output):
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return output
+
+    async def output(self, key):
+        await makedirs(self.path, exist_ok=True)
+        return ospath.join(self.path, f"{key or time()}.jpg")
+
+    async def add(self, key, output):
+        if key is None:
+            return
+        self._entries[key] = output
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            _, old = self._entries.popitem(last=False)
+            with contextlib.suppress(OSError):
+                await remove(old)
+
+    def owns(self, path):
+        return bool(path) and path.startswith(f"{self.path}/")
+
+
+thumb_cache = ThumbnailCache(f"{DOWNLOAD_DIR}thumbnails/cache")
+
+
+async def extract_frames(video_file, timestamps, outputs, vf=None, quality=1):
+    """
+    Grabs one frame per timestamp into the matching output in a single ffmpeg
+    run. Every timestamp is a separate fast-seeking input of the same file, so
+    only the frames around the seek points get decoded.
+
+    Returns:
+        tuple: (success, stderr)
+    """
+    cmd = ["xtra", "-hide_banner", "-loglevel", "error"]
+    for timestamp in timestamps:
+        cmd.extend(["-ss", f"{timestamp}", "-i", video_file])
+    for i, output in enumerate(outputs):
+        cmd.extend(["-map", f"{i}:V:0"])
+        if vf:
+            cmd.extend(["-vf", vf])
+        cmd.extend(
+            [
+                "-q:v",
+                f"{quality}",
+                "-frames:v",
+                "1",
+                "-threads",
+                f"{FRAME_THREADS}",
+                output,
+            ],
+        )
+    async with frame_semaphore:
+        _, err, code = await wait_for(cmd_exec(cmd), timeout=60)
+    return code == 0, err
+
+
 async def take_ss(video_file, ss_nb) -> bool:
     duration = (await get_media_info(video_file))[0]
     if duration != 0:
@@ -125,34 +225,13 @@ async def take_ss(video_file, ss_nb) -> bool:
         dirpath = f"{dirpath}/{name}_ss"
         await makedirs(dirpath, exist_ok=True)
         interval = duration // (ss_nb + 1)
-        cap_time = interval
-        cmds = []
-        for i in range(ss_nb):
-            output = f"{dirpath}/SS.{name}_{i:02}.png"
-            cmd = [
-                "xtra",
-                "-hide_banner",
-                "-loglevel",
-                "error",
-                "-ss",
-                f"{cap_time}",
-                "-i",
-                video_file,
-                "-q:v",
-                "1",
-                "-frames:v",
-                "1",
-                "-threads",
-                f"{max(1, cpu_no // 2)}",
-                output,
-            ]
-            cap_time += interval
-            cmds.append(cmd_exec(cmd))
+        timestamps = [interval * (i + 1) for i in range(ss_nb)]
+        outputs = [f"{dirpath}/SS.{name}_{i:02}.png" for i in range(ss_nb)]
         try:
-            resutls = await wait_for(gather(*cmds), timeout=60)
-            if resutls[0][2] != 0:
+            success, err = await extract_frames(video_file, timestamps, outputs)
+            if not success:
                 LOGGER.error(
-                    f"Error while creating sreenshots from video. Path: {video_file}. stderr: {resutls[0][1]}",
+                    f"Error while creating sreenshots from video. Path: {video_file}. stderr: {err}",
                 )
                 await rmtree(dirpath, ignore_errors=True)
                 return False
@@ -168,9 +247,10 @@ async def take_ss(video_file, ss_nb) -> bool:
 
 
 async def get_audio_thumbnail(audio_file):
-    output_dir = f"{DOWNLOAD_DIR}thumbnails"
-    await makedirs(output_dir, exist_ok=True)
-    output = ospath.join(output_dir, f"{time()}.jpg")
+    key = await thumb_cache.key(audio_file, "audio")
+    if output := await thumb_cache.get(key):
+        return output
+    output = await thumb_cache.output(key)
     cmd = [
         "xtra",
         "-hide_banner",
@@ -197,41 +277,30 @@ async def get_audio_thumbnail(audio_file):
             f"Error while extracting thumbnail from audio. Name: {audio_file}. Error: Timeout some issues with ffmpeg with specific arch!",
         )
         return None
+    await thumb_cache.add(key, output)
     return output
 
 
 async def get_video_thumbnail(video_file, duration):
-    output_dir = f"{DOWNLOAD_DIR}thumbnails"
-    await makedirs(output_dir, exist_ok=True)
-    output = ospath.join(output_dir, f"{time()}.jpg")
+    key = await thumb_cache.key(video_file, "video")
+    if output := await thumb_cache.get(key):
+        return output
+    output = await thumb_cache.output(key)
 
     if duration is None:
         duration = (await get_media_info(video_file))[0]
     if duration == 0:
         duration = 3
     duration = duration // 2
-    cmd = [
-        "xtra",
-        "-hide_banner",
-        "-loglevel",
-        "error",
-        "-ss",
-        f"{duration}",
-        "-i",
-        video_file,
-        "-vf",
-        "scale=640:-1",
-        "-q:v",
-        "5",
-        "-vframes",
-        "1",
-        "-threads",
-        "1",
-        output,
-    ]
     try:
-        _, err, code = await wait_for(cmd_exec(cmd), timeout=60)
-        if code != 0 or not await aiopath.exists(output):
+        success, err = await extract_frames(
+            video_file,
+            [duration],
+            [output],
+            vf="scale=640:-1",
+            quality=5,
+        )
+        if not success or not await aiopath.exists(output):
             LOGGER.error(
                 f"Error while extracting thumbnail from video. Name: {video_file} stderr: {err}",
             )
@@ -241,18 +310,32 @@ async def get_video_thumbnail(video_file, duration):
             f"Error while extracting thumbnail from video. Name: {video_file}. Error: Timeout some issues with ffmpeg with specific arch!",
         )
         return None
+    await thumb_cache.add(key, output)
     return output
 
 
+async def _existing_screenshots(video_file, ss_nb):
+    """Returns the screenshot folder of `video_file` if it already holds `ss_nb` frames."""
+    dirpath, name = video_file.rsplit("/", 1)
+    dirpath = f"{dirpath}/{ospath.splitext(name)[0]}_ss"
+    if not await aiopath.isdir(dirpath):
+        return None
+    frames = [f for f in await listdir(dirpath) if f.endswith(".png")]
+    return dirpath if len(frames) == ss_nb else None
+
+
 async def get_multiple_frames_thumbnail(video_file, layout, keep_screenshots):
     ss_nb = layout.split("x")
     ss_nb = int(ss_nb[0]) * int(ss_nb[1])
-    dirpath = await take_ss(video_file, ss_nb)
-    if not dirpath:
+    key = await thumb_cache.key(video_file, "tile", layout)
+    if output := await thumb_cache.get(key):
+        return output
+    if dirpath := await _existing_screenshots(video_file, ss_nb):
+        # frames left by -ss belong to the task, reuse them and leave them be
+        keep_screenshots = True
+    elif not (dirpath := await take_ss(video_file, ss_nb)):
         return None
-    output_dir = f"{DOWNLOAD_DIR}thumbnails"
-    await makedirs(output_dir, exist_ok=True)
-    output = ospath.join(output_dir, f"{time()}.jpg")
+    output = await thumb_cache.output(key)
     cmd = [
         "xtra",
         "-hide_banner",
@@ -289,6 +372,7 @@ async def get_multiple_frames_thumbnail(video_file, layout, keep_screenshots):
     finally:
         if not keep_screenshots:
             await rmtree(dirpath, ignore_errors=True)
+    await thumb_cache.add(key, output)
     return output
 
 
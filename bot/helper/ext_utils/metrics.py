@@ -0,0 +1,345 @@
+from asyncio import sleep
+from functools import wraps
+from inspect import iscoroutinefunction
+from logging import getLogger
+from math import inf
+from threading import Lock
+from time import monotonic
+
+from aiofiles import open as aiopen
+from aiofiles.os import path as aiopath
+from aiofiles.os import remove, replace
+
+from bot.core.config_manager import Config
+from bot.helper.ext_utils.executors import executor_stats
+
+LOGGER = getLogger(__name__)
+
+# where the bot drops its metrics for web/wserver.py to serve on /metrics,
+# and the token remote scrapers must send to read them
+METRICS_FILE = "metrics.prom"
+METRICS_TOKEN_FILE = "metrics.token"
+EXPORT_INTERVAL = 10
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, inf)
+STAGE_BUCKETS = (1, 5, 15, 30, 60, 120, 300, 600, 1800, 3600, 7200, inf)
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values):
+    if not names:
+        return ""
+    pairs = ",".join(
+        f'{name}="{_escape(value)}"'
+        for name, value in zip(names, values, strict=True)
+    )
+    return f"{{{pairs}}}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name, doc, labels=()):
+        self.name = name
+        self.doc = doc
+        self.labels = tuple(labels)
+        self._lock = Lock()
+        self._values = {}
+
+    def _key(self, labels):
+        return tuple(labels.get(name, "") for name in self.labels)
+
+    def _samples(self):
+        with self._lock:
+            return [
+                (self.name, self.labels, key, value)
+                for key, value in self._values.items()
+            ]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.doc}", f"# TYPE {self.name} {self.kind}"]
+        for name, label_names, key, value in self._samples():
+            lines.append(f"{name}{_format_labels(label_names, key)} {value}")
+        return lines
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, doc, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, doc, labels)
+        self.buckets = buckets
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            counts, total = self._values.get(key, ([0] * len(self.buckets), 0.0))
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+            self._values[key] = (counts, total + value)
+
+    def _samples(self):
+        samples = []
+        names = (*self.labels, "le")
+        for _, label_names, key, (counts, total) in super()._samples():
+            for bound, count in zip(self.buckets, counts, strict=True):
+                le = "+Inf" if bound == inf else bound
+                samples.append((f"{self.name}_bucket", names, (*key, le), count))
+            samples.append((f"{self.name}_sum", label_names, key, total))
+            samples.append((f"{self.name}_count", label_names, key, counts[-1]))
+        return samples
+
+
+class Registry:
+    """
+    Process-wide metrics in the Prometheus text format.
+
+    Collectors are called at render time for values that are cheaper to read
+    than to track, such as the executor counters.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def add(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def add_collector(self, collector):
+        self._collectors.append(collector)
+
+    def render(self):
+        for collector in self._collectors:
+            collector()
+        lines = []
+        for metric in self._metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+task_stage_seconds = registry.add(
+    Histogram(
+        "mltb_task_stage_seconds",
+        "Time spent in each task stage",
+        ("stage",),
+        STAGE_BUCKETS,
+    ),
+)
+engine_rpc_seconds = registry.add(
+    Histogram(
+        "mltb_engine_rpc_seconds",
+        "Latency of download engine API calls",
+        ("engine", "method"),
+    ),
+)
+engine_rpc_errors = registry.add(
+    Counter(
+        "mltb_engine_rpc_errors_total",
+        "Download engine API calls that raised",
+        ("engine", "method"),
+    ),
+)
+telegram_calls = registry.add(
+    Counter(
+        "mltb_telegram_calls_total",
+        "Telegram API calls by client and method",
+        ("client", "method"),
+    ),
+)
+telegram_flood_wait = registry.add(
+    Counter(
+        "mltb_telegram_flood_wait_seconds_total",
+        "Seconds Telegram asked us to wait through FloodWait",
+        ("client", "method"),
+    ),
+)
+pool_queued = registry.add(
+    Gauge("mltb_pool_queued", "Jobs waiting for an executor worker", ("pool",)),
+)
+pool_active = registry.add(
+    Gauge("mltb_pool_active", "Jobs running on an executor", ("pool",)),
+)
+pool_max_wait = registry.add(
+    Gauge(
+        "mltb_pool_max_wait_seconds",
+        "Longest executor queue wait seen",
+        ("pool",),
+    ),
+)
+loop_lag = registry.add(
+    Gauge("mltb_event_loop_lag_seconds", "Last measured event loop lag"),
+)
+loop_lag_seconds = registry.add(
+    Histogram("mltb_event_loop_lag_samples_seconds", "Event loop lag samples"),
+)
+upload_bytes = registry.add(
+    Counter("mltb_upload_bytes_total", "Bytes uploaded", ("uploader",)),
+)
+upload_speed = registry.add(
+    Histogram(
+        "mltb_upload_speed_bytes",
+        "Average speed of each finished upload in bytes per second",
+        ("uploader",),
+        (2**20, 5 * 2**20, 10 * 2**20, 25 * 2**20, 50 * 2**20, 100 * 2**20, inf),
+    ),
+)
+queue_wait_seconds = registry.add(
+    Histogram(
+        "mltb_queue_wait_seconds",
+        "Time tasks spent queued before starting",
+        ("state",),
+        STAGE_BUCKETS,
+    ),
+)
+
+
+def _collect_pools():
+    for name, stats in executor_stats().items():
+        pool_queued.set(stats["queued"], pool=name)
+        pool_active.set(stats["active"], pool=name)
+        pool_max_wait.set(stats["max_wait"], pool=name)
+
+
+registry.add_collector(_collect_pools)
+
+
+def timed_stage(stage):
+    """Decorator recording the run time of an async task stage."""
+
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(*args, **kwargs):
+            start = monotonic()
+            try:
+                return await func(*args, **kwargs)
+            finally:
+                task_stage_seconds.observe(monotonic() - start, stage=stage)
+
+        return wrapper
+
+    return decorator
+
+
+def _timed_rpc(func, engine, method):
+    @wraps(func)
+    async def wrapper(*args, **kwargs):
+        start = monotonic()
+        try:
+            return await func(*args, **kwargs)
+        except Exception:
+            engine_rpc_errors.inc(engine=engine, method=method)
+            raise
+        finally:
+            engine_rpc_seconds.observe(
+                monotonic() - start, engine=engine, method=method
+            )
+
+    return wrapper
+
+
+def instrument_client(obj, engine, exclude=()):
+    """
+    Times every public awaitable method of an engine client, and of its API
+    namespaces (public attributes from the same package, like
+    `qbittorrent.torrents`), under the `engine` label.
+
+    Returns:
+        The object with its awaitable methods wrapped.
+    """
+    package = type(obj).__module__.split(".", 1)[0]
+    for attr_name in dir(obj):
+        if attr_name.startswith("_") or attr_name in exclude:
+            continue
+        attr = getattr(obj, attr_name)
+        if iscoroutinefunction(attr):
+            setattr(obj, attr_name, _timed_rpc(attr, engine, attr_name))
+        elif type(attr).__module__.split(".", 1)[0] == package and not callable(
+            attr
+        ):
+            for sub_name in dir(attr):
+                if sub_name.startswith("_"):
+                    continue
+                sub = getattr(attr, sub_name)
+                if iscoroutinefunction(sub):
+                    setattr(
+                        attr,
+                        sub_name,
+                        _timed_rpc(sub, engine, f"{attr_name}.{sub_name}"),
+                    )
+    return obj
+
+
+def instrument_telegram(client, name):
+    """Counts the API calls of a pyrogram client and the FloodWait seconds it gets."""
+    invoke = client.invoke
+
+    @wraps(invoke)
+    async def wrapper(query, *args, **kwargs):
+        method = type(query).__name__
+        telegram_calls.inc(client=name, method=method)
+        try:
+            return await invoke(query, *args, **kwargs)
+        except Exception as e:
+            if type(e).__name__ in ("FloodWait", "FloodPremiumWait"):
+                telegram_flood_wait.inc(e.value, client=name, method=method)
+            raise
+
+    client.invoke = wrapper
+    return client
+
+
+def record_upload(uploader, size, elapsed):
+    upload_bytes.inc(size, uploader=uploader)
+    task_stage_seconds.observe(elapsed, stage="upload")
+    if elapsed > 0:
+        upload_speed.observe(size / elapsed, uploader=uploader)
+
+
+async def export_metrics():
+    """
+    Writes the rendered metrics to METRICS_FILE every EXPORT_INTERVAL seconds
+    while METRICS_ENABLED is set, and removes the file when it isn't. The
+    METRICS_TOKEN is kept in METRICS_TOKEN_FILE the same way.
+    """
+    tmp = f"{METRICS_FILE}.tmp"
+    while True:
+        try:
+            if Config.METRICS_ENABLED:
+                async with aiopen(tmp, "w") as f:
+                    await f.write(registry.render())
+                await replace(tmp, METRICS_FILE)
+            elif await aiopath.exists(METRICS_FILE):
+                await remove(METRICS_FILE)
+            if Config.METRICS_ENABLED and Config.METRICS_TOKEN:
+                async with aiopen(f"{METRICS_TOKEN_FILE}.tmp", "w") as f:
+                    await f.write(Config.METRICS_TOKEN)
+                await replace(f"{METRICS_TOKEN_FILE}.tmp", METRICS_TOKEN_FILE)
+            elif await aiopath.exists(METRICS_TOKEN_FILE):
+                await remove(METRICS_TOKEN_FILE)
+        except Exception as e:
+            LOGGER.error(f"Metrics export failed: {e}")
+        await sleep(EXPORT_INTERVAL)
@@ -220,7 +220,11 @@ async def get_readable_message(sid, is_user, page_no=1, status="All", page_step=
         if task.listener.subname:
             msg += f"\n<i>{task.listener.subname}</i>"
         msg += f"\nby: {source(task.listener)}"
-        if (
+        # only the bot's own queue knows positions, engine queues show progress
+        if getattr(task, "position", None) is not None:
+            msg += f"\n<b>Size: </b>{task.size()}"
+            msg += f"\n<b>Position:</b> {task.position()} | <b>Estimated:</b> {task.eta()}"
+        elif (
             tstatus not in [MirrorStatus.STATUS_SEED, MirrorStatus.STATUS_QUEUEUP]
             and task.listener.progress
         ):
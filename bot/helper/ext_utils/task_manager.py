@@ -1,19 +1,59 @@
-from asyncio import Event
+from asyncio import Event, sleep
+from time import monotonic
+
+from psutil import disk_usage
 
 from bot import (
+    DOWNLOAD_DIR,
     LOGGER,
     non_queued_dl,
     non_queued_up,
     queue_dict_lock,
     queued_dl,
     queued_up,
+    sudo_users,
+    task_dict,
+    task_dict_lock,
+    user_data,
 )
 from bot.core.config_manager import Config
+from bot.helper.aeon_utils.access_check import is_paid
+from bot.helper.mirror_leech_utils.gdrive_utils.cache import drive_cache
 from bot.helper.mirror_leech_utils.gdrive_utils.search import GoogleDriveSearch
+from bot.helper.telegram_helper.message_utils import send_message
 
 from .bot_utils import get_telegraph_list, sync_to_async
-from .files_utils import get_base_name
+from .files_utils import ZIP_PROFILES, get_base_name, get_path_size
 from .links_utils import is_gdrive_id
+from .metrics import queue_wait_seconds
+from .status_utils import get_readable_file_size
+
+# mid -> when the task was queued, for the queue wait metric
+queued_at = {}
+# mid -> _Entry of every task that is queued or running
+_entries = {}
+# state -> when the last queued task started, while more are waiting
+_last_start = {}
+# state -> smoothed seconds between two queued tasks starting
+_start_interval = {}
+# mid -> bytes a started task may take on the download disk at its peak
+_reserved = {}
+# mid -> bytes a reserved task was last seen using, see watch_disk
+_disk_used = {}
+
+# priority classes, lower starts first
+SUDO = 0
+PAID = 1
+FREE = 2
+# a waiting task moves up one priority class every AGING_INTERVAL seconds
+AGING_INTERVAL = 1800
+# known sizes up to this go before bigger or unknown ones of the same class
+SMALL_TASK_SIZE = 2 * 1024**3
+# extra copies of the download a stage writes before its input is removed
+STAGE_FACTORS = {"extract": 1.5, "ffmpeg": 1.0, "compress": 1.0, "split": 1.0}
+DISK_CHECK_INTERVAL = 60
+# below this much free space, tasks past their estimate get stopped
+MIN_FREE_SPACE = 1024**3
 
 
 async def stop_duplicate_check(listener):
@@ -32,7 +72,8 @@ async def stop_duplicate_check(listener):
     LOGGER.info(f"Checking File/Folder if already in Drive: {name}")
 
     if listener.compress:
-        name = f"{name}.7z"
+        pswd = listener.compress if isinstance(listener.compress, str) else ""
+        name = f"{name}{ZIP_PROFILES[listener.get_zip_profile(pswd)][0]}"
     elif listener.extract:
         try:
             name = get_base_name(name)
@@ -40,12 +81,21 @@ async def stop_duplicate_check(listener):
             name = None
 
     if name is not None:
-        telegraph_content, contents_no = await sync_to_async(
-            GoogleDriveSearch(stop_dup=True, no_multi=listener.is_clone).drive_list,
-            name,
-            listener.up_dest,
-            listener.user_id,
-        )
+        lookup = (listener.up_dest, listener.user_id, name, listener.is_clone)
+        if (result := drive_cache.get_lookup(*lookup)) is None:
+            result = await sync_to_async(
+                GoogleDriveSearch(
+                    stop_dup=True,
+                    no_multi=listener.is_clone,
+                    first_hit=True,
+                ).drive_list,
+                name,
+                listener.up_dest,
+                listener.user_id,
+                pool="net",
+            )
+            drive_cache.set_lookup(*lookup, result)
+        telegraph_content, contents_no = result
         if telegraph_content:
             msg = f"File/Folder is already available in Drive.\nHere are {contents_no} list results:"
             button = await get_telegraph_list(telegraph_content)
@@ -54,30 +104,210 @@ async def stop_duplicate_check(listener):
     return False, None
 
 
-async def check_running_tasks(listener, state="dl"):
+class _Entry:
+    """What the scheduler knows about a task that passed through the queue."""
+
+    __slots__ = ("engine", "listener", "priority", "queued", "stages")
+
+    def __init__(self, listener, engine):
+        self.listener = listener
+        self.engine = engine
+        self.priority = _priority_class(listener.user_id)
+        self.queued = monotonic()
+        self.stages = _stages(listener)
+
+
+def _stages(listener):
+    """The stages after the download that write new files next to it."""
+    return {
+        stage
+        for stage, wanted in (
+            ("extract", listener.extract),
+            (
+                "ffmpeg",
+                listener.ffmpeg_cmds
+                or listener.watermark
+                or listener.metadata
+                or listener.convert_audio
+                or listener.convert_video
+                or listener.sample_video,
+            ),
+            ("compress", listener.compress),
+            ("split", listener.is_leech and not listener.compress),
+        )
+        if wanted
+    }
+
+
+def _estimate(entry):
+    """
+    Peak bytes of a task: its size plus what its biggest remaining stage
+    writes, or what all of them write when seeding keeps the originals.
+    """
+    factors = [STAGE_FACTORS[stage] for stage in entry.stages]
+    extra = sum(factors) if entry.listener.seed else max(factors, default=0)
+    return int(entry.listener.size * (1 + extra))
+
+
+def _fits(entry):
+    """
+    Whether a task's estimate fits in the free space, less what reserved
+    tasks haven't written yet and QUEUE_FREE_SPACE. Tasks of unknown size,
+    or with no other reservation to wait for, always fit.
+    """
+    if entry.listener.size <= 0 or not any(_reserved.values()):
+        return True
+    outstanding = sum(
+        max(reserved - _disk_used.get(mid, 0), 0)
+        for mid, reserved in _reserved.items()
+    )
+    free = disk_usage(DOWNLOAD_DIR).free - outstanding - Config.QUEUE_FREE_SPACE
+    return _estimate(entry) <= free
+
+
+def _reserve(mid):
+    if entry := _entries.get(mid):
+        _reserved[mid] = _estimate(entry)
+
+
+def release_disk(mid):
+    """Drops the disk reservation of a task that ended or reached upload."""
+    _reserved.pop(mid, None)
+    _disk_used.pop(mid, None)
+
+
+def disk_stage_done(mid, stage):
+    """Shrinks the reservation of a task once `stage` removed its input."""
+    if mid in _reserved and (entry := _entries.get(mid)):
+        entry.stages.discard(stage)
+        _reserved[mid] = _estimate(entry)
+
+
+def _priority_class(user_id):
+    if (
+        user_id == Config.OWNER_ID
+        or user_id in sudo_users
+        or user_data.get(user_id, {}).get("SUDO")
+    ):
+        return SUDO
+    return FREE
+
+
+def _engine_full(engine):
+    if not engine or not (limit := Config.QUEUE_ENGINE_LIMITS.get(engine)):
+        return False
+    running = sum(
+        1
+        for mid in non_queued_dl
+        if (entry := _entries.get(mid)) and entry.engine == engine
+    )
+    return running >= limit
+
+
+def _is_over_limit(state, engine=None):
+    """Whether a new task in `state` has to wait, as checked on arrival."""
     all_limit = Config.QUEUE_ALL
     state_limit = Config.QUEUE_DOWNLOAD if state == "dl" else Config.QUEUE_UPLOAD
+    dl_count = len(non_queued_dl)
+    up_count = len(non_queued_up)
+    t_count = dl_count if state == "dl" else up_count
+    if (
+        all_limit
+        and dl_count + up_count >= all_limit
+        and (not state_limit or t_count >= state_limit)
+    ) or (state_limit and t_count >= state_limit):
+        return True
+    return state == "dl" and _engine_full(engine)
+
+
+def _has_slot(state):
+    """Whether a queued task in `state` can start, engine limits aside."""
+    all_limit = Config.QUEUE_ALL
+    state_limit = Config.QUEUE_DOWNLOAD if state == "dl" else Config.QUEUE_UPLOAD
+    running = non_queued_dl if state == "dl" else non_queued_up
+    if all_limit and len(non_queued_dl) + len(non_queued_up) >= all_limit:
+        return False
+    return not state_limit or len(running) < state_limit
+
+
+def _running_per_user():
+    counts = {}
+    for mid in non_queued_dl | non_queued_up:
+        if entry := _entries.get(mid):
+            uid = entry.listener.user_id
+            counts[uid] = counts.get(uid, 0) + 1
+    return counts
+
+
+def _rank(mid, running, now):
+    """
+    Sort key of a queued task: priority class, lowered by one class for
+    every AGING_INTERVAL waited, then the tasks its user already runs, then
+    small before big or unknown sizes, then arrival.
+    """
+    if (entry := _entries.get(mid)) is None:
+        return (FREE, 0, 1, queued_at.get(mid, now))
+    size = entry.listener.size
+    return (
+        max(entry.priority - int((now - entry.queued) // AGING_INTERVAL), SUDO),
+        running.get(entry.listener.user_id, 0),
+        0 if 0 < size <= SMALL_TASK_SIZE else 1,
+        entry.queued,
+    )
+
+
+def _ranked(queued):
+    running = _running_per_user()
+    now = monotonic()
+    return sorted(queued, key=lambda mid: _rank(mid, running, now))
+
+
+def _forget_finished():
+    # reserved tasks are between download and upload, in neither set
+    active = (
+        non_queued_dl
+        | non_queued_up
+        | queued_dl.keys()
+        | queued_up.keys()
+        | _reserved.keys()
+    )
+    for mid in _entries.keys() - active:
+        del _entries[mid]
+
+
+async def check_running_tasks(listener, state="dl", engine=None):
+    """
+    Registers a task about to download or upload and tells whether it has to
+    wait in the queue.
+
+    Args:
+        listener: The task listener.
+        state: "dl" or "up".
+        engine: The download engine, matched against QUEUE_ENGINE_LIMITS.
+
+    Returns:
+        (is_over_limit, event) where event is set once the task may start.
+    """
     event = None
     is_over_limit = False
     async with queue_dict_lock:
-        if state == "up" and listener.mid in non_queued_dl:
-            non_queued_dl.remove(listener.mid)
+        if state == "up":
+            release_disk(listener.mid)
+            if listener.mid in non_queued_dl:
+                non_queued_dl.remove(listener.mid)
+        if (entry := _entries.get(listener.mid)) is None:
+            entry = _entries[listener.mid] = _Entry(listener, engine)
         if (
-            (all_limit or state_limit)
-            and not listener.force_run
+            not listener.force_run
             and not (listener.force_upload and state == "up")
             and not (listener.force_download and state == "dl")
         ):
-            dl_count = len(non_queued_dl)
-            up_count = len(non_queued_up)
-            t_count = dl_count if state == "dl" else up_count
-            is_over_limit = (
-                all_limit
-                and dl_count + up_count >= all_limit
-                and (not state_limit or t_count >= state_limit)
-            ) or (state_limit and t_count >= state_limit)
+            is_over_limit = _is_over_limit(state, entry.engine) or (
+                state == "dl" and not _fits(entry)
+            )
             if is_over_limit:
                 event = Event()
+                queued_at[listener.mid] = entry.queued = monotonic()
                 if state == "dl":
                     queued_dl[listener.mid] = event
                 else:
@@ -87,71 +317,154 @@ async def check_running_tasks(listener, state="dl"):
                 non_queued_up.add(listener.mid)
             else:
                 non_queued_dl.add(listener.mid)
+                _reserve(listener.mid)
 
+    if (
+        is_over_limit
+        and entry.priority == FREE
+        and Config.PAID_CHANNEL_ID
+        and await is_paid(listener.user_id)
+    ):
+        entry.priority = PAID
     return is_over_limit, event
 
 
+def queue_position(mid):
+    """
+    Returns:
+        (position, seconds) of a queued task, position starting at 1 and
+        seconds being None until enough tasks left the queue to estimate it.
+    """
+    for state, queued in (("dl", queued_dl), ("up", queued_up)):
+        if mid in queued:
+            position = _ranked(queued).index(mid) + 1
+            interval = _start_interval.get(state)
+            return position, interval * position if interval else None
+    return 0, None
+
+
+def _observe_queue_wait(mid, state):
+    if (started := queued_at.pop(mid, None)) is not None:
+        queue_wait_seconds.observe(monotonic() - started, state=state)
+    # average time between two starts while tasks wait, for the queue ETA
+    now = monotonic()
+    if (last := _last_start.get(state)) is not None:
+        interval = now - last
+        previous = _start_interval.get(state)
+        _start_interval[state] = (
+            interval if previous is None else previous * 0.7 + interval * 0.3
+        )
+    _last_start[state] = now
+
+
 async def start_dl_from_queued(mid: int):
+    _observe_queue_wait(mid, "dl")
     queued_dl[mid].set()
     del queued_dl[mid]
     non_queued_dl.add(mid)
+    _reserve(mid)
+    if not queued_dl:
+        _last_start.pop("dl", None)
 
 
 async def start_up_from_queued(mid: int):
+    _observe_queue_wait(mid, "up")
     queued_up[mid].set()
     del queued_up[mid]
     non_queued_up.add(mid)
+    if not queued_up:
+        _last_start.pop("up", None)
 
 
 async def start_from_queued():
-    if all_limit := Config.QUEUE_ALL:
-        dl_limit = Config.QUEUE_DOWNLOAD
-        up_limit = Config.QUEUE_UPLOAD
-        async with queue_dict_lock:
-            dl = len(non_queued_dl)
-            up = len(non_queued_up)
-            all_ = dl + up
-            if all_ < all_limit:
-                f_tasks = all_limit - all_
-                if queued_up and (not up_limit or up < up_limit):
-                    for index, mid in enumerate(list(queued_up.keys()), start=1):
-                        await start_up_from_queued(mid)
-                        f_tasks -= 1
-                        if f_tasks == 0 or (up_limit and index >= up_limit - up):
-                            break
-                if queued_dl and (not dl_limit or dl < dl_limit) and f_tasks != 0:
-                    for index, mid in enumerate(list(queued_dl.keys()), start=1):
-                        await start_dl_from_queued(mid)
-                        if (dl_limit and index >= dl_limit - dl) or index == f_tasks:
-                            break
+    """
+    Starts queued tasks while there are free slots, uploads first. Each slot
+    goes to the best ranked task (see _rank) whose engine isn't at its limit
+    and whose disk estimate fits, so one user's bulk job can't hold every
+    slot while others wait.
+    """
+    async with queue_dict_lock:
+        _forget_finished()
+        for state, queued, start in (
+            ("up", queued_up, start_up_from_queued),
+            ("dl", queued_dl, start_dl_from_queued),
+        ):
+            while queued and _has_slot(state):
+                ready = [
+                    mid
+                    for mid in queued
+                    if state == "up"
+                    or mid not in _entries
+                    or (
+                        not _engine_full(_entries[mid].engine)
+                        and _fits(_entries[mid])
+                    )
+                ]
+                if not ready:
+                    break
+                running = _running_per_user()
+                now = monotonic()
+                await start(min(ready, key=lambda mid: _rank(mid, running, now)))
+
+
+async def _measure_disk():
+    for mid in list(_reserved):
+        if (entry := _entries.get(mid)) is None:
+            continue
+        used = await get_path_size(entry.listener.dir)
+        if mid not in _reserved:
+            continue
+        _disk_used[mid] = used
+        # engines like qBittorrent only learn the size once the download started
+        if not _reserved[mid] and entry.listener.size:
+            _reserved[mid] = _estimate(entry)
+
+
+async def _preempt(mid):
+    listener = _entries[mid].listener
+    used = get_readable_file_size(_disk_used[mid])
+    reserved = get_readable_file_size(_reserved[mid])
+    LOGGER.warning(
+        f"Disk almost full, stopping {listener.name}: it takes {used}, "
+        f"{reserved} were reserved for it",
+    )
+    # its files go once the cancel cleans up, don't pick it again meanwhile
+    release_disk(mid)
+    async with task_dict_lock:
+        task = task_dict.get(mid)
+    if task is None:
         return
+    await send_message(
+        listener.message,
+        f"{listener.tag} Stopping <code>{listener.name}</code>: the disk is "
+        f"almost full and it takes {used}, more than the {reserved} estimated.",
+    )
+    await task.task().cancel_task()
+
 
-    if up_limit := Config.QUEUE_UPLOAD:
-        async with queue_dict_lock:
-            up = len(non_queued_up)
-            if queued_up and up < up_limit:
-                f_tasks = up_limit - up
-                for index, mid in enumerate(list(queued_up.keys()), start=1):
-                    await start_up_from_queued(mid)
-                    if index == f_tasks:
-                        break
-    else:
-        async with queue_dict_lock:
-            if queued_up:
-                for mid in list(queued_up.keys()):
-                    await start_up_from_queued(mid)
-
-    if dl_limit := Config.QUEUE_DOWNLOAD:
-        async with queue_dict_lock:
-            dl = len(non_queued_dl)
-            if queued_dl and dl < dl_limit:
-                f_tasks = dl_limit - dl
-                for index, mid in enumerate(list(queued_dl.keys()), start=1):
-                    await start_dl_from_queued(mid)
-                    if index == f_tasks:
-                        break
-    else:
-        async with queue_dict_lock:
-            if queued_dl:
-                for mid in list(queued_dl.keys()):
-                    await start_dl_from_queued(mid)
+async def watch_disk():
+    """
+    Every DISK_CHECK_INTERVAL, measures what reserved tasks take on disk so
+    their remaining reservation is known. When free space falls under
+    QUEUE_FREE_SPACE or MIN_FREE_SPACE, stops the task furthest past its
+    estimate before the disk fills; otherwise retries tasks held for space.
+    """
+    while True:
+        await sleep(DISK_CHECK_INTERVAL)
+        if not _reserved:
+            continue
+        try:
+            await _measure_disk()
+            free = disk_usage(DOWNLOAD_DIR).free
+            if free < max(Config.QUEUE_FREE_SPACE, MIN_FREE_SPACE):
+                over = [
+                    (used - _reserved[mid], mid)
+                    for mid, used in _disk_used.items()
+                    if mid in _reserved and used > _reserved[mid]
+                ]
+                if over:
+                    await _preempt(max(over)[1])
+            elif queued_dl:
+                await start_from_queued()
+        except Exception as e:
+            LOGGER.error(f"Disk check failed: {e}")
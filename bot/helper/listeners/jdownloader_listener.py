@@ -50,9 +50,7 @@ async def _jd_listener():
                 intervals["jd"] = ""
                 break
             try:
-                packages = await jdownloader.device.downloads.query_packages(
-                    [{"finished": True, "saveTo": True}],
-                )
+                packages = await jdownloader.download_packages()
             except Exception:
                 continue
 
@@ -49,14 +49,42 @@ async def _on_download_complete(nzo_id):
 
 @new_task
 async def _nzb_listener():
+    # history is only sent again once it changes, unless the jobs we ask for do
+    last_history_update = 0
+    polled_ids = set()
     while not intervals["stopAll"]:
         async with nzb_listener_lock:
             try:
-                jobs = (await sabnzbd_client.get_history())["history"]["slots"]
-                downloads = (await sabnzbd_client.get_downloads())["queue"]["slots"]
                 if len(nzb_jobs) == 0:
                     intervals["nzb"] = ""
                     break
+                nzo_ids = list(nzb_jobs)
+                if set(nzo_ids) != polled_ids:
+                    polled_ids = set(nzo_ids)
+                    last_history_update = 0
+                history, queue = await gather(
+                    sabnzbd_client.get_history(
+                        nzo_ids=nzo_ids,
+                        limit=len(nzo_ids),
+                        last_history_update=last_history_update,
+                    ),
+                    sabnzbd_client.get_downloads(
+                        nzo_ids=nzo_ids,
+                        limit=len(nzo_ids),
+                    ),
+                )
+                if history["history"]:
+                    last_history_update = history["history"]["last_history_update"]
+                    jobs = history["history"]["slots"]
+                    for job in jobs:
+                        if job["nzo_id"] in nzb_jobs:
+                            nzb_jobs[job["nzo_id"]]["history"] = job
+                else:
+                    jobs = []
+                downloads = queue["queue"]["slots"]
+                in_queue = {dl["nzo_id"]: dl for dl in downloads}
+                for nzo_id, nzb_job in nzb_jobs.items():
+                    nzb_job["queue"] = in_queue.get(nzo_id)
                 for job in jobs:
                     nzo_id = job["nzo_id"]
                     if nzo_id not in nzb_jobs:
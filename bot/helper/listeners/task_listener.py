@@ -1,6 +1,7 @@
 # ruff: noqa: RUF006
-from asyncio import create_task, gather, sleep
+from asyncio import Semaphore, create_task, gather, sleep
 from html import escape
+from time import monotonic
 
 from aiofiles.os import listdir, makedirs, remove
 from aiofiles.os import path as aiopath
@@ -25,17 +26,24 @@ from bot.core.torrent_manager import TorrentManager
 from bot.helper.common import TaskConfig
 from bot.helper.ext_utils.bot_utils import sync_to_async
 from bot.helper.ext_utils.db_handler import database
+from bot.helper.ext_utils.dir_index import DirIndex
 from bot.helper.ext_utils.files_utils import (
     clean_download,
     clean_target,
-    create_recursive_symlink,
-    get_path_size,
+    create_seed_workspace,
     join_files,
     remove_excluded_files,
 )
 from bot.helper.ext_utils.links_utils import is_gdrive_id
+from bot.helper.ext_utils.metrics import record_upload
 from bot.helper.ext_utils.status_utils import get_readable_file_size
-from bot.helper.ext_utils.task_manager import check_running_tasks, start_from_queued
+from bot.helper.ext_utils.task_manager import (
+    check_running_tasks,
+    disk_stage_done,
+    queued_at,
+    release_disk,
+    start_from_queued,
+)
 from bot.helper.mirror_leech_utils.gdrive_utils.upload import GoogleDriveUpload
 from bot.helper.mirror_leech_utils.rclone_utils.transfer import RcloneTransferHelper
 from bot.helper.mirror_leech_utils.status_utils.gdrive_status import (
@@ -56,10 +64,17 @@ from bot.helper.telegram_helper.message_utils import (
     update_status_message,
 )
 
+# how many failed or cancelled tasks get their directories deleted at once
+CLEANUP_CONCURRENCY = 4
+_cleanup_slots = Semaphore(CLEANUP_CONCURRENCY)
+
 
 class TaskListener(TaskConfig):
     def __init__(self):
         super().__init__()
+        self.uploader = ""
+        self.upload_started = 0
+        self.bulk_cancelled = False
 
     async def clean(self):
         try:
@@ -186,19 +201,21 @@ class TaskListener(TaskConfig):
                 return
 
         dl_path = f"{self.dir}/{self.name}"
-        self.size = await get_path_size(dl_path)
         self.is_file = await aiopath.isfile(dl_path)
         if self.seed:
             up_dir = self.up_dir = f"{self.dir}10000"
             up_path = f"{self.up_dir}/{self.name}"
-            await create_recursive_symlink(self.dir, self.up_dir)
-            LOGGER.info(f"Shortcut created: {dl_path} -> {up_path}")
+            mode = await create_seed_workspace(self.dir, self.up_dir)
+            LOGGER.info(f"Seeding copy created with {mode}s: {dl_path} -> {up_path}")
         else:
             up_dir = self.dir
             up_path = dl_path
+        self.tree = await DirIndex.build(up_dir)
+        self.size = self.tree.size(up_path)
         await remove_excluded_files(
             self.up_dir or self.dir,
             self.excluded_extensions,
+            self.tree,
         )
         if not Config.QUEUE_ALL:
             async with queue_dict_lock:
@@ -208,6 +225,7 @@ class TaskListener(TaskConfig):
 
         if self.join and not self.is_file:
             await join_files(up_path)
+            await self.tree.refresh_files(up_path)
 
         if self.extract and not self.is_nzb:
             up_path = await self.proceed_extract(up_path, gid)
@@ -215,9 +233,14 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             self.name = up_path.replace(f"{up_dir}/", "").split("/", 1)[0]
-            self.size = await get_path_size(up_dir)
+            self.size = self.tree.total_size
             self.clear()
-            await remove_excluded_files(up_dir, self.excluded_extensions)
+            await remove_excluded_files(
+                up_dir,
+                self.excluded_extensions,
+                self.tree,
+            )
+            disk_stage_done(self.mid, "extract")
 
         if self.watermark:
             up_path = await self.proceed_watermark(
@@ -228,7 +251,7 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             self.name = up_path.replace(f"{up_dir}/", "").split("/", 1)[0]
-            self.size = await get_path_size(up_dir)
+            self.size = self.tree.total_size
             self.clear()
 
         if self.metadata:
@@ -240,7 +263,7 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             self.name = up_path.replace(f"{up_dir}/", "").split("/", 1)[0]
-            self.size = await get_path_size(up_dir)
+            self.size = self.tree.total_size
             self.clear()
 
         if self.ffmpeg_cmds:
@@ -252,7 +275,7 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             self.name = up_path.replace(f"{up_dir}/", "").split("/", 1)[0]
-            self.size = await get_path_size(up_dir)
+            self.size = self.tree.total_size
             self.clear()
 
         if self.name_sub:
@@ -272,7 +295,7 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             self.name = up_path.replace(f"{up_dir}/", "").split("/", 1)[0]
-            self.size = await get_path_size(up_dir)
+            self.size = self.tree.total_size
 
         if self.convert_audio or self.convert_video:
             up_path = await self.convert_media(
@@ -283,7 +306,7 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             self.name = up_path.replace(f"{up_dir}/", "").split("/", 1)[0]
-            self.size = await get_path_size(up_dir)
+            self.size = self.tree.total_size
             self.clear()
 
         if self.sample_video:
@@ -295,9 +318,11 @@ class TaskListener(TaskConfig):
                 return
             self.is_file = await aiopath.isfile(up_path)
             self.name = up_path.replace(f"{up_dir}/", "").split("/", 1)[0]
-            self.size = await get_path_size(up_dir)
+            self.size = self.tree.total_size
             self.clear()
 
+        disk_stage_done(self.mid, "ffmpeg")
+
         if self.compress:
             up_path = await self.proceed_compress(
                 up_path,
@@ -307,9 +332,10 @@ class TaskListener(TaskConfig):
             if self.is_cancelled:
                 return
             self.clear()
+            disk_stage_done(self.mid, "compress")
 
         self.name = up_path.replace(f"{up_dir}/", "").split("/", 1)[0]
-        self.size = await get_path_size(up_dir)
+        self.size = self.tree.total_size
 
         if self.is_leech and not self.compress:
             await self.proceed_split(
@@ -333,7 +359,7 @@ class TaskListener(TaskConfig):
                 return
             LOGGER.info(f"Start from Queued/Upload: {self.name}")
 
-        self.size = await get_path_size(up_dir)
+        self.size = self.tree.total_size
 
         upload_service = ""
 
@@ -349,8 +375,10 @@ class TaskListener(TaskConfig):
                 "DEFAULT_UPLOAD", Config.DEFAULT_UPLOAD
             )
 
+        self.upload_started = monotonic()
         if self.is_leech:
             LOGGER.info(f"Leeching: {self.name} (no specific uploader or is_leech)")
+            self.uploader = "telegram"
             tg = TelegramUploader(self, up_dir)
             async with task_dict_lock:
                 task_dict[self.mid] = TelegramStatus(self, tg, gid, "up")
@@ -362,28 +390,31 @@ class TaskListener(TaskConfig):
             del tg
         elif upload_service == "yt":
             LOGGER.info(f"Uploading to YouTube: {self.name} (Service selected: yt)")
+            self.uploader = "youtube"
             yt = YouTubeUpload(self, up_path)
             async with task_dict_lock:
                 task_dict[self.mid] = YtStatus(self, yt, gid)
             await gather(
                 update_status_message(self.message.chat.id),
-                sync_to_async(yt.upload),
+                sync_to_async(yt.upload, pool="transfer"),
             )
             del yt
         elif is_gdrive_id(self.up_dest):
             LOGGER.info(
                 f"Uploading to Google Drive (path-detected): {self.name} (Destination ID: {self.up_dest})"
             )
+            self.uploader = "gdrive"
             drive = GoogleDriveUpload(self, up_path)
             async with task_dict_lock:
                 task_dict[self.mid] = GoogleDriveStatus(self, drive, gid, "up")
             await gather(
                 update_status_message(self.message.chat.id),
-                sync_to_async(drive.upload),
+                sync_to_async(drive.upload, pool="transfer"),
             )
             del drive
         else:
             LOGGER.info("Uploading to Rclone")
+            self.uploader = "rclone"
             RCTransfer = RcloneTransferHelper(self)
             async with task_dict_lock:
                 task_dict[self.mid] = RcloneStatus(self, RCTransfer, gid, "up")
@@ -408,6 +439,12 @@ class TaskListener(TaskConfig):
             and Config.DATABASE_URL
         ):
             await database.rm_complete_task(self.message.link)
+        if self.uploader:
+            record_upload(
+                self.uploader,
+                self.size,
+                monotonic() - self.upload_started,
+            )
         msg = f"<b>Name: </b><code>{escape(self.name)}</code>\n\n<b>Size: </b>{get_readable_file_size(self.size)}"
         done_msg = f"{self.tag}\nYour task is complete\nPlease check your inbox."
         LOGGER.info(f"Task Done: {self.name}")
@@ -545,13 +582,14 @@ class TaskListener(TaskConfig):
                 del task_dict[self.mid]
             count = len(task_dict)
         await self.remove_from_same_dir()
-        msg = f"{self.tag} Download: {escape(str(error))}"
-        x = await send_message(self.message, msg, button)
-        create_task(auto_delete_message(x, time=300))
-        if count == 0:
-            await self.clean()
-        else:
-            await update_status_message(self.message.chat.id)
+        if not self.bulk_cancelled:
+            msg = f"{self.tag} Download: {escape(str(error))}"
+            x = await send_message(self.message, msg, button)
+            create_task(auto_delete_message(x, time=300))
+            if count == 0:
+                await self.clean()
+            else:
+                await update_status_message(self.message.chat.id)
 
         if (
             self.is_super_chat
@@ -561,6 +599,8 @@ class TaskListener(TaskConfig):
             await database.rm_complete_task(self.message.link)
 
         async with queue_dict_lock:
+            queued_at.pop(self.mid, None)
+            release_disk(self.mid)
             if self.mid in queued_dl:
                 queued_dl[self.mid].set()
                 del queued_dl[self.mid]
@@ -572,25 +612,34 @@ class TaskListener(TaskConfig):
             if self.mid in non_queued_up:
                 non_queued_up.remove(self.mid)
 
-        await start_from_queued()
+        if self.bulk_cancelled:
+            # cancel_all refreshes the queue and the status once for all tasks
+            create_task(self._clean_files())
+        else:
+            await start_from_queued()
+            await self._clean_files()
+
+    async def _clean_files(self):
         await sleep(3)
-        await clean_download(self.dir)
-        if self.up_dir:
-            await clean_download(self.up_dir)
-        if self.thumb and await aiopath.exists(self.thumb):
-            await remove(self.thumb)
+        async with _cleanup_slots:
+            await clean_download(self.dir)
+            if self.up_dir:
+                await clean_download(self.up_dir)
+            if self.thumb and await aiopath.exists(self.thumb):
+                await remove(self.thumb)
 
     async def on_upload_error(self, error):
         async with task_dict_lock:
             if self.mid in task_dict:
                 del task_dict[self.mid]
             count = len(task_dict)
-        x = await send_message(self.message, f"{self.tag} {escape(str(error))}")
-        create_task(auto_delete_message(x, time=300))
-        if count == 0:
-            await self.clean()
-        else:
-            await update_status_message(self.message.chat.id)
+        if not self.bulk_cancelled:
+            x = await send_message(self.message, f"{self.tag} {escape(str(error))}")
+            create_task(auto_delete_message(x, time=300))
+            if count == 0:
+                await self.clean()
+            else:
+                await update_status_message(self.message.chat.id)
 
         if (
             self.is_super_chat
@@ -600,6 +649,8 @@ class TaskListener(TaskConfig):
             await database.rm_complete_task(self.message.link)
 
         async with queue_dict_lock:
+            queued_at.pop(self.mid, None)
+            release_disk(self.mid)
             if self.mid in queued_dl:
                 queued_dl[self.mid].set()
                 del queued_dl[self.mid]
@@ -611,10 +662,9 @@ class TaskListener(TaskConfig):
             if self.mid in non_queued_up:
                 non_queued_up.remove(self.mid)
 
-        await start_from_queued()
-        await sleep(3)
-        await clean_download(self.dir)
-        if self.up_dir:
-            await clean_download(self.up_dir)
-        if self.thumb and await aiopath.exists(self.thumb):
-            await remove(self.thumb)
+        if self.bulk_cancelled:
+            # cancel_all refreshes the queue and the status once for all tasks
+            create_task(self._clean_files())
+        else:
+            await start_from_queued()
+            await self._clean_files()
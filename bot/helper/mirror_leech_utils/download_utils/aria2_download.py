@@ -9,6 +9,7 @@ from bot import LOGGER, task_dict, task_dict_lock
 from bot.core.config_manager import Config
 from bot.core.torrent_manager import TorrentManager, aria2_name, is_metadata
 from bot.helper.ext_utils.bot_utils import bt_selection_buttons
+from bot.helper.ext_utils.link_probe import probe_link
 from bot.helper.ext_utils.task_manager import check_running_tasks
 from bot.helper.mirror_leech_utils.status_utils.aria2_status import Aria2Status
 from bot.helper.telegram_helper.message_utils import (
@@ -29,8 +30,13 @@ async def add_aria2_download(listener, dpath, header, ratio, seed_time):
         a2c_opt["seed-time"] = seed_time
     if TORRENT_TIMEOUT := Config.TORRENT_TIMEOUT:
         a2c_opt["bt-stop-timeout"] = f"{TORRENT_TIMEOUT}"
+    # reuses the probe from the mirror command, so this is normally a cache hit
+    if not header and (info := await probe_link(listener.link)) and info.ok:
+        listener.size = info.size
+        if not info.accept_ranges:
+            a2c_opt["split"] = "1"
 
-    add_to_queue, event = await check_running_tasks(listener)
+    add_to_queue, event = await check_running_tasks(listener, engine="aria2")
     if add_to_queue:
         if listener.link.startswith("magnet:"):
             a2c_opt["pause-metadata"] = "true"
@@ -28,7 +28,7 @@ async def add_direct_download(listener, path):
         return
 
     gid = token_hex(4)
-    add_to_queue, event = await check_running_tasks(listener)
+    add_to_queue, event = await check_running_tasks(listener, engine="aria2")
     if add_to_queue:
         LOGGER.info(f"Added to Queue/Download: {listener.name}")
         async with task_dict_lock:
@@ -21,6 +21,7 @@ async def add_gd_download(listener, path):
         drive.count,
         listener.link,
         listener.user_id,
+        pool="net",
     )
     if mime_type is None:
         await listener.on_download_error(name)
@@ -34,7 +35,7 @@ async def add_gd_download(listener, path):
         await listener.on_download_error(msg, button)
         return
 
-    add_to_queue, event = await check_running_tasks(listener)
+    add_to_queue, event = await check_running_tasks(listener, engine="gdriveAPI")
     if add_to_queue:
         LOGGER.info(f"Added to Queue/Download: {listener.name}")
         async with task_dict_lock:
@@ -58,4 +59,4 @@ async def add_gd_download(listener, path):
         if listener.multi <= 1:
             await send_status_message(listener.message)
 
-    await sync_to_async(drive.download)
+    await sync_to_async(drive.download, pool="transfer")
@@ -98,6 +98,16 @@ async def get_online_packages(path, state="grabbing"):
     return [dl["uuid"] for dl in download_packages if dl["saveTo"].startswith(path)]
 
 
+async def wait_online_packages(path, state="grabbing", wait_time=3):
+    """Polls `get_online_packages` until the packages show up or `wait_time` passes."""
+    start_time = time()
+    while not (online_packages := await get_online_packages(path, state)):
+        if time() - start_time > wait_time:
+            break
+        await sleep(0.2)
+    return online_packages
+
+
 def trim_path(path):
     path_components = path.split("/")
 
@@ -165,9 +175,11 @@ async def add_jd_download(listener, path):
                     ],
                 )
 
-            await sleep(1)
+            delay = 0.2
+            await sleep(delay)
             while await jdownloader.device.linkgrabber.is_collecting():
-                pass
+                delay = min(delay * 2, 1)
+                await sleep(delay)
             start_time = time()
             online_packages = []
             corrupted_packages = []
@@ -224,6 +236,7 @@ async def add_jd_download(listener, path):
 
                 if online_packages:
                     break
+                await sleep(0.5)
             else:
                 error = (
                     name
@@ -283,7 +296,9 @@ async def add_jd_download(listener, path):
             async with jd_listener_lock:
                 jd_downloads[gid]["ids"] = online_packages
 
-        add_to_queue, event = await check_running_tasks(listener)
+        add_to_queue, event = await check_running_tasks(
+            listener, engine="jdownloader"
+        )
         if add_to_queue:
             LOGGER.info(f"Added to Queue/Download: {listener.name}")
             async with task_dict_lock:
@@ -307,9 +322,7 @@ async def add_jd_download(listener, path):
             package_ids=online_packages,
         )
 
-        await sleep(0.5)
-
-        online_packages = await get_online_packages(path, "down")
+        online_packages = await wait_online_packages(path, "down")
         if not online_packages:
             online_packages = await get_online_packages(path)
             if not online_packages:
@@ -319,8 +332,7 @@ async def add_jd_download(listener, path):
             await jdownloader.device.linkgrabber.move_to_downloadlist(
                 package_ids=online_packages,
             )
-            await sleep(0.5)
-            online_packages = await get_online_packages(path, "down")
+            online_packages = await wait_online_packages(path, "down")
         if not online_packages:
             raise MYJDException(
                 "Download List: This Download have been removed manually!",
@@ -333,6 +345,7 @@ async def add_jd_download(listener, path):
         await jdownloader.device.downloads.force_download(
             package_ids=online_packages,
         )
+        jdownloader.invalidate_packages()
 
         async with task_dict_lock:
             task_dict[listener.mid] = JDownloaderStatus(listener, gid)
@@ -31,7 +31,9 @@ async def add_qb_torrent(listener, path, ratio, seed_time):
         else:
             form = form.include_url(listener.link)
         form = form.savepath(path).tags([f"{listener.mid}"])
-        add_to_queue, event = await check_running_tasks(listener)
+        add_to_queue, event = await check_running_tasks(
+            listener, engine="qbittorrent"
+        )
         if add_to_queue:
             form = form.stopped(add_to_queue)
         if ratio:
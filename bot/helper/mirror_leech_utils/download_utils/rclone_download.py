@@ -10,6 +10,7 @@ from bot.helper.ext_utils.task_manager import (
     check_running_tasks,
     stop_duplicate_check,
 )
+from bot.helper.mirror_leech_utils.rclone_utils.rcd import RcloneRcError, get_rcd
 from bot.helper.mirror_leech_utils.rclone_utils.transfer import RcloneTransferHelper
 from bot.helper.mirror_leech_utils.status_utils.queue_status import QueueStatus
 from bot.helper.mirror_leech_utils.status_utils.rclone_status import RcloneStatus
@@ -56,7 +57,30 @@ async def add_rclone_download(listener, path):
         "-v",
         "--log-systemd",
     ]
-    if rclone_select:
+    if not rclone_select and (rcd := await get_rcd(config_path)):
+        async with rcd.using():
+            try:
+                rstat, rsize = await gather(
+                    rcd.call("operations/stat", fs=f"{remote}:", remote=rpath),
+                    rcd.call("operations/size", fs=f"{remote}:{rpath}"),
+                )
+            except RcloneRcError as err:
+                msg = f"Error: While getting rclone stat/size. Path: {remote}:{listener.link}. Stderr: {str(err)[:4000]}"
+                await listener.on_download_error(msg)
+                return
+        if (rstat := rstat["item"]) is None:
+            msg = f"Error: While getting rclone stat/size. Path: {remote}:{listener.link}. Stderr: object not found"
+            await listener.on_download_error(msg)
+            return
+        if rstat["IsDir"]:
+            if not listener.name:
+                listener.name = (
+                    listener.link.rsplit("/", 1)[-1] if listener.link else remote
+                )
+            path += listener.name
+        else:
+            listener.name = listener.link.rsplit("/", 1)[-1]
+    elif rclone_select:
         cmd2.extend(("--files-from", listener.link))
         res = await cmd_exec(cmd2)
         if res[2] != 0:
@@ -103,7 +127,7 @@ async def add_rclone_download(listener, path):
             await listener.on_download_error(msg, button)
             return
 
-    add_to_queue, event = await check_running_tasks(listener)
+    add_to_queue, event = await check_running_tasks(listener, engine="rclone")
     if add_to_queue:
         LOGGER.info(f"Added to Queue/Download: {listener.name}")
         async with task_dict_lock:
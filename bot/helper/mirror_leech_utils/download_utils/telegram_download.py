@@ -1,22 +1,152 @@
-from asyncio import Lock, sleep
+import os
+from asyncio import (
+    Lock,
+    Semaphore,
+    as_completed,
+    create_task,
+    gather,
+    shield,
+    sleep,
+)
+from itertools import count
+from math import ceil
+from mimetypes import guess_extension
+from os import path as ospath
 from secrets import token_hex
 from time import time
 
-from pyrogram.errors import FloodPremiumWait, FloodWait
+from aiofiles.os import makedirs, remove
+from pyrogram import raw
+from pyrogram.errors import (
+    FileMigrate,
+    FileReferenceExpired,
+    FileReferenceInvalid,
+    FloodPremiumWait,
+    FloodWait,
+)
+from pyrogram.file_id import FileId, FileType
 
 from bot import LOGGER, task_dict, task_dict_lock
 from bot.core.aeon_client import TgClient
+from bot.core.config_manager import Config
+from bot.helper.ext_utils.bot_utils import sync_to_async
 from bot.helper.ext_utils.task_manager import (
     check_running_tasks,
     stop_duplicate_check,
 )
 from bot.helper.mirror_leech_utils.status_utils.queue_status import QueueStatus
 from bot.helper.mirror_leech_utils.status_utils.telegram_status import TelegramStatus
+from bot.helper.mirror_leech_utils.telegram_sessions import get_media_sessions
 from bot.helper.telegram_helper.message_utils import send_status_message
 
 global_lock = Lock()
 GLOBAL_GID = set()
 
+# upload.getFile serves at most 1MiB per request
+CHUNK_SIZE = 1024 * 1024
+# smaller files aren't worth opening extra sessions for
+PARALLEL_MIN_SIZE = 20 * CHUNK_SIZE
+# ids per get_messages call and files downloaded at once for a message range
+RANGE_CHUNK = 200
+RANGE_WORKERS = 4
+
+
+def _file_location(file_id):
+    if file_id.file_type == FileType.PHOTO:
+        return raw.types.InputPhotoFileLocation(
+            id=file_id.media_id,
+            access_hash=file_id.access_hash,
+            file_reference=file_id.file_reference,
+            thumb_size=file_id.thumbnail_size,
+        )
+    return raw.types.InputDocumentFileLocation(
+        id=file_id.media_id,
+        access_hash=file_id.access_hash,
+        file_reference=file_id.file_reference,
+        thumb_size=file_id.thumbnail_size,
+    )
+
+
+def _media_of(message):
+    return (
+        message.document
+        or message.photo
+        or message.video
+        or message.audio
+        or message.voice
+        or message.video_note
+        or message.sticker
+        or message.animation
+        or None
+    )
+
+
+def _range_file_name(message, media, taken):
+    name = getattr(media, "file_name", None)
+    if name:
+        name = name.rsplit("/", 1)[-1]
+    else:
+        mime_type = getattr(media, "mime_type", None)
+        ext = (guess_extension(mime_type) if mime_type else None) or ".jpg"
+        name = f"{message.id}{ext}"
+    if name in taken:
+        name = f"{message.id}-{name}"
+    taken.add(name)
+    return name
+
+
+def _preallocate(path, size):
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        os.ftruncate(fd, size)
+    except OSError:
+        os.close(fd)
+        raise
+    return fd
+
+
+class _MediaLocation:
+    """The file location of a message's media, refreshed once it expires."""
+
+    def __init__(self, client, message, file_id):
+        self._client = client
+        self._message = message
+        self._lock = Lock()
+        self.location = _file_location(file_id)
+
+    async def refresh(self, stale):
+        async with self._lock:
+            if self.location.file_reference != stale:
+                return
+            message = await self._client.get_messages(
+                chat_id=self._message.chat.id,
+                message_ids=self._message.id,
+            )
+            self.location = _file_location(FileId.decode(_media_of(message).file_id))
+
+    async def get_part(self, session, offset):
+        refreshed = False
+        while True:
+            location = self.location
+            try:
+                return await session.invoke(
+                    raw.functions.upload.GetFile(
+                        location=location,
+                        offset=offset,
+                        limit=CHUNK_SIZE,
+                    ),
+                    sleep_threshold=30,
+                )
+            except (FileReferenceExpired, FileReferenceInvalid):
+                # a refetched message with the same reference won't do better
+                if refreshed:
+                    raise
+                refreshed = True
+                await self.refresh(location.file_reference)
+            except (FloodWait, FloodPremiumWait) as f:
+                LOGGER.warning(str(f))
+                await sleep(f.value)
+
 
 class TelegramDownloadHelper:
     def __init__(self, listener):
@@ -55,10 +185,18 @@ class TelegramDownloadHelper:
                 f"Start Queued Download from Telegram: {self._listener.name}",
             )
 
-    async def _on_download_progress(self, current, _):
-        if self._listener.is_cancelled:
-            self.session.stop_transmission()
-        self._processed_bytes = current
+    def _progress_callback(self):
+        """A pyrogram progress callback adding one file's progress to the total."""
+        last = 0
+
+        async def on_progress(current, _):
+            nonlocal last
+            if self._listener.is_cancelled:
+                self.session.stop_transmission()
+            self._processed_bytes += current - last
+            last = current
+
+        return on_progress
 
     async def _on_download_error(self, error):
         async with global_lock:
@@ -70,28 +208,159 @@ class TelegramDownloadHelper:
             GLOBAL_GID.discard(self._id)
         await self._listener.on_download_complete()
 
+    async def _parallel_download(self, message, media, path):
+        """
+        Fetches the file in CHUNK_SIZE parts over TG_DOWNLOAD_CONNECTIONS media
+        sessions, each part written at its offset into a preallocated file.
+
+        Returns:
+            False when Telegram redirects the file to a CDN, for the caller
+            to fall back to a sequential download.
+        """
+        file_id = FileId.decode(media.file_id)
+        media_location = _MediaLocation(self.session, message, file_id)
+        connections = Config.TG_DOWNLOAD_CONNECTIONS
+        sessions = await get_media_sessions(self.session, file_id.dc_id, connections)
+        size = media.file_size
+        parts = count()
+        total_parts = ceil(size / CHUNK_SIZE)
+        done = 0
+        cdn = False
+        # writes still running in the fs pool, which cancelling can't stop
+        writes = set()
+
+        async def worker(index):
+            nonlocal cdn, done, sessions
+            while not self._listener.is_cancelled and not cdn:
+                part = next(parts)
+                if part >= total_parts:
+                    return
+                offset = part * CHUNK_SIZE
+                while True:
+                    try:
+                        r = await media_location.get_part(sessions[index], offset)
+                        break
+                    except FileMigrate as e:
+                        # the file moved to another DC since its id was issued
+                        if sessions[index].dc_id == e.value:
+                            raise
+                        sessions = await get_media_sessions(
+                            self.session,
+                            e.value,
+                            connections,
+                        )
+                if not isinstance(r, raw.types.upload.File):
+                    cdn = True
+                    return
+                write = await sync_to_async(
+                    os.pwrite,
+                    fd,
+                    r.bytes,
+                    offset,
+                    wait=False,
+                    pool="fs",
+                )
+                writes.add(write)
+                await shield(write)
+                writes.discard(write)
+                done += len(r.bytes)
+                self._processed_bytes += len(r.bytes)
+
+        await makedirs(ospath.dirname(path), exist_ok=True)
+        fd = await sync_to_async(_preallocate, path, size, pool="fs")
+        tasks = [create_task(worker(i)) for i in range(connections)]
+        try:
+            await gather(*tasks)
+        finally:
+            for task in tasks:
+                task.cancel()
+            await gather(*tasks, *writes, return_exceptions=True)
+            await sync_to_async(os.close, fd, pool="fs")
+        if cdn:
+            LOGGER.info(f"CDN file, downloading sequentially: {path}")
+            self._processed_bytes -= done
+            await remove(path)
+            return False
+        return True
+
+    async def _fetch(self, message, media, path):
+        """
+        Downloads one media to `path`, a file path or a directory ending in /
+        for pyrogram to pick the name.
+
+        Returns:
+            False if pyrogram returned nothing, True otherwise.
+        """
+        file_path = path
+        if path.endswith("/"):
+            name = getattr(media, "file_name", None)
+            file_path = f"{path}{name}" if name and "/" not in name else None
+        if (
+            file_path
+            and Config.TG_DOWNLOAD_CONNECTIONS > 1
+            and media.file_size >= PARALLEL_MIN_SIZE
+            and await self._parallel_download(message, media, file_path)
+        ):
+            return True
+        on_progress = self._progress_callback()
+        while True:
+            try:
+                download = await message.download(
+                    file_name=path,
+                    progress=on_progress,
+                )
+                return download is not None
+            except (FloodWait, FloodPremiumWait) as f:
+                LOGGER.warning(str(f))
+                await sleep(f.value)
+
     async def _download(self, message, path):
         try:
-            download = await message.download(
-                file_name=path,
-                progress=self._on_download_progress,
-            )
+            download = await self._fetch(message, _media_of(message), path)
             if self._listener.is_cancelled:
                 return
-        except (FloodWait, FloodPremiumWait) as f:
-            LOGGER.warning(str(f))
-            await sleep(f.value)
-            await self._download(message, path)
-            return
         except Exception as e:
             LOGGER.error(str(e))
             await self._on_download_error(str(e))
             return
-        if download is not None:
+        if download:
             await self._on_download_complete()
         elif not self._listener.is_cancelled:
             await self._on_download_error("Internal error occurred")
 
+    async def _wait_for_queue(self, gid):
+        """
+        Holds the task in the queue while over the download limit.
+
+        Returns:
+            Whether it was queued, or None if it got cancelled meanwhile.
+        """
+        msg, button = await stop_duplicate_check(self._listener)
+        if msg:
+            await self._listener.on_download_error(msg, button)
+            return None
+
+        add_to_queue, event = await check_running_tasks(
+            self._listener, engine="telegram"
+        )
+        if add_to_queue:
+            LOGGER.info(f"Added to Queue/Download: {self._listener.name}")
+            async with task_dict_lock:
+                task_dict[self._listener.mid] = QueueStatus(
+                    self._listener,
+                    gid,
+                    "dl",
+                )
+            await self._listener.on_download_start()
+            if self._listener.multi <= 1:
+                await send_status_message(self._listener.message)
+            await event.wait()
+            if self._listener.is_cancelled:
+                async with global_lock:
+                    GLOBAL_GID.discard(self._id)
+                return None
+        return add_to_queue
+
     async def add_download(self, message, path, session):
         self.session = session
         if self.session != TgClient.bot:
@@ -100,17 +369,7 @@ class TelegramDownloadHelper:
                 message_ids=message.id,
             )
 
-        media = (
-            message.document
-            or message.photo
-            or message.video
-            or message.audio
-            or message.voice
-            or message.video_note
-            or message.sticker
-            or message.animation
-            or None
-        )
+        media = _media_of(message)
 
         if media is not None:
             async with global_lock:
@@ -131,29 +390,10 @@ class TelegramDownloadHelper:
                 self._listener.size = media.file_size
                 gid = token_hex(4)
 
-                msg, button = await stop_duplicate_check(self._listener)
-                if msg:
-                    await self._listener.on_download_error(msg, button)
+                add_to_queue = await self._wait_for_queue(gid)
+                if add_to_queue is None:
                     return
 
-                add_to_queue, event = await check_running_tasks(self._listener)
-                if add_to_queue:
-                    LOGGER.info(f"Added to Queue/Download: {self._listener.name}")
-                    async with task_dict_lock:
-                        task_dict[self._listener.mid] = QueueStatus(
-                            self._listener,
-                            gid,
-                            "dl",
-                        )
-                    await self._listener.on_download_start()
-                    if self._listener.multi <= 1:
-                        await send_status_message(self._listener.message)
-                    await event.wait()
-                    if self._listener.is_cancelled:
-                        async with global_lock:
-                            GLOBAL_GID.discard(self._id)
-                        return
-
                 self._start_time = time()
                 await self._on_download_start(gid, add_to_queue)
                 await self._download(message, path)
@@ -164,6 +404,83 @@ class TelegramDownloadHelper:
                 "No document in the replied message! Use SuperGroup incase you are trying to download with User session!",
             )
 
+    async def add_range_download(self, chat_id, message_ids, path, session):
+        """
+        Downloads the media of a message range as one task into one folder.
+        Messages are fetched RANGE_CHUNK ids per call and RANGE_WORKERS files
+        are downloaded at once, all reported through a single status.
+        """
+        self.session = session
+        messages = []
+        try:
+            for i in range(0, len(message_ids), RANGE_CHUNK):
+                batch = await session.get_messages(
+                    chat_id=chat_id,
+                    message_ids=list(message_ids[i : i + RANGE_CHUNK]),
+                )
+                messages.extend(
+                    m for m in batch if not m.empty and _media_of(m) is not None
+                )
+        except Exception as e:
+            await self._listener.on_download_error(f"Failed to get messages: {e}")
+            return
+        if not messages:
+            await self._listener.on_download_error(
+                "No media found in this message range!",
+            )
+            return
+
+        if not self._listener.name:
+            title = messages[0].chat.title or str(chat_id)
+            self._listener.name = (
+                f"{title} {message_ids[0]}-{message_ids[-1]}".replace("/", "_")
+            )
+        folder = f"{path}{self._listener.name}/"
+        self._listener.size = sum(_media_of(m).file_size or 0 for m in messages)
+        gid = token_hex(4)
+
+        add_to_queue = await self._wait_for_queue(gid)
+        if add_to_queue is None:
+            return
+
+        self._start_time = time()
+        await self._on_download_start(gid, add_to_queue)
+        taken = set()
+        semaphore = Semaphore(RANGE_WORKERS)
+
+        async def fetch(message):
+            media = _media_of(message)
+            name = _range_file_name(message, media, taken)
+            async with semaphore:
+                if self._listener.is_cancelled:
+                    return True
+                return await self._fetch(message, media, f"{folder}{name}")
+
+        # the first failure stops the rest, their folder is about to be cleaned
+        tasks = [create_task(fetch(m)) for m in messages]
+        error = None
+        try:
+            for done in as_completed(tasks):
+                if not await done:
+                    error = "Internal error occurred"
+                    break
+        except Exception as e:
+            LOGGER.error(str(e))
+            error = str(e)
+        finally:
+            cancelled = self._listener.is_cancelled
+            if error is not None:
+                self._listener.is_cancelled = True
+            for task in tasks:
+                task.cancel()
+            await gather(*tasks, return_exceptions=True)
+        if cancelled:
+            return
+        if error is not None:
+            await self._on_download_error(error)
+        else:
+            await self._on_download_complete()
+
     async def cancel_task(self):
         self._listener.is_cancelled = True
         LOGGER.info(
@@ -245,7 +245,7 @@ class YoutubeDLHelper:
 
         self.opts["format"] = qual
 
-        await sync_to_async(self._extract_meta_data)
+        await sync_to_async(self._extract_meta_data, pool="net")
         if self._listener.is_cancelled:
             return
 
@@ -332,7 +332,9 @@ class YoutubeDLHelper:
             await self._listener.on_download_error(msg, button)
             return
 
-        add_to_queue, event = await check_running_tasks(self._listener)
+        add_to_queue, event = await check_running_tasks(
+            self._listener, engine="yt-dlp"
+        )
         if add_to_queue:
             LOGGER.info(f"Added to Queue/Download: {self._listener.name}")
             async with task_dict_lock:
@@ -350,7 +352,7 @@ class YoutubeDLHelper:
         if not add_to_queue:
             LOGGER.info(f"Download with YT_DLP: {self._listener.name}")
 
-        await sync_to_async(self._download, path)
+        await sync_to_async(self._download, path, pool="transfer")
 
     async def cancel_task(self):
         self._listener.is_cancelled = True
@@ -0,0 +1,75 @@
+from threading import Lock
+from time import monotonic
+
+# seconds a folder listing or name lookup is served from memory
+CACHE_TTL = 300
+MAX_ENTRIES = 2048
+
+
+class GoogleDriveCache:
+    """
+    TTL cache of folder listings and duplicate-name lookups.
+
+    Listings are keyed by (credentials, folder id, item type) and lookups by
+    (target, user, name, no_multi). Our own uploads, clones and deletes
+    invalidate the folder they touched and every lookup for that name, so the
+    bot never serves a stale view of its own writes; changes made outside the
+    bot show up once the entry expires.
+    """
+
+    def __init__(self, ttl=CACHE_TTL, max_entries=MAX_ENTRIES):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._lock = Lock()
+        self._listings = {}
+        self._lookups = {}
+
+    def _get(self, store, key):
+        with self._lock:
+            entry = store.get(key)
+            if entry is None:
+                return None
+            if entry[0] < monotonic():
+                del store[key]
+                return None
+            return entry[1]
+
+    def _set(self, store, key, value):
+        with self._lock:
+            now = monotonic()
+            if len(store) >= self.max_entries:
+                for k in [k for k, v in store.items() if v[0] < now]:
+                    del store[k]
+                while len(store) >= self.max_entries:
+                    del store[next(iter(store))]
+            store[key] = (now + self.ttl, value)
+
+    def get_listing(self, auth, folder_id, item_type=""):
+        return self._get(self._listings, (auth, folder_id, item_type))
+
+    def set_listing(self, auth, folder_id, item_type, files):
+        self._set(self._listings, (auth, folder_id, item_type), files)
+
+    def get_lookup(self, target, user_id, name, no_multi):
+        return self._get(self._lookups, (target, user_id, name, no_multi))
+
+    def set_lookup(self, target, user_id, name, no_multi, result):
+        self._set(self._lookups, (target, user_id, name, no_multi), result)
+
+    def invalidate(self, parent_id=None, name=None, file_id=None):
+        """Drops what a write of `name` under `parent_id` (or of `file_id`) affects."""
+        folders = {i for i in (parent_id, file_id) if i}
+        with self._lock:
+            for key in [k for k in self._listings if k[1] in folders]:
+                del self._listings[key]
+            if name:
+                for key in [k for k in self._lookups if k[2] == name]:
+                    del self._lookups[key]
+
+    def clear(self):
+        with self._lock:
+            self._listings.clear()
+            self._lookups.clear()
+
+
+drive_cache = GoogleDriveCache()
@@ -12,7 +12,9 @@ from tenacity import (
 )
 
 from bot.helper.ext_utils.bot_utils import async_to_sync
+from bot.helper.mirror_leech_utils.gdrive_utils.cache import drive_cache
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from bot.helper.mirror_leech_utils.gdrive_utils.walker import GoogleDriveWalker
 
 LOGGER = getLogger(__name__)
 
@@ -73,6 +75,11 @@ class GoogleDriveClone(GoogleDriveHelper):
                         fileId=dir_id,
                         supportsAllDrives=True,
                     ).execute()
+                    drive_cache.invalidate(
+                        self.listener.up_dest,
+                        meta.get("name"),
+                        dir_id,
+                    )
                     return None, None, None, None, None
                 mime_type = "Folder"
                 self.listener.size = self.proc_bytes
@@ -111,15 +118,20 @@ class GoogleDriveClone(GoogleDriveHelper):
 
     def _clone_folder(self, folder_name, folder_id, dest_id):
         LOGGER.info(f"Syncing: {folder_name}")
-        files = self.get_files_by_folder_id(folder_id)
-        if len(files) == 0:
-            return dest_id
-        for file in files:
+        dest_ids = {folder_id: dest_id}
+        for parent_id, dirpath, file in GoogleDriveWalker(self).walk(
+            folder_id,
+            resolve_shortcuts=False,
+            should_stop=lambda: self.listener.is_cancelled,
+        ):
             if file.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
                 self.total_folders += 1
-                file_path = ospath.join(folder_name, file.get("name"))
-                current_dir_id = self.create_directory(file.get("name"), dest_id)
-                self._clone_folder(file_path, file.get("id"), current_dir_id)
+                file_path = ospath.join(folder_name, dirpath, file.get("name"))
+                LOGGER.info(f"Syncing: {file_path}")
+                dest_ids[file.get("id")] = self.create_directory(
+                    file.get("name"),
+                    dest_ids[parent_id],
+                )
             elif (
                 not file.get("name")
                 .strip()
@@ -127,12 +139,11 @@ class GoogleDriveClone(GoogleDriveHelper):
                 .endswith(tuple(self.listener.excluded_extensions))
             ):
                 self.total_files += 1
-                self._copy_file(file.get("id"), dest_id)
+                self._copy_file(file.get("id"), dest_ids[parent_id])
                 self.proc_bytes += int(file.get("size", 0))
                 self.total_time = int(time() - self._start_time)
             if self.listener.is_cancelled:
                 break
-        return None
 
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
@@ -142,11 +153,13 @@ class GoogleDriveClone(GoogleDriveHelper):
     def _copy_file(self, file_id, dest_id):
         body = {"parents": [dest_id]}
         try:
-            return (
+            file = (
                 self.service.files()
                 .copy(fileId=file_id, body=body, supportsAllDrives=True)
                 .execute()
             )
+            drive_cache.invalidate(dest_id, file.get("name"))
+            return file
         except HttpError as err:
             if err.resp.get("content-type", "").startswith("application/json"):
                 reason = (
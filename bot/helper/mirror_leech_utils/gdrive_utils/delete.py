@@ -2,6 +2,7 @@ from logging import getLogger
 
 from googleapiclient.errors import HttpError
 
+from bot.helper.mirror_leech_utils.gdrive_utils.cache import drive_cache
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
@@ -19,10 +20,17 @@ class GoogleDriveDelete(GoogleDriveHelper):
         self.service = self.authorize()
         msg = ""
         try:
+            meta = (
+                self.service.files()
+                .get(fileId=file_id, supportsAllDrives=True, fields="name, parents")
+                .execute()
+            )
             self.service.files().delete(
                 fileId=file_id,
                 supportsAllDrives=True,
             ).execute()
+            for parent_id in meta.get("parents", [None]):
+                drive_cache.invalidate(parent_id, meta.get("name"), file_id)
             msg = "Successfully deleted"
             LOGGER.info(f"Delete Result: {msg}")
         except HttpError as err:
@@ -1,10 +1,17 @@
+from concurrent.futures import ThreadPoolExecutor, wait
 from io import FileIO
+from json import loads
 from logging import getLogger
-from os import makedirs
+from os import O_CREAT, O_WRONLY, close, ftruncate, makedirs, pwrite
+from os import open as osopen
 from os import path as ospath
+from queue import SimpleQueue
+from threading import Event, Lock, Thread, local
+from time import sleep
 
 from googleapiclient.errors import HttpError
 from googleapiclient.http import MediaIoBaseDownload
+from httplib2 import HttpLib2Error
 from tenacity import (
     RetryError,
     retry,
@@ -13,11 +20,32 @@ from tenacity import (
     wait_exponential,
 )
 
+from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import SetInterval, async_to_sync
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from bot.helper.mirror_leech_utils.gdrive_utils.walker import GoogleDriveWalker
 
 LOGGER = getLogger(__name__)
 
+# Files at least this big are split into Range segments when enabled
+SEGMENT_MIN_SIZE = 512 * 1024 * 1024
+# Bytes requested per Range call and per next_chunk in parallel mode
+WORKER_CHUNK_SIZE = 32 * 1024 * 1024
+RETRY_STATUS = [500, 502, 503, 504, 429]
+# dropped connections, SSL errors and timeouts, worth retrying a Range call
+TRANSPORT_ERRORS = (OSError, HttpLib2Error)
+RANGE_RETRIES = 10
+QUOTA_REASONS = ["downloadQuotaExceeded", "dailyLimitExceeded"]
+
+
+def _error_reason(err):
+    if not err.resp.get("content-type", "").startswith("application/json"):
+        return ""
+    try:
+        return loads(err.content)["error"]["errors"][0]["reason"]
+    except (ValueError, KeyError, IndexError):
+        return ""
+
 
 class GoogleDriveDownload(GoogleDriveHelper):
     def __init__(self, listener, path):
@@ -26,6 +54,17 @@ class GoogleDriveDownload(GoogleDriveHelper):
         self._path = path
         super().__init__()
         self.is_downloading = True
+        # set on workers to report progress to the task owning them
+        self._track = None
+        # per file bytes in flight while workers are running
+        self._file_bytes = None
+        self._done_bytes = 0
+        self._bytes_lock = Lock()
+        self._worker_error = None
+        # downloader owning the segment pool and the per thread services
+        self._owner = self
+        self._segment_pool = None
+        self._local = local()
 
     def download(self):
         file_id = self.get_id_from_url(self.listener.link, self.listener.user_id)
@@ -34,15 +73,31 @@ class GoogleDriveDownload(GoogleDriveHelper):
         try:
             meta = self.get_file_metadata(file_id)
             if meta.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
-                self._download_folder(file_id, self._path, self.listener.name)
+                if Config.GDRIVE_DOWNLOAD_WORKERS > 1:
+                    self._download_folder_parallel(
+                        file_id,
+                        self._path,
+                        self.listener.name,
+                    )
+                else:
+                    self._download_folder(file_id, self._path, self.listener.name)
             else:
                 makedirs(self._path, exist_ok=True)
-                self._download_file(
-                    file_id,
-                    self._path,
-                    self.listener.name,
-                    meta.get("mimeType"),
-                )
+                if self._use_segments(meta.get("size")):
+                    self._file_bytes = {}
+                    self._download_segmented(
+                        file_id,
+                        self._path,
+                        self.listener.name,
+                        int(meta["size"]),
+                    )
+                else:
+                    self._download_file(
+                        file_id,
+                        self._path,
+                        self.listener.name,
+                        meta.get("mimeType"),
+                    )
         except Exception as err:
             if isinstance(err, RetryError):
                 LOGGER.info(f"Total Attempts: {err.last_attempt.attempt_number}")
@@ -62,39 +117,265 @@ class GoogleDriveDownload(GoogleDriveHelper):
             self.listener.is_cancelled = True
         finally:
             self._updater.cancel()
+            if self._segment_pool is not None:
+                self._segment_pool.shutdown()
+                self._segment_pool = None
             if not self.listener.is_cancelled:
                 async_to_sync(self.listener.on_download_complete)
         return None
 
-    def _download_folder(self, folder_id, path, folder_name):
-        folder_name = folder_name.replace("/", "")
-        if not ospath.exists(f"{path}/{folder_name}"):
-            makedirs(f"{path}/{folder_name}")
-        path += f"/{folder_name}"
-        result = self.get_files_by_folder_id(folder_id)
-        if len(result) == 0:
+    async def progress(self):
+        if self._file_bytes is None:
+            await super().progress()
             return
-        result = sorted(result, key=lambda k: k["name"])
-        for item in result:
-            file_id = item["id"]
-            filename = item["name"]
-            shortcut_details = item.get("shortcutDetails")
-            if shortcut_details is not None:
-                file_id = shortcut_details["targetId"]
-                mime_type = shortcut_details["targetMimeType"]
+        with self._bytes_lock:
+            processed = self._done_bytes + sum(self._file_bytes.values())
+        self.proc_bytes = processed
+        self.total_time += self.update_interval
+
+    def _add_progress(self, key, processed, done=False):
+        with self._bytes_lock:
+            if done:
+                self._file_bytes.pop(key, None)
+                self._done_bytes += processed
             else:
-                mime_type = item.get("mimeType")
-            if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                self._download_folder(file_id, path, filename)
-            elif not ospath.isfile(
-                f"{path}{filename}",
-            ) and not filename.strip().lower().endswith(
-                tuple(self.listener.excluded_extensions),
-            ):
-                self._download_file(file_id, path, filename, mime_type)
+                self._file_bytes[key] = processed
+
+    @staticmethod
+    def _use_segments(size):
+        return (
+            Config.GDRIVE_DOWNLOAD_SEGMENTS > 1
+            and size is not None
+            and int(size) >= SEGMENT_MIN_SIZE
+        )
+
+    def _new_worker(self):
+        """Returns a downloader with its own authorized service for one thread."""
+        worker = GoogleDriveDownload(self.listener, self._path)
+        worker.token_path = self.token_path
+        worker.use_sa = self.use_sa
+        worker.alt_auth = self.alt_auth
+        worker.service = worker.authorize()
+        worker._track = self._add_progress
+        worker._owner = self._owner
+        return worker
+
+    def _thread_worker(self):
+        """Returns the downloader of the calling thread, authorized once per thread."""
+        cache = self._owner._local
+        if getattr(cache, "worker", None) is None:
+            cache.worker = self._owner._new_worker()
+        return cache.worker
+
+    def _segments(self):
+        """
+        Returns the Range segment pool shared by every file of this download,
+        so its threads and their services are reused from file to file.
+        """
+        owner = self._owner
+        with owner._bytes_lock:
+            if owner._segment_pool is None:
+                owner._segment_pool = ThreadPoolExecutor(
+                    max_workers=Config.GDRIVE_DOWNLOAD_SEGMENTS
+                    * max(Config.GDRIVE_DOWNLOAD_WORKERS, 1),
+                    thread_name_prefix="gd-seg",
+                )
+            return owner._segment_pool
+
+    def _skip_file(self, path, filename):
+        return ospath.isfile(
+            f"{path}{filename}",
+        ) or filename.strip().lower().endswith(
+            tuple(self.listener.excluded_extensions),
+        )
+
+    def _folder_files(self, folder_id, path, folder_name):
+        """
+        Creates the local folders of a Drive tree while it is walked and yields
+        (file_id, path, filename, mime_type, size) for every file to download.
+        """
+        path += f"/{folder_name.replace('/', '')}"
+        makedirs(path, exist_ok=True)
+        # keyed by the walked path, a folder with several parents is listed
+        # and downloaded under each of them
+        paths = {"": path}
+        for _, dirpath, item in GoogleDriveWalker(self).walk(
+            folder_id,
+            should_stop=self._stopped,
+            unique_folders=False,
+        ):
+            path = paths[dirpath]
+            filename = item["name"]
+            if item.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE:
+                subdir = f"{path}/{filename.replace('/', '')}"
+                paths[ospath.join(dirpath, filename)] = subdir
+                makedirs(subdir, exist_ok=True)
+            elif not self._skip_file(path, filename):
+                yield (
+                    item["id"],
+                    path,
+                    filename,
+                    item.get("mimeType"),
+                    item.get("size"),
+                )
+
+    def _download_folder(self, folder_id, path, folder_name):
+        for file_id, fpath, filename, mime_type, _ in self._folder_files(
+            folder_id,
+            path,
+            folder_name,
+        ):
+            self._download_file(file_id, fpath, filename, mime_type)
             if self.listener.is_cancelled:
                 break
 
+    def _download_folder_parallel(self, folder_id, path, folder_name):
+        """
+        Lists the folder tree breadth first and feeds the files to a pool of
+        workers, so downloads start while deeper folders are still listed.
+        """
+        self._file_bytes = {}
+        self._done_bytes = 0
+        self._worker_error = None
+        jobs = SimpleQueue()
+        workers = [
+            Thread(
+                target=self._folder_worker,
+                args=(jobs,),
+                name=f"gd-dl-{i}",
+                daemon=True,
+            )
+            for i in range(Config.GDRIVE_DOWNLOAD_WORKERS)
+        ]
+        for worker in workers:
+            worker.start()
+        try:
+            for job in self._folder_files(folder_id, path, folder_name):
+                jobs.put(job)
+        finally:
+            for _ in workers:
+                jobs.put(None)
+            for worker in workers:
+                worker.join()
+        if self._worker_error is not None:
+            raise self._worker_error
+
+    def _stopped(self):
+        return self.listener.is_cancelled or self._worker_error is not None
+
+    def _folder_worker(self, jobs):
+        worker = None
+        while (job := jobs.get()) is not None:
+            if self._stopped():
+                continue
+            file_id, path, filename, mime_type, size = job
+            try:
+                if worker is None:
+                    worker = self._new_worker()
+                if self._use_segments(size):
+                    worker._download_segmented(file_id, path, filename, int(size))
+                else:
+                    worker._download_file(file_id, path, filename, mime_type)
+            except Exception as err:
+                with self._bytes_lock:
+                    if self._worker_error is None:
+                        self._worker_error = err
+
+    def _download_segmented(self, file_id, path, filename, size):
+        """
+        Downloads one file as parallel HTTP Range segments written straight
+        into a preallocated file, each segment thread with its own service.
+        """
+        filename = filename.replace("/", "")
+        if len(filename.encode()) > 255:
+            ext = ospath.splitext(filename)[1]
+            filename = f"{filename[:245]}{ext}"
+            if self.listener.name.strip().endswith(ext):
+                self.listener.name = filename
+        if self.listener.is_cancelled:
+            return
+        file_path = f"{path}/{filename}"
+        track = self._track or self._add_progress
+        segments = Config.GDRIVE_DOWNLOAD_SEGMENTS
+        step = -(-size // segments)
+        ranges = [
+            (start, min(start + step, size) - 1) for start in range(0, size, step)
+        ]
+        abort = Event()
+        fd = osopen(file_path, O_WRONLY | O_CREAT, 0o644)
+        try:
+            ftruncate(fd, size)
+            pool = self._segments()
+            futures = [
+                pool.submit(
+                    self._download_range,
+                    file_id,
+                    fd,
+                    start,
+                    end,
+                    f"{file_path}#{start}",
+                    track,
+                    abort,
+                )
+                for start, end in ranges
+            ]
+            try:
+                for future in futures:
+                    future.result()
+            except Exception:
+                abort.set()
+                wait(futures)
+                raise
+        finally:
+            close(fd)
+
+    def _download_range(self, file_id, fd, start, end, key, track, abort):
+        worker = self._thread_worker()
+        retries = 0
+        pos = start
+        while pos <= end:
+            if self.listener.is_cancelled or abort.is_set():
+                return
+            stop = min(pos + WORKER_CHUNK_SIZE, end + 1) - 1
+            request = worker.service.files().get_media(
+                fileId=file_id,
+                supportsAllDrives=True,
+                acknowledgeAbuse=True,
+            )
+            request.headers["range"] = f"bytes={pos}-{stop}"
+            try:
+                content = request.execute()
+            except TRANSPORT_ERRORS as err:
+                if retries >= RANGE_RETRIES:
+                    raise
+                LOGGER.warning(f"Retrying range {pos}-{stop} of {key}: {err}")
+                retries += 1
+                sleep(min(2**retries, 60))
+                continue
+            except HttpError as err:
+                LOGGER.error(err)
+                if err.resp.status in RETRY_STATUS and retries < RANGE_RETRIES:
+                    retries += 1
+                    sleep(min(2**retries, 60))
+                    continue
+                reason = _error_reason(err)
+                if (
+                    reason in QUOTA_REASONS
+                    and worker.use_sa
+                    and worker.sa_count < worker.sa_number
+                ):
+                    LOGGER.info(f"Got: {reason}, Trying Again...")
+                    worker.switch_service_account()
+                    continue
+                raise err
+            if not content:
+                # the file is already sized, a short segment would leave zeros
+                raise ValueError(f"Range {pos}-{end} of {key} ended early")
+            pwrite(fd, content, pos)
+            pos += len(content)
+            track(key, pos - start)
+        track(key, pos - start, True)
+
     @retry(
         wait=wait_exponential(multiplier=2, min=3, max=6),
         stop=stop_after_attempt(3),
@@ -123,8 +404,13 @@ class GoogleDriveDownload(GoogleDriveHelper):
                 self.listener.name = filename
         if self.listener.is_cancelled:
             return None
-        fh = FileIO(f"{path}/{filename}", "wb")
-        downloader = MediaIoBaseDownload(fh, request, chunksize=100 * 1024 * 1024)
+        key = f"{path}/{filename}"
+        fh = FileIO(key, "wb")
+        downloader = MediaIoBaseDownload(
+            fh,
+            request,
+            chunksize=WORKER_CHUNK_SIZE if self._track else 100 * 1024 * 1024,
+        )
         done = False
         retries = 0
         while not done:
@@ -133,10 +419,13 @@ class GoogleDriveDownload(GoogleDriveHelper):
                 break
             try:
                 self.status, done = downloader.next_chunk()
+                if self._track is not None:
+                    self._track(key, self.status.resumable_progress, done)
             except HttpError as err:
                 LOGGER.error(err)
-                if err.resp.status in [500, 502, 503, 504, 429] and retries < 10:
+                if err.resp.status in RETRY_STATUS and retries < 10:
                     retries += 1
+                    sleep(min(2**retries, 60))
                     continue
                 if err.resp.get("content-type", "").startswith("application/json"):
                     reason = (
@@ -150,10 +439,7 @@ class GoogleDriveDownload(GoogleDriveHelper):
                             mime_type,
                             True,
                         )
-                    if reason not in [
-                        "downloadQuotaExceeded",
-                        "dailyLimitExceeded",
-                    ]:
+                    if reason not in QUOTA_REASONS:
                         raise err
                     if self.use_sa:
                         if self.sa_count >= self.sa_number:
@@ -19,6 +19,7 @@ from tenacity import (
 
 from bot.core.config_manager import Config
 from bot.helper.ext_utils.links_utils import is_gdrive_id
+from bot.helper.mirror_leech_utils.gdrive_utils.cache import drive_cache
 
 LOGGER = getLogger(__name__)
 getLogger("googleapiclient.discovery").setLevel(ERROR)
@@ -185,7 +186,7 @@ class GoogleDriveHelper:
                     includeItemsFromAllDrives=True,
                     q=q,
                     spaces="drive",
-                    pageSize=200,
+                    pageSize=1000,
                     fields="nextPageToken, files(id, name, mimeType, size, shortcutDetails)",
                     orderBy="folder, name",
                     pageToken=page_token,
@@ -217,6 +218,7 @@ class GoogleDriveHelper:
             .execute()
         )
         file_id = file.get("id")
+        drive_cache.invalidate(dest_id, directory_name)
         if not Config.IS_TEAM_DRIVE:
             self.set_permission(file_id)
         LOGGER.info(
@@ -10,12 +10,17 @@ from pyrogram.handlers import CallbackQueryHandler
 from tenacity import RetryError
 
 from bot.core.config_manager import Config
-from bot.helper.ext_utils.bot_utils import new_task, update_user_ldata
+from bot.helper.ext_utils.bot_utils import (
+    new_task,
+    sync_to_async,
+    update_user_ldata,
+)
 from bot.helper.ext_utils.db_handler import database
 from bot.helper.ext_utils.status_utils import (
     get_readable_file_size,
     get_readable_time,
 )
+from bot.helper.mirror_leech_utils.gdrive_utils.cache import drive_cache
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.message_utils import (
@@ -138,6 +143,7 @@ class GoogleDriveList(GoogleDriveHelper):
         self.iter_start = 0
         self.page_step = 1
         super().__init__()
+        self._service_auth = None
 
     async def _event_handler(self):
         pfunc = partial(id_updates, obj=self)
@@ -241,7 +247,7 @@ class GoogleDriveList(GoogleDriveHelper):
         elif itype:
             self.item_type = itype
         try:
-            files = self.get_files_by_folder_id(self.id, self.item_type)
+            files = await self._cached_files(self.id, self.item_type)
             if self.listener.is_cancelled:
                 return
         except Exception as err:
@@ -260,15 +266,40 @@ class GoogleDriveList(GoogleDriveHelper):
             self.iter_start = 0
             await self.get_items_buttons()
 
+    async def _authorize(self):
+        if self.service is None or self._service_auth != self.token_path:
+            self.service = await sync_to_async(self.authorize, pool="net")
+            self._service_auth = self.token_path
+
+    async def _cached_files(self, folder_id, item_type):
+        auth = self.token_path
+        files = drive_cache.get_listing(auth, folder_id, item_type)
+        if files is None:
+            await self._authorize()
+            files = await sync_to_async(
+                self.get_files_by_folder_id,
+                folder_id,
+                item_type,
+                pool="net",
+            )
+            drive_cache.set_listing(auth, folder_id, item_type, files)
+        return files
+
+    def _list_drives(self):
+        return self.service.drives().list(pageSize="100").execute()["drives"]
+
     async def list_drives(self):
-        self.service = self.authorize()
-        try:
-            result = self.service.drives().list(pageSize="100").execute()
-        except Exception as e:
-            self.id = str(e)
-            self.event.set()
-            return
-        drives = result["drives"]
+        auth = self.token_path
+        drives = drive_cache.get_listing(auth, "", "drives")
+        if drives is None:
+            try:
+                await self._authorize()
+                drives = await sync_to_async(self._list_drives, pool="net")
+            except Exception as e:
+                self.id = str(e)
+                self.event.set()
+                return
+            drive_cache.set_listing(auth, "", "drives", drives)
         if len(drives) == 0 and not self.use_sa:
             self.drives = [{"id": "root", "name": "root"}]
             self.parents = [{"id": "root", "name": "root"}]
@@ -1,11 +1,26 @@
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import closing
 from logging import getLogger
+from threading import local
+from time import monotonic
 
 from bot import drives_ids, drives_names, index_urls, user_data
 from bot.helper.ext_utils.status_utils import get_readable_file_size
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+from bot.helper.mirror_leech_utils.gdrive_utils.walker import GoogleDriveWalker
 
 LOGGER = getLogger(__name__)
 
+# most results a recursive folder search collects before it stops walking,
+# and the most folders it lists and lists at once to find them
+WALK_SEARCH_LIMIT = 200
+WALK_LIST_LIMIT = 100
+WALK_WORKERS = 2
+# drives searched at once, and the seconds each drive's search may take
+SEARCH_WORKERS = 8
+DRIVE_TIMEOUT = 30
+
 
 class GoogleDriveSearch(GoogleDriveHelper):
     def __init__(
@@ -14,12 +29,15 @@ class GoogleDriveSearch(GoogleDriveHelper):
         no_multi=False,
         is_recursive=True,
         item_type="",
+        first_hit=False,
     ):
         super().__init__()
         self._stop_dup = stop_dup
         self._no_multi = no_multi
         self._is_recursive = is_recursive
         self._item_type = item_type
+        self._first_hit = first_hit
+        self._local = local()
 
     def _drive_query(self, dir_id, file_name, is_recursive):
         try:
@@ -96,8 +114,122 @@ class GoogleDriveSearch(GoogleDriveHelper):
             LOGGER.error(err)
             return {"files": []}
 
+    def _walk_query(self, dir_id, file_name):
+        """
+        Recursive search inside a folder, which files.list can't scope to a
+        subtree, by matching names while the tree is walked. Only the first
+        WALK_LIST_LIMIT folders are listed, so matches deeper in a large tree
+        are missed.
+        """
+        files = []
+        words = file_name.lower().split()
+        try:
+            for _, _, file in GoogleDriveWalker(self, WALK_WORKERS).walk(
+                dir_id,
+                resolve_shortcuts=False,
+                max_listings=WALK_LIST_LIMIT,
+            ):
+                is_folder = file.get("mimeType") == self.G_DRIVE_DIR_MIME_TYPE
+                if (self._item_type == "files" and is_folder) or (
+                    self._item_type == "folders" and not is_folder
+                ):
+                    continue
+                name = file.get("name", "")
+                if self._stop_dup:
+                    if name != file_name:
+                        continue
+                elif not all(word in name.lower() for word in words):
+                    continue
+                files.append(file)
+                if len(files) >= WALK_SEARCH_LIMIT:
+                    break
+        except Exception as err:
+            err = str(err).replace(">", "").replace("<", "")
+            LOGGER.error(err)
+        return {"files": files}
+
+    def _query(self, dir_id, file_name, raw_name):
+        if self._is_recursive and len(dir_id) > 23:
+            # a duplicate check only looks at the folder's direct children
+            if self._stop_dup:
+                return self._drive_query(dir_id, file_name, False)
+            return self._walk_query(dir_id, raw_name)
+        return self._drive_query(dir_id, file_name, self._is_recursive)
+
+    def _thread_query(self, dir_id, file_name, raw_name):
+        """Runs `_query` with a search helper owned by the calling thread."""
+        try:
+            searcher = getattr(self._local, "searcher", None)
+            if searcher is None:
+                searcher = GoogleDriveSearch(
+                    self._stop_dup,
+                    self._no_multi,
+                    self._is_recursive,
+                    self._item_type,
+                )
+                searcher.token_path = self.token_path
+                searcher.use_sa = self.use_sa
+                searcher.service = searcher.authorize()
+                self._local.searcher = searcher
+            return searcher._query(dir_id, file_name, raw_name)
+        except Exception as err:
+            err = str(err).replace(">", "").replace("<", "")
+            LOGGER.error(err)
+            return {"files": []}
+
+    def _results(self, drives, file_name, raw_name):
+        """
+        Yields (drive, response) as each drive's search completes. Up to
+        SEARCH_WORKERS drives are searched at once and each gets DRIVE_TIMEOUT
+        seconds from when its search starts. A drive past its deadline is
+        skipped and its slot goes to the next drive; its API call can't be
+        cancelled, so it is abandoned and finishes in the background.
+        """
+        if len(drives) == 1:
+            self.service = self.authorize()
+            yield drives[0], self._query(drives[0][1], file_name, raw_name)
+            return
+        workers = min(SEARCH_WORKERS, len(drives))
+        # a thread per drive, so abandoned calls never hold up the next drives
+        executor = ThreadPoolExecutor(
+            max_workers=len(drives),
+            thread_name_prefix="gd-search",
+        )
+        waiting = deque(drives)
+        running = {}
+        try:
+            while waiting or running:
+                while waiting and len(running) < workers:
+                    drive = waiting.popleft()
+                    future = executor.submit(
+                        self._thread_query,
+                        drive[1],
+                        file_name,
+                        raw_name,
+                    )
+                    running[future] = (drive, monotonic() + DRIVE_TIMEOUT)
+                deadline = min(d for _, d in running.values())
+                done, _ = wait(
+                    running,
+                    timeout=max(deadline - monotonic(), 0),
+                    return_when=FIRST_COMPLETED,
+                )
+                for future in done:
+                    drive, _ = running.pop(future)
+                    yield drive, future.result()
+                now = monotonic()
+                for future, (drive, deadline) in list(running.items()):
+                    if deadline <= now and not future.done():
+                        del running[future]
+                        LOGGER.error(
+                            f"Drive search timed out for: {drive[0] or drive[1]}",
+                        )
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
+
     def drive_list(self, file_name, target_id="", user_id=""):
         msg = ""
+        raw_name = str(file_name).strip()
         file_name = self.escapes(str(file_name))
         contents_no = 0
         telegraph_content = []
@@ -114,64 +246,59 @@ class GoogleDriveSearch(GoogleDriveHelper):
                 ),
             ]
         else:
-            drives = zip(drives_names, drives_ids, index_urls, strict=False)
+            drives = list(zip(drives_names, drives_ids, index_urls, strict=False))
+            if self._no_multi:
+                drives = drives[:1]
         if (
             not target_id.startswith("mtp:") and len(drives_ids) > 1
         ) or target_id.startswith("tp:"):
             self.use_sa = False
 
-        self.service = self.authorize()
-
-        for drive_name, dir_id, index_url in drives:
-            isRecur = (
-                False
-                if self._is_recursive and len(dir_id) > 23
-                else self._is_recursive
-            )
-            response = self._drive_query(dir_id, file_name, isRecur)
-            if not response["files"]:
-                if self._no_multi:
+        with closing(self._results(drives, file_name, raw_name)) as results:
+            for (drive_name, _, index_url), response in results:
+                if not response["files"]:
+                    continue
+                if not Title:
+                    msg += f"<h4>Search Result For {file_name}</h4>"
+                    Title = True
+                if drive_name:
+                    msg += f"╾────────────╼<br><b>{drive_name}</b><br>╾────────────╼<br>"
+                for file in response.get("files", []):
+                    mime_type = file.get("mimeType")
+                    if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
+                        furl = self.G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(
+                            file.get("id")
+                        )
+                        msg += f"📁 <code>{file.get('name')}<br>(folder)</code><br>"
+                        msg += f"<b><a href={furl}>Drive Link</a></b>"
+                        if index_url:
+                            url = f"{index_url}findpath?id={file.get('id')}"
+                            msg += f' <b>| <a href="{url}">Index Link</a></b>'
+                    elif mime_type == "application/vnd.google-apps.shortcut":
+                        furl = self.G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(
+                            file.get("id")
+                        )
+                        msg += (
+                            f"⁍<a href='{self.G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(file.get('id'))}'>{file.get('name')}"
+                            f"</a> (shortcut)"
+                        )
+                    else:
+                        furl = self.G_DRIVE_BASE_DOWNLOAD_URL.format(file.get("id"))
+                        msg += f"📄 <code>{file.get('name')}<br>({get_readable_file_size(int(file.get('size', 0)))})</code><br>"
+                        msg += f"<b><a href={furl}>Drive Link</a></b>"
+                        if index_url:
+                            url = f"{index_url}findpath?id={file.get('id')}"
+                            msg += f' <b>| <a href="{url}">Index Link</a></b>'
+                            if mime_type.startswith(("image", "video", "audio")):
+                                urlv = f"{index_url}findpath?id={file.get('id')}&view=true"
+                                msg += f' <b>| <a href="{urlv}">View Link</a></b>'
+                    msg += "<br><br>"
+                    contents_no += 1
+                    if len(msg.encode("utf-8")) > 39000:
+                        telegraph_content.append(msg)
+                        msg = ""
+                if self._first_hit:
                     break
-                continue
-            if not Title:
-                msg += f"<h4>Search Result For {file_name}</h4>"
-                Title = True
-            if drive_name:
-                msg += f"╾────────────╼<br><b>{drive_name}</b><br>╾────────────╼<br>"
-            for file in response.get("files", []):
-                mime_type = file.get("mimeType")
-                if mime_type == self.G_DRIVE_DIR_MIME_TYPE:
-                    furl = self.G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(file.get("id"))
-                    msg += f"📁 <code>{file.get('name')}<br>(folder)</code><br>"
-                    msg += f"<b><a href={furl}>Drive Link</a></b>"
-                    if index_url:
-                        url = f"{index_url}findpath?id={file.get('id')}"
-                        msg += f' <b>| <a href="{url}">Index Link</a></b>'
-                elif mime_type == "application/vnd.google-apps.shortcut":
-                    furl = self.G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(file.get("id"))
-                    msg += (
-                        f"⁍<a href='{self.G_DRIVE_DIR_BASE_DOWNLOAD_URL.format(file.get('id'))}'>{file.get('name')}"
-                        f"</a> (shortcut)"
-                    )
-                else:
-                    furl = self.G_DRIVE_BASE_DOWNLOAD_URL.format(file.get("id"))
-                    msg += f"📄 <code>{file.get('name')}<br>({get_readable_file_size(int(file.get('size', 0)))})</code><br>"
-                    msg += f"<b><a href={furl}>Drive Link</a></b>"
-                    if index_url:
-                        url = f"{index_url}findpath?id={file.get('id')}"
-                        msg += f' <b>| <a href="{url}">Index Link</a></b>'
-                        if mime_type.startswith(("image", "video", "audio")):
-                            urlv = (
-                                f"{index_url}findpath?id={file.get('id')}&view=true"
-                            )
-                            msg += f' <b>| <a href="{urlv}">View Link</a></b>'
-                msg += "<br><br>"
-                contents_no += 1
-                if len(msg.encode("utf-8")) > 39000:
-                    telegraph_content.append(msg)
-                    msg = ""
-            if self._no_multi:
-                break
 
         if msg != "":
             telegraph_content.append(msg)
@@ -16,6 +16,7 @@ from tenacity import (
 from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import SetInterval, async_to_sync
 from bot.helper.ext_utils.files_utils import get_mime_type
+from bot.helper.mirror_leech_utils.gdrive_utils.cache import drive_cache
 from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
 
 LOGGER = getLogger(__name__)
@@ -99,6 +100,11 @@ class GoogleDriveUpload(GoogleDriveHelper):
                     fileId=dir_id,
                     supportsAllDrives=True,
                 ).execute()
+                drive_cache.invalidate(
+                    self.listener.up_dest,
+                    ospath.basename(ospath.abspath(self.listener.name)),
+                    dir_id,
+                )
             return
         if self._is_errored:
             return
@@ -177,6 +183,7 @@ class GoogleDriveUpload(GoogleDriveHelper):
                 )
                 .execute()
             )
+            drive_cache.invalidate(dest_id, file_name)
             if not Config.IS_TEAM_DRIVE:
                 self.set_permission(response["id"])
 
@@ -240,6 +247,7 @@ class GoogleDriveUpload(GoogleDriveHelper):
         with contextlib.suppress(Exception):
             remove(file_path)
         self.file_processed_bytes = 0
+        drive_cache.invalidate(dest_id, file_name)
         if not Config.IS_TEAM_DRIVE:
             self.set_permission(response["id"])
         if not in_dir:
@@ -0,0 +1,153 @@
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from logging import getLogger
+from os import path as ospath
+from threading import local
+
+from bot.helper.mirror_leech_utils.gdrive_utils.helper import GoogleDriveHelper
+
+LOGGER = getLogger(__name__)
+
+# files.list calls running at once across the folders of one walk
+LIST_WORKERS = 8
+# requests per batch when resolving shortcut targets, the API limit is 100
+BATCH_SIZE = 100
+
+
+class GoogleDriveWalker:
+    """
+    Concurrent breadth-first listing of a Drive folder tree.
+
+    Folders are listed by a bounded thread pool, each thread with its own
+    authorized service, and `walk` streams the items as listings complete. A
+    folder is always yielded before anything inside it.
+
+    By default a folder reachable through several parents is listed only
+    under the first one found, so its contents appear once. Pass
+    `unique_folders=False` to list it under every parent, as a download
+    needs to recreate each path.
+    """
+
+    def __init__(self, helper, max_workers=LIST_WORKERS):
+        self._helper = helper
+        self._max_workers = max_workers
+        self._local = local()
+
+    def _thread_helper(self):
+        helper = getattr(self._local, "helper", None)
+        if helper is None:
+            helper = GoogleDriveHelper()
+            helper.token_path = self._helper.token_path
+            helper.use_sa = self._helper.use_sa
+            helper.alt_auth = self._helper.alt_auth
+            helper.service = helper.authorize()
+            self._local.helper = helper
+        return helper
+
+    def _resolve_shortcuts(self, helper, items):
+        """Replaces shortcut ids, mime types and sizes with their targets' in batches."""
+        shortcuts = [item for item in items if item.get("shortcutDetails")]
+        targets = {}
+
+        def _callback(request_id, response, exception):
+            if exception is None:
+                targets[request_id] = response
+
+        for i in range(0, len(shortcuts), BATCH_SIZE):
+            batch = helper.service.new_batch_http_request(callback=_callback)
+            for item in shortcuts[i : i + BATCH_SIZE]:
+                target_id = item["shortcutDetails"]["targetId"]
+                batch.add(
+                    helper.service.files().get(
+                        fileId=target_id,
+                        supportsAllDrives=True,
+                        fields="id, mimeType, size",
+                    ),
+                    request_id=target_id,
+                )
+            try:
+                batch.execute()
+            except Exception as e:
+                LOGGER.error(f"Failed to resolve shortcuts: {e}")
+        for item in shortcuts:
+            details = item.pop("shortcutDetails")
+            item["id"] = details["targetId"]
+            item["mimeType"] = details["targetMimeType"]
+            if target := targets.get(details["targetId"]):
+                item["size"] = target.get("size", 0)
+
+    def _list(self, folder_id, resolve_shortcuts):
+        helper = self._thread_helper()
+        items = helper.get_files_by_folder_id(folder_id)
+        if resolve_shortcuts:
+            self._resolve_shortcuts(helper, items)
+        return items
+
+    def walk(
+        self,
+        folder_id,
+        resolve_shortcuts=True,
+        should_stop=None,
+        unique_folders=True,
+        max_listings=None,
+    ):
+        """
+        Yields (parent_id, dirpath, item) for everything under `folder_id`,
+        where `dirpath` is the parent's path relative to the walked folder.
+
+        Shortcuts are replaced by their targets unless `resolve_shortcuts` is
+        False. Listing stops early once `should_stop()` returns True, and no
+        more folders are listed after `max_listings` of them.
+        """
+        folder_mime = self._helper.G_DRIVE_DIR_MIME_TYPE
+        executor = ThreadPoolExecutor(
+            max_workers=self._max_workers,
+            thread_name_prefix="gd-walk",
+        )
+        # shortcuts can point back at an ancestor, list every folder once, or
+        # with unique_folders off once per path, skipping only those cycles
+        seen = {folder_id}
+        listings = 1
+        truncated = False
+        pending = {
+            executor.submit(self._list, folder_id, resolve_shortcuts): (
+                folder_id,
+                "",
+                (folder_id,),
+            ),
+        }
+        try:
+            while pending:
+                done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    parent_id, dirpath, ancestors = pending.pop(future)
+                    for item in future.result():
+                        if should_stop is not None and should_stop():
+                            return
+                        if item.get("mimeType") == folder_mime and (
+                            item["id"] not in seen
+                            if unique_folders
+                            else item["id"] not in ancestors
+                        ):
+                            if max_listings is not None and listings >= max_listings:
+                                if not truncated:
+                                    truncated = True
+                                    LOGGER.info(
+                                        f"Stopped listing {folder_id} after {listings} folders",
+                                    )
+                            else:
+                                listings += 1
+                                seen.add(item["id"])
+                                pending[
+                                    executor.submit(
+                                        self._list,
+                                        item["id"],
+                                        resolve_shortcuts,
+                                    )
+                                ] = (
+                                    item["id"],
+                                    ospath.join(dirpath, item["name"]),
+                                    (*ancestors, item["id"]),
+                                )
+                        yield parent_id, dirpath, item
+        finally:
+            executor.shutdown(wait=False, cancel_futures=True)
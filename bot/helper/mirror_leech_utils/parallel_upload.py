@@ -0,0 +1,167 @@
+import os
+from asyncio import Condition, create_task, gather, shield, sleep
+from functools import partial, wraps
+from inspect import iscoroutinefunction
+from itertools import count
+from math import ceil
+from os import path as ospath
+
+from aiofiles.os import path as aiopath
+from pyrogram import raw
+from pyrogram.errors import FloodPremiumWait, FloodWait
+
+from bot import LOGGER, bot_loop
+from bot.core.config_manager import Config
+from bot.helper.ext_utils.executors import get_pool
+
+from .telegram_sessions import get_media_sessions
+
+# saveBigFilePart takes at most 512KiB per part
+PART_SIZE = 512 * 1024
+# below this pyrogram's own uploader is as fast
+PARALLEL_MIN_SIZE = 20 * 1024 * 1024
+PART_RETRIES = 5
+
+
+def _fs(func, *args):
+    # bot_utils imports the client through help_messages, so its sync_to_async
+    # can't be imported here
+    return get_pool("fs").run(bot_loop, partial(func, *args))
+
+
+class _Window:
+    """
+    Caps the parts in flight. It grows by one part per success up to
+    `maximum` and halves on a failure, like a TCP congestion window.
+    """
+
+    def __init__(self, size, maximum):
+        self.size = size
+        self._maximum = maximum
+        self._in_flight = 0
+        self._cond = Condition()
+
+    async def acquire(self):
+        async with self._cond:
+            await self._cond.wait_for(lambda: self._in_flight < self.size)
+            self._in_flight += 1
+
+    async def release(self, ok):
+        async with self._cond:
+            self._in_flight -= 1
+            if ok:
+                self.size = min(self.size + 1, self._maximum)
+            else:
+                self.size = max(self.size // 2, 1)
+            self._cond.notify_all()
+
+
+def _read_part(fd, part):
+    return os.pread(fd, PART_SIZE, part * PART_SIZE)
+
+
+async def _save_big_file(client, path, progress, progress_args):
+    file_size = await aiopath.getsize(path)
+    limit = 4000 if client.me.is_premium else 2000
+    if file_size > limit * 1024 * 1024:
+        raise ValueError(f"Can't upload files bigger than {limit} MiB")
+    connections = Config.TG_UPLOAD_CONNECTIONS
+    sessions = await get_media_sessions(
+        client,
+        await client.storage.dc_id(),
+        connections,
+    )
+    file_id = client.rnd_id()
+    total_parts = ceil(file_size / PART_SIZE)
+    window = _Window(connections * 2, connections * 8)
+    parts = count()
+    uploaded = 0
+    # reads still running in the fs pool, which cancelling can't stop
+    reads = set()
+
+    async def send_part(session, part):
+        read = _fs(_read_part, fd, part)
+        reads.add(read)
+        chunk = await shield(read)
+        reads.discard(read)
+        request = raw.functions.upload.SaveBigFilePart(
+            file_id=file_id,
+            file_part=part,
+            file_total_parts=total_parts,
+            bytes=chunk,
+        )
+        for attempt in range(PART_RETRIES):
+            await window.acquire()
+            try:
+                await session.invoke(request)
+            except (FloodWait, FloodPremiumWait) as f:
+                await window.release(False)
+                await sleep(f.value)
+            except Exception as e:
+                await window.release(False)
+                if attempt == PART_RETRIES - 1:
+                    raise
+                LOGGER.warning(f"Retrying part {part} of {path}: {e}")
+                await sleep(2**attempt)
+            else:
+                await window.release(True)
+                return len(chunk)
+        raise RuntimeError(f"Part {part} of {path} wasn't accepted")
+
+    async def worker(session):
+        nonlocal uploaded
+        while (part := next(parts)) < total_parts:
+            sent = await send_part(session, part)
+            uploaded += sent
+            if progress:
+                if iscoroutinefunction(progress):
+                    await progress(uploaded, file_size, *progress_args)
+                else:
+                    progress(uploaded, file_size, *progress_args)
+
+    fd = await _fs(os.open, path, os.O_RDONLY)
+    # enough workers to fill the largest window, spread over the sessions
+    tasks = [
+        create_task(worker(sessions[i % connections]))
+        for i in range(connections * 8)
+    ]
+    try:
+        await gather(*tasks)
+    finally:
+        for task in tasks:
+            task.cancel()
+        await gather(*tasks, *reads, return_exceptions=True)
+        await _fs(os.close, fd)
+    return raw.types.InputFileBig(
+        id=file_id,
+        parts=total_parts,
+        name=ospath.basename(path),
+    )
+
+
+def enable_parallel_upload(client):
+    """
+    Routes the uploads of `client` for files of PARALLEL_MIN_SIZE or more
+    through _save_big_file, which sends the parts over TG_UPLOAD_CONNECTIONS
+    media sessions. Everything pyrogram does around save_file stays as is,
+    so send_document/video/audio still build the media, report progress and
+    raise FloodWait or stop on StopTransmissionError as before.
+    """
+    save_file = client.save_file
+
+    @wraps(save_file)
+    async def wrapper(
+        path, file_id=None, file_part=0, progress=None, progress_args=()
+    ):
+        if (
+            Config.TG_UPLOAD_CONNECTIONS > 1
+            and file_id is None
+            and isinstance(path, str)
+            and await aiopath.isfile(path)
+            and await aiopath.getsize(path) >= PARALLEL_MIN_SIZE
+        ):
+            return await _save_big_file(client, path, progress, progress_args)
+        return await save_file(path, file_id, file_part, progress, progress_args)
+
+    client.save_file = wrapper
+    return client
@@ -17,6 +17,10 @@ from bot.helper.ext_utils.status_utils import (
     get_readable_file_size,
     get_readable_time,
 )
+from bot.helper.mirror_leech_utils.rclone_utils.rcd import (
+    RcloneRcError,
+    rc_lsjson,
+)
 from bot.helper.telegram_helper.button_build import ButtonMaker
 from bot.helper.telegram_helper.message_utils import (
     delete_message,
@@ -276,24 +280,39 @@ class RcloneList:
             self.item_type = "--dirs-only"
         elif itype:
             self.item_type = itype
-        cmd = [
-            "xone",
-            "lsjson",
-            self.item_type,
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            self.config_path,
-            f"{self.remote}{self.path}",
-            "-v",
-            "--log-systemd",
-        ]
         if self.listener.is_cancelled:
             return
-        res, err, code = await cmd_exec(cmd)
+        opt = (
+            {"dirsOnly": True}
+            if self.item_type == "--dirs-only"
+            else {"filesOnly": True}
+        )
+        try:
+            result = await rc_lsjson(
+                self.config_path,
+                f"{self.remote}{self.path}",
+                **opt,
+            )
+            err, code = "", 0
+        except RcloneRcError as e:
+            result, err, code = [], str(e), 1
+        if result is None:
+            cmd = [
+                "xone",
+                "lsjson",
+                self.item_type,
+                "--fast-list",
+                "--no-mimetype",
+                "--no-modtime",
+                "--config",
+                self.config_path,
+                f"{self.remote}{self.path}",
+                "-v",
+                "--log-systemd",
+            ]
+            res, err, code = await cmd_exec(cmd)
+            result = loads(res) if code in [0, -9] else []
         if code in [0, -9]:
-            result = loads(res)
             if (
                 len(result) == 0
                 and itype != self.item_type
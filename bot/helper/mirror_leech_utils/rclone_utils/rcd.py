@@ -0,0 +1,252 @@
+from asyncio import Lock, create_subprocess_exec, create_task, sleep
+from contextlib import asynccontextmanager
+from logging import getLogger
+from secrets import token_hex
+from socket import socket
+from time import monotonic
+
+from aiofiles import open as aiopen
+from aiofiles.os import path as aiopath
+from httpx import AsyncClient, HTTPError
+
+LOGGER = getLogger(__name__)
+
+# one daemon per config file, so remotes keep their names, tokens and caches
+_daemons = {}
+_daemons_lock = Lock()
+# config paths whose daemon failed to start, with the time to retry at
+_failed_until = {}
+RETRY_AFTER = 300
+# a daemon nothing used for IDLE_TIMEOUT seconds is stopped
+IDLE_TIMEOUT = 600
+IDLE_CHECK_INTERVAL = 60
+# the idle reaper task, while daemons are running
+_reaper = []
+
+
+class RcloneRcError(Exception):
+    pass
+
+
+async def _config_signature(config_path):
+    # rclone writes refreshed oauth tokens back into the config, ignore those
+    async with aiopen(config_path, "rb") as f:
+        lines = [
+            line for line in await f.readlines() if not line.startswith(b"token")
+        ]
+    return hash(b"".join(lines))
+
+
+def _free_port():
+    with socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+class RcloneDaemon:
+    """
+    A long-lived `rclone rcd` bound to localhost and driven over its RC API.
+
+    Remotes stay connected between calls, so listings, stats and transfers
+    skip the config parsing and authentication a fresh process pays for. The
+    global flags mirror the ones every transfer command used to pass.
+    """
+
+    def __init__(self, config_path):
+        self.config_path = config_path
+        self._proc = None
+        self._client = None
+        self._mtime = None
+        self._signature = None
+        self._jobs = 0
+        self._retired = False
+        self.last_used = monotonic()
+
+    @property
+    def is_running(self):
+        return self._proc is not None and self._proc.returncode is None
+
+    async def start(self):
+        port = _free_port()
+        user, pswd = token_hex(8), token_hex(16)
+        await self._snapshot_config()
+        self._proc = await create_subprocess_exec(
+            "xone",
+            "rcd",
+            "--config",
+            self.config_path,
+            "--rc-addr",
+            f"127.0.0.1:{port}",
+            "--rc-user",
+            user,
+            "--rc-pass",
+            pswd,
+            "-L",
+            "--retries-sleep",
+            "3s",
+            "--ignore-case",
+            "--low-level-retries",
+            "1",
+            "-M",
+            "-v",
+            "--log-systemd",
+        )
+        self._client = AsyncClient(
+            base_url=f"http://127.0.0.1:{port}",
+            auth=(user, pswd),
+            timeout=None,
+        )
+        for _ in range(50):
+            if not self.is_running:
+                break
+            try:
+                await self.call("rc/noop")
+                LOGGER.info(f"Rclone daemon started for {self.config_path}")
+                return
+            except (HTTPError, RcloneRcError):
+                await sleep(0.2)
+        await self.stop()
+        raise RcloneRcError(f"rclone rcd didn't start for {self.config_path}")
+
+    async def stop(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+        if self.is_running:
+            self._proc.kill()
+            await self._proc.wait()
+        self._proc = None
+
+    async def retire(self):
+        """Stops the daemon once the transfers still running on it are done."""
+        self._retired = True
+        if self._jobs == 0:
+            await self.stop()
+
+    @property
+    def is_idle(self):
+        return self._jobs == 0 and monotonic() - self.last_used >= IDLE_TIMEOUT
+
+    @asynccontextmanager
+    async def using(self):
+        self._jobs += 1
+        try:
+            yield self
+        finally:
+            self._jobs -= 1
+            self.last_used = monotonic()
+            if self._retired and self._jobs == 0:
+                await self.stop()
+
+    async def _snapshot_config(self):
+        self._mtime = await aiopath.getmtime(self.config_path)
+        self._signature = await _config_signature(self.config_path)
+
+    async def is_stale(self):
+        try:
+            mtime = await aiopath.getmtime(self.config_path)
+            if mtime == self._mtime:
+                return False
+            self._mtime = mtime
+            return await _config_signature(self.config_path) != self._signature
+        except OSError:
+            return True
+
+    async def call(self, method, **params):
+        """Calls an RC method and returns its JSON result, raising RcloneRcError."""
+        try:
+            resp = await self._client.post(f"/{method}", json=params)
+        except HTTPError as e:
+            raise RcloneRcError(str(e)) from e
+        try:
+            result = resp.json()
+        except ValueError as e:
+            raise RcloneRcError(resp.text) from e
+        if resp.status_code != 200:
+            raise RcloneRcError(result.get("error", resp.text))
+        return result
+
+
+async def get_rcd(config_path):
+    """
+    Returns the running daemon for `config_path`, starting or restarting it
+    when needed, or None when rclone rcd can't be used.
+    """
+    async with _daemons_lock:
+        daemon = _daemons.get(config_path)
+        if daemon is not None and daemon.is_running and not await daemon.is_stale():
+            daemon.last_used = monotonic()
+            return daemon
+        if daemon is not None:
+            # the config changed or rcd died, in-flight transfers keep the old one
+            _daemons.pop(config_path)
+            await daemon.retire()
+        if _failed_until.get(config_path, 0) > monotonic():
+            return None
+        daemon = RcloneDaemon(config_path)
+        try:
+            await daemon.start()
+        except Exception as e:
+            LOGGER.error(f"Rclone daemon unavailable, using rclone commands: {e}")
+            _failed_until[config_path] = monotonic() + RETRY_AFTER
+            return None
+        _daemons[config_path] = daemon
+        if not _reaper:
+            _reaper.append(create_task(_reap_idle()))
+        return daemon
+
+
+async def _reap_idle():
+    """Stops daemons left idle for IDLE_TIMEOUT, until none is running."""
+    try:
+        while _daemons:
+            await sleep(IDLE_CHECK_INTERVAL)
+            async with _daemons_lock:
+                for config_path, daemon in list(_daemons.items()):
+                    if daemon.is_idle:
+                        LOGGER.info(f"Stopping idle rclone daemon for {config_path}")
+                        del _daemons[config_path]
+                        await daemon.stop()
+    finally:
+        _reaper.clear()
+
+
+async def rc_call(config_path, method, **params):
+    """
+    Runs one RC call on the daemon of `config_path`.
+
+    Returns:
+        dict | None: The result, or None when no daemon is available.
+    """
+    if (daemon := await get_rcd(config_path)) is None:
+        return None
+    async with daemon.using():
+        return await daemon.call(method, **params)
+
+
+async def rc_lsjson(config_path, fs, **opt):
+    """
+    `lsjson` through the daemon, with the same item keys as the command.
+
+    Returns:
+        list | None: The items, or None when no daemon is available.
+    """
+    result = await rc_call(
+        config_path,
+        "operations/list",
+        fs=fs,
+        remote="",
+        opt={"noModTime": True, "noMimeType": True, **opt},
+    )
+    return None if result is None else result["list"]
+
+
+async def stop_rcds():
+    """Stops every daemon, for shutdown and restart."""
+    for task in _reaper:
+        task.cancel()
+    _reaper.clear()
+    async with _daemons_lock:
+        for daemon in _daemons.values():
+            await daemon.stop()
+        _daemons.clear()
@@ -1,23 +1,15 @@
-from asyncio import create_subprocess_exec
 from configparser import RawConfigParser
 
 from aiofiles import open as aiopen
 from aiofiles.os import path as aiopath
 
 from bot.core.config_manager import Config
+from bot.core.engine_supervisor import Engine, http_probe, supervisor
 
-RcloneServe = []
 
-
-async def rclone_serve_booter():
+async def _rclone_serve_command():
     if not Config.RCLONE_SERVE_URL or not await aiopath.exists("rclone.conf"):
-        if RcloneServe:
-            try:
-                RcloneServe[0].kill()
-                RcloneServe.clear()
-            except Exception:
-                pass
-        return
+        return None
     config = RawConfigParser()
     async with aiopen("rclone.conf") as f:
         contents = await f.read()
@@ -29,12 +21,6 @@ async def rclone_serve_booter():
         config.set("combine", "upstreams", upstreams)
         async with aiopen("rclone.conf", "w") as f:
             config.write(f, space_around_delimiters=False)
-    if RcloneServe:
-        try:
-            RcloneServe[0].kill()
-            RcloneServe.clear()
-        except Exception:
-            pass
     cmd = [
         "xone",
         "serve",
@@ -57,5 +43,18 @@ async def rclone_serve_booter():
     ]
     if (user := Config.RCLONE_SERVE_USER) and (pswd := Config.RCLONE_SERVE_PASS):
         cmd.extend(("--user", user, "--pass", pswd))
-    rcs = await create_subprocess_exec(*cmd)
-    RcloneServe.append(rcs)
+    return cmd
+
+
+async def _rclone_serve_probe():
+    return await http_probe(f"http://localhost:{Config.RCLONE_SERVE_PORT}/")
+
+
+rclone_serve = supervisor.register(
+    Engine("rclone_serve", _rclone_serve_command, _rclone_serve_probe),
+)
+
+
+async def rclone_serve_booter():
+    """(Re)starts rclone serve with the current config, or stops it if unset."""
+    await rclone_serve.restart()
@@ -14,10 +14,39 @@ from aiofiles.os import path as aiopath
 from bot.core.config_manager import Config
 from bot.helper.ext_utils.bot_utils import cmd_exec, sync_to_async
 from bot.helper.ext_utils.files_utils import count_files_and_folders, get_mime_type
+from bot.helper.ext_utils.status_utils import (
+    get_readable_file_size,
+    get_readable_time,
+)
+from bot.helper.mirror_leech_utils.rclone_utils.rcd import (
+    RcloneRcError,
+    get_rcd,
+    rc_call,
+    rc_lsjson,
+)
 
 LOGGER = getLogger(__name__)
 
 
+def _with_options(path, options):
+    """Adds backend options to a remote path as an rclone connection string."""
+    if not options or path.startswith("/"):
+        return path
+    remote, rpath = path.split(":", 1)
+    opts = ",".join(f"{key}={value}" for key, value in options.items())
+    return f"{remote},{opts}:{rpath}"
+
+
+def _split_path(path):
+    """Splits a local or remote path into its parent fs and the last name."""
+    if path.startswith("/"):
+        fs, _, name = path.rstrip("/").rpartition("/")
+        return fs or "/", name
+    remote, rpath = path.split(":", 1)
+    parent, _, name = rpath.rstrip("/").rpartition("/")
+    return f"{remote}:{parent}", name
+
+
 class RcloneTransferHelper:
     def __init__(self, listener):
         self._listener = listener
@@ -34,6 +63,8 @@ class RcloneTransferHelper:
         self._sa_number = 0
         self._use_service_accounts = Config.USE_SERVICE_ACCOUNTS
         self._rclone_select = False
+        self._rcd = None
+        self._jobid = None
 
     @property
     def transferred_size(self):
@@ -81,6 +112,117 @@ class RcloneTransferHelper:
                 ) = data[0]
             await sleep(0.05)
 
+    def _update_stats(self, stats):
+        processed = stats.get("bytes", 0)
+        total = stats.get("totalBytes", 0)
+        self._transferred_size = get_readable_file_size(processed)
+        self._size = get_readable_file_size(total)
+        self._percentage = f"{round(processed / total * 100, 2)}%" if total else "0%"
+        self._speed = f"{get_readable_file_size(stats.get('speed', 0))}/s"
+        eta = stats.get("eta")
+        self._eta = get_readable_time(eta) if eta else "-"
+
+    @staticmethod
+    def _job(config_path, source, destination, method, is_file=None):
+        """
+        Describes a transfer once, so it can run through the rclone daemon or
+        as a command. `flags` are the extra command flags and `rc_config`,
+        `src_opts` and `dst_opts` their RC equivalents.
+        """
+        return {
+            "config": config_path,
+            "src": source,
+            "dst": destination,
+            "method": method,
+            "is_file": is_file,
+            "flags": [],
+            "rc_config": {},
+            "src_opts": {},
+            "dst_opts": {},
+        }
+
+    async def _execute(self, job):
+        """Runs a transfer job and returns (return_code, error)."""
+        if not self._listener.rc_flags and (rcd := await get_rcd(job["config"])):
+            async with rcd.using():
+                try:
+                    return await self._rc_execute(rcd, job)
+                except RcloneRcError as e:
+                    return 1, str(e)
+        cmd = self._get_updated_command(
+            job["config"],
+            job["src"],
+            job["dst"],
+            job["method"],
+        )
+        cmd.extend(job["flags"])
+        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
+        await self._progress()
+        _, stderr = await self._proc.communicate()
+        return self._proc.returncode, stderr.decode().strip()
+
+    async def _rc_execute(self, rcd, job):
+        source = job["src"]
+        if source.split(":")[-1].startswith("rclone_select"):
+            source = f"{source.split(':')[0]}:"
+            self._rclone_select = True
+        rc_filter = {"IgnoreCase": True}
+        if self._rclone_select:
+            rc_filter["FilesFrom"] = [self._listener.link]
+        else:
+            rc_filter["ExcludeRule"] = [
+                "*.{" + ",".join(self._listener.excluded_extensions) + "}",
+            ]
+        source = _with_options(source, job["src_opts"])
+        destination = _with_options(job["dst"], job["dst_opts"])
+        is_file = job["is_file"]
+        if is_file is None:
+            fs, name = _split_path(source)
+            is_file = False
+            if name:
+                item = (await rcd.call("operations/stat", fs=fs, remote=name)).get(
+                    "item"
+                )
+                is_file = item is not None and not item["IsDir"]
+        if is_file:
+            fs, name = _split_path(source)
+            method = "movefile" if job["method"] == "move" else "copyfile"
+            method = f"operations/{method}"
+            params = {
+                "srcFs": fs,
+                "srcRemote": name,
+                "dstFs": destination,
+                "dstRemote": name,
+            }
+        else:
+            method = f"sync/{job['method']}"
+            params = {"srcFs": source, "dstFs": destination}
+        self._rcd = rcd
+        self._jobid = (
+            await rcd.call(
+                method,
+                _async=True,
+                _config=job["rc_config"],
+                _filter=rc_filter,
+                **params,
+            )
+        )["jobid"]
+        group = f"job/{self._jobid}"
+        try:
+            while True:
+                await sleep(1)
+                status = await rcd.call("job/status", jobid=self._jobid)
+                self._update_stats(await rcd.call("core/stats", group=group))
+                if status["finished"] or self._listener.is_cancelled:
+                    break
+        finally:
+            self._jobid = None
+            with contextlib.suppress(RcloneRcError):
+                await rcd.call("core/stats-delete", group=group)
+        if self._listener.is_cancelled:
+            return -9, ""
+        return (0, "") if status["success"] else (1, status.get("error", ""))
+
     def _switch_service_account(self):
         if self._sa_index == self._sa_number - 1:
             self._sa_index = 0
@@ -116,11 +258,8 @@ class RcloneTransferHelper:
             await f.write(text)
         return sa_conf_file
 
-    async def _start_download(self, cmd, remote_type):
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
+    async def _start_download(self, job, remote_type):
+        return_code, error = await self._execute(job)
         if self._listener.is_cancelled:
             return None
 
@@ -128,7 +267,6 @@ class RcloneTransferHelper:
             await self._listener.on_download_complete()
             return None
         if return_code != -9:
-            error = stderr.decode().strip()
             if not error and remote_type == "drive" and self._use_service_accounts:
                 error = (
                     "Mostly your service accounts don't have access to this drive!"
@@ -143,10 +281,10 @@ class RcloneTransferHelper:
             ):
                 if self._sa_count < self._sa_number:
                     remote = self._switch_service_account()
-                    cmd[6] = f"{remote}:{cmd[6].split(':', 1)[1]}"
+                    job["src"] = f"{remote}:{job['src'].split(':', 1)[1]}"
                     if self._listener.is_cancelled:
                         return None
-                    return await self._start_download(cmd, remote_type)
+                    return await self._start_download(job, remote_type)
                 LOGGER.info(
                     f"Reached maximum number of service accounts switching, which is {self._sa_count}",
                 )
@@ -179,7 +317,7 @@ class RcloneTransferHelper:
                 remote = f"sa{self._sa_index:03}"
                 LOGGER.info(f"Download with service account {remote}")
 
-        cmd = self._get_updated_command(
+        job = self._job(
             config_path,
             f"{remote}:{self._listener.link}",
             path,
@@ -187,7 +325,7 @@ class RcloneTransferHelper:
         )
 
         if remote_type == "drive" and not self._listener.rc_flags:
-            cmd.extend(
+            job["flags"].extend(
                 (
                     "--drive-acknowledge-abuse",
                     "--drive-chunk-size",
@@ -200,30 +338,38 @@ class RcloneTransferHelper:
                     "1",
                 ),
             )
+            job["src_opts"] = {"acknowledge_abuse": "true", "chunk_size": "128M"}
+            job["rc_config"] = {"TPSLimit": 1, "TPSLimitBurst": 1, "Transfers": 1}
 
-        await self._start_download(cmd, remote_type)
+        await self._start_download(job, remote_type)
 
     async def _get_gdrive_link(self, config_path, destination, mime_type):
         epath = (
             destination.rsplit("/", 1)[0] if mime_type == "Folder" else destination
         )
 
-        cmd = [
-            "xone",
-            "lsjson",
-            "--fast-list",
-            "--no-mimetype",
-            "--no-modtime",
-            "--config",
-            config_path,
-            epath,
-            "-v",
-            "--log-systemd",
-        ]
-        res, err, code = await cmd_exec(cmd)
+        try:
+            result = await rc_lsjson(config_path, epath)
+            code, err = 0, ""
+        except RcloneRcError as e:
+            result, code, err = [], 1, str(e)
+        if result is None:
+            cmd = [
+                "xone",
+                "lsjson",
+                "--fast-list",
+                "--no-mimetype",
+                "--no-modtime",
+                "--config",
+                config_path,
+                epath,
+                "-v",
+                "--log-systemd",
+            ]
+            res, err, code = await cmd_exec(cmd)
+            result = loads(res) if code == 0 else []
 
         if code == 0:
-            result = loads(res)
             fid = next(
                 (r["ID"] for r in result if r["Path"] == self._listener.name),
                 "err",
@@ -240,11 +386,8 @@ class RcloneTransferHelper:
             link = ""
         return link
 
-    async def _start_upload(self, cmd, remote_type):
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
+    async def _start_upload(self, job, remote_type):
+        return_code, error = await self._execute(job)
 
         if self._listener.is_cancelled:
             return False
@@ -252,7 +395,6 @@ class RcloneTransferHelper:
             return False
         if return_code == 0:
             return True
-        error = stderr.decode().strip()
         LOGGER.error(error)
         if (
             self._sa_number != 0
@@ -262,11 +404,11 @@ class RcloneTransferHelper:
         ):
             if self._sa_count < self._sa_number:
                 remote = self._switch_service_account()
-                cmd[7] = f"{remote}:{cmd[7].split(':', 1)[1]}"
+                job["dst"] = f"{remote}:{job['dst'].split(':', 1)[1]}"
                 return (
                     False
                     if self._listener.is_cancelled
-                    else await self._start_upload(cmd, remote_type)
+                    else await self._start_upload(job, remote_type)
                 )
             LOGGER.info(
                 f"Reached maximum number of service accounts switching, which is {self._sa_count}",
@@ -319,14 +461,15 @@ class RcloneTransferHelper:
                 LOGGER.info(f"Upload with service account {fremote}")
 
         method = "move"
-        cmd = self._get_updated_command(
+        job = self._job(
             fconfig_path,
             path,
             f"{fremote}:{rc_path}",
             method,
+            mime_type != "Folder",
         )
         if remote_type == "drive" and not self._listener.rc_flags:
-            cmd.extend(
+            job["flags"].extend(
                 (
                     "--drive-chunk-size",
                     "128M",
@@ -340,8 +483,10 @@ class RcloneTransferHelper:
                     "1",
                 ),
             )
+            job["dst_opts"] = {"chunk_size": "128M", "upload_cutoff": "128M"}
+            job["rc_config"] = {"TPSLimit": 1, "TPSLimitBurst": 1, "Transfers": 1}
 
-        result = await self._start_upload(cmd, remote_type)
+        result = await self._start_upload(job, remote_type)
         if not result:
             return
 
@@ -355,16 +500,7 @@ class RcloneTransferHelper:
         if remote_type == "drive":
             link = await self._get_gdrive_link(oconfig_path, destination, mime_type)
         else:
-            cmd = [
-                "xone",
-                "link",
-                "--config",
-                oconfig_path,
-                destination,
-                "-v",
-                "--log-systemd",
-            ]
-            res, err, code = await cmd_exec(cmd)
+            res, err, code = await self._get_public_link(oconfig_path, destination)
 
             if code == 0:
                 link = res
@@ -403,14 +539,15 @@ class RcloneTransferHelper:
             dst_remote_opt["type"],
         )
 
-        cmd = self._get_updated_command(
+        job = self._job(
             config_path,
             f"{src_remote}:{src_path}",
             destination,
             method,
+            mime_type != "Folder",
         )
         if not self._listener.rc_flags and src_remote_type == "drive":
-            cmd.extend(
+            job["flags"].extend(
                 (
                     "--drive-acknowledge-abuse",
                     "--tpslimit",
@@ -421,11 +558,10 @@ class RcloneTransferHelper:
                     "3",
                 ),
             )
+            job["src_opts"] = {"acknowledge_abuse": "true"}
+            job["rc_config"] = {"TPSLimit": 3, "TPSLimitBurst": 1, "Transfers": 3}
 
-        self._proc = await create_subprocess_exec(*cmd, stdout=PIPE, stderr=PIPE)
-        await self._progress()
-        _, stderr = await self._proc.communicate()
-        return_code = self._proc.returncode
+        return_code, error = await self._execute(job)
 
         if self._listener.is_cancelled:
             return None, None
@@ -448,16 +584,7 @@ class RcloneTransferHelper:
                     if self._listener.is_cancelled
                     else (link, destination)
                 )
-            cmd = [
-                "xone",
-                "link",
-                "--config",
-                config_path,
-                destination,
-                "-v",
-                "--log-systemd",
-            ]
-            res, err, code = await cmd_exec(cmd)
+            res, err, code = await self._get_public_link(config_path, destination)
 
             if self._listener.is_cancelled:
                 return None, None
@@ -471,11 +598,36 @@ class RcloneTransferHelper:
                 return None, destination
             return None
 
-        error = stderr.decode().strip()
         LOGGER.error(error)
         await self._listener.on_upload_error(error[:4000])
         return None, None
 
+    @staticmethod
+    async def _get_public_link(config_path, destination):
+        """Returns (link, error, return_code) like `rclone link`."""
+        fs, name = _split_path(destination)
+        try:
+            result = await rc_call(
+                config_path,
+                "operations/publiclink",
+                fs=fs,
+                remote=name,
+            )
+        except RcloneRcError as e:
+            return "", str(e), 1
+        if result is not None:
+            return result["url"], "", 0
+        cmd = [
+            "xone",
+            "link",
+            "--config",
+            config_path,
+            destination,
+            "-v",
+            "--log-systemd",
+        ]
+        return await cmd_exec(cmd)
+
     def _get_updated_command(
         self,
         config_path,
@@ -535,6 +687,9 @@ class RcloneTransferHelper:
         if self._proc is not None:
             with contextlib.suppress(Exception):
                 self._proc.kill()
+        if self._jobid is not None:
+            with contextlib.suppress(Exception):
+                await self._rcd.call("job/stop", jobid=self._jobid)
         if self._is_download:
             LOGGER.info(f"Cancelling Download: {self._listener.name}")
             await self._listener.on_download_error("Stopped by user!")
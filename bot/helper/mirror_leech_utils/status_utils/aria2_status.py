@@ -1,3 +1,4 @@
+from asyncio import gather
 from time import time
 
 from bot import LOGGER
@@ -113,6 +114,16 @@ class Aria2Status:
         self.listener.is_cancelled = True
         await self.update()
         await TorrentManager.aria2_remove(self._download)
+        await self._on_cancelled()
+
+    @classmethod
+    async def cancel_many(cls, tasks):
+        """Cancels `tasks` like cancel_task, removing them in one multicall."""
+        await gather(*(task.update() for task in tasks))
+        await TorrentManager.aria2_remove_many([task._download for task in tasks])
+        await gather(*(task._on_cancelled() for task in tasks))
+
+    async def _on_cancelled(self):
         if self._download.get("seeder", "") == "true" and self.seeding:
             LOGGER.info(f"Cancelling Seed: {self.name()}")
             await self.listener.on_upload_error(
@@ -46,22 +46,12 @@ def _get_combined_info(result, old_info):
 
 async def get_download(gid, old_info):
     try:
-        result = await jdownloader.device.downloads.query_packages(
-            [
-                {
-                    "bytesLoaded": True,
-                    "bytesTotal": True,
-                    "enabled": True,
-                    "packageUUIDs": jd_downloads[gid]["ids"],
-                    "maxResults": -1,
-                    "running": True,
-                    "speed": True,
-                    "eta": True,
-                    "status": True,
-                    "hosts": True,
-                },
-            ],
-        )
+        ids = jd_downloads[gid]["ids"]
+        result = [
+            pack
+            for pack in await jdownloader.download_packages()
+            if pack["uuid"] in ids
+        ]
         return _get_combined_info(result, old_info) if len(result) > 1 else result[0]
     except Exception:
         return old_info
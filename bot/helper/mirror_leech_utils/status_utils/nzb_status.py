@@ -9,17 +9,30 @@ from bot.helper.ext_utils.status_utils import (
 )
 
 
+async def _get_slots(nzo_id):
+    """
+    The queue and history slots of a job, from the listener's last poll when
+    it has one, otherwise queried for this job alone.
+    """
+    job = nzb_jobs.get(nzo_id, {})
+    if "queue" in job:
+        return job["queue"], job.get("history")
+    queue = await sabnzbd_client.get_downloads(nzo_ids=nzo_id)
+    if res := queue["queue"]["slots"]:
+        return res[0], None
+    history = await sabnzbd_client.get_history(nzo_ids=nzo_id)
+    res = history["history"]["slots"]
+    return None, res[0] if res else None
+
+
 async def get_download(nzo_id, old_info=None):
     try:
-        queue = await sabnzbd_client.get_downloads(nzo_ids=nzo_id)
-        if res := queue["queue"]["slots"]:
-            slot = res[0]
-            if msg := slot["labels"]:
+        queue_slot, slot = await _get_slots(nzo_id)
+        if queue_slot:
+            if msg := queue_slot["labels"]:
                 LOGGER.warning(" | ".join(msg))
-            return slot
-        history = await sabnzbd_client.get_history(nzo_ids=nzo_id)
-        if res := history["history"]["slots"]:
-            slot = res[0]
+            return queue_slot
+        if slot:
             if slot["status"] == "Verifying":
                 percentage = slot["action_line"].split("Verifying: ")[-1].split("/")
                 percentage = round(
@@ -131,3 +144,21 @@ class SabnzbdStatus:
         async with nzb_listener_lock:
             if self._gid in nzb_jobs:
                 del nzb_jobs[self._gid]
+
+    @classmethod
+    async def cancel_many(cls, tasks):
+        """Cancels `tasks` like cancel_task, deleting all their jobs in one call."""
+        LOGGER.info(f"Cancelling {len(tasks)} SABnzbd downloads")
+        gids = [task._gid for task in tasks]
+        await gather(
+            *(task.listener.on_download_error("Stopped by user!") for task in tasks),
+            sabnzbd_client.delete_job(gids, delete_files=True),
+            *(
+                sabnzbd_client.delete_category(f"{task.listener.mid}")
+                for task in tasks
+            ),
+            sabnzbd_client.delete_history(gids, delete_files=True),
+        )
+        async with nzb_listener_lock:
+            for gid in gids:
+                nzb_jobs.pop(gid, None)
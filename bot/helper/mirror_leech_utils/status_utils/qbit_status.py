@@ -96,15 +96,9 @@ class QbittorrentStatus:
         await self.update()
         await TorrentManager.qbittorrent.torrents.stop([self._info.hash])
         if not self.seeding:
-            if self.queued:
-                LOGGER.info(f"Cancelling QueueDL: {self.name()}")
-                msg = "task have been removed from queue/download"
-            else:
-                LOGGER.info(f"Cancelling Download: {self._info.name}")
-                msg = "Stopped by user!"
             await sleep(0.3)
             await gather(
-                self.listener.on_download_error(msg),
+                self.listener.on_download_error(self._cancel_message()),
                 TorrentManager.qbittorrent.torrents.delete([self._info.hash], True),
                 TorrentManager.qbittorrent.torrents.delete_tags(
                     tags=[self._info.tags[0]],
@@ -113,3 +107,47 @@ class QbittorrentStatus:
             async with qb_listener_lock:
                 if self._info.tags[0] in qb_torrents:
                     del qb_torrents[self._info.tags[0]]
+
+    @classmethod
+    async def cancel_many(cls, tasks):
+        """
+        Cancels `tasks` like cancel_task, with one info, stop, delete and
+        delete_tags call for all of them. Seeding torrents are removed as
+        well, since their tasks are no longer there for the listener.
+        """
+        torrents = {}
+        for info in await TorrentManager.qbittorrent.torrents.info():
+            for tag in info.tags:
+                torrents[tag] = info
+        for task in tasks:
+            task._info = torrents.get(f"{task.listener.mid}", task._info)
+        if not (tasks := [task for task in tasks if task._info is not None]):
+            return
+        hashes = [task._info.hash for task in tasks]
+        tags = [task._info.tags[0] for task in tasks]
+        async with qb_listener_lock:
+            for tag in tags:
+                qb_torrents.pop(tag, None)
+        await TorrentManager.qbittorrent.torrents.stop(hashes)
+        await sleep(0.3)
+        await gather(
+            *(task._on_cancelled() for task in tasks),
+            TorrentManager.qbittorrent.torrents.delete(hashes, True),
+            TorrentManager.qbittorrent.torrents.delete_tags(tags=tags),
+        )
+
+    async def _on_cancelled(self):
+        if not self.seeding:
+            await self.listener.on_download_error(self._cancel_message())
+            return
+        LOGGER.info(f"Cancelling Seed: {self.name()}")
+        await self.listener.on_upload_error(
+            f"Seeding stopped with Ratio: {self.ratio()} and Time: {self.seeding_time()}",
+        )
+
+    def _cancel_message(self):
+        if self.queued:
+            LOGGER.info(f"Cancelling QueueDL: {self.name()}")
+            return "task have been removed from queue/download"
+        LOGGER.info(f"Cancelling Download: {self._info.name}")
+        return "Stopped by user!"
@@ -1,5 +1,10 @@
 from bot import LOGGER
-from bot.helper.ext_utils.status_utils import MirrorStatus, get_readable_file_size
+from bot.helper.ext_utils.status_utils import (
+    MirrorStatus,
+    get_readable_file_size,
+    get_readable_time,
+)
+from bot.helper.ext_utils.task_manager import queue_position
 
 
 class QueueStatus:
@@ -33,8 +38,13 @@ class QueueStatus:
     def speed(self):
         return "0B/s"
 
+    def position(self):
+        position, _ = queue_position(self.listener.mid)
+        return position or "-"
+
     def eta(self):
-        return "-"
+        _, seconds = queue_position(self.listener.mid)
+        return get_readable_time(seconds) if seconds is not None else "-"
 
     def task(self):
         return self
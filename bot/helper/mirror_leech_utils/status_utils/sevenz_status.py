@@ -1,4 +1,3 @@
-import contextlib
 from time import time
 
 from bot import LOGGER
@@ -59,10 +58,5 @@ class SevenZStatus:
     async def cancel_task(self):
         LOGGER.info(f"Cancelling {self._cstatus}: {self.listener.name}")
         self.listener.is_cancelled = True
-        if (
-            self.listener.subproc is not None
-            and self.listener.subproc.returncode is None
-        ):
-            with contextlib.suppress(Exception):
-                self.listener.subproc.kill()
+        self._obj.kill()
         await self.listener.on_upload_error(f"{self._cstatus} stopped by user!")
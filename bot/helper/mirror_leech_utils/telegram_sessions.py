@@ -0,0 +1,56 @@
+from asyncio import Lock
+
+from pyrogram import raw
+from pyrogram.session import Auth, Session
+
+from bot import LOGGER
+
+# (client name, dc id) -> started media sessions, kept between transfers
+_sessions = {}
+_lock = Lock()
+
+
+async def get_media_sessions(client, dc_id, count):
+    """
+    Returns `count` started media sessions of `client` on `dc_id`, opening
+    the missing ones. Sessions on a foreign DC share one auth key, which is
+    authorized once through an exported authorization.
+    """
+    key = (client.name, dc_id)
+    async with _lock:
+        pool = _sessions.setdefault(key, [])
+        if len(pool) >= count:
+            return pool[:count]
+        home_dc = await client.storage.dc_id()
+        test_mode = await client.storage.test_mode()
+        if pool:
+            auth_key = pool[0].auth_key
+        elif dc_id == home_dc:
+            auth_key = await client.storage.auth_key()
+        else:
+            auth_key = await Auth(client, dc_id, test_mode).create()
+        while len(pool) < count:
+            session = Session(client, dc_id, auth_key, test_mode, is_media=True)
+            await session.start()
+            if dc_id != home_dc and not pool:
+                exported = await client.invoke(
+                    raw.functions.auth.ExportAuthorization(dc_id=dc_id),
+                )
+                await session.invoke(
+                    raw.functions.auth.ImportAuthorization(
+                        id=exported.id,
+                        bytes=exported.bytes,
+                    ),
+                )
+            pool.append(session)
+        LOGGER.info(f"Opened {count} media sessions on DC {dc_id} for {client.name}")
+        return pool[:count]
+
+
+async def stop_media_sessions(client=None):
+    """Stops the media sessions of `client`, or of every client."""
+    async with _lock:
+        for key in list(_sessions):
+            if client is None or key[0] == client.name:
+                for session in _sessions.pop(key):
+                    await session.stop()
@@ -16,7 +16,6 @@ from aiofiles.os import (
 )
 from aioshutil import rmtree
 from natsort import natsorted
-from PIL import Image
 from pyrogram.errors import BadRequest, FloodPremiumWait, FloodWait, RPCError
 from pyrogram.types import (
     InputMediaDocument,
@@ -42,9 +41,11 @@ from bot.helper.ext_utils.files_utils import (
 from bot.helper.ext_utils.media_utils import (
     get_audio_thumbnail,
     get_document_type,
+    get_image_size,
     get_media_info,
     get_multiple_frames_thumbnail,
     get_video_thumbnail,
+    thumb_cache,
 )
 from bot.helper.telegram_helper.message_utils import delete_message
 
@@ -249,7 +250,11 @@ class TelegramUploader:
         res = await self._msg_to_reply()
         if not res:
             return
-        for dirpath, _, files in natsorted(await sync_to_async(walk, self._path)):
+        if self._listener.tree is not None:
+            tree = self._listener.tree.walk(self._path)
+        else:
+            tree = await sync_to_async(list, walk(self._path))
+        for dirpath, _, files in natsorted(tree):
             if dirpath.strip().endswith("/yt-dlp-thumb"):
                 continue
             if dirpath.strip().endswith("_ss"):
@@ -426,8 +431,7 @@ class TelegramUploader:
                 if thumb is None:
                     thumb = await get_video_thumbnail(self._up_path, duration)
                 if thumb is not None and thumb != "none":
-                    with Image.open(thumb) as img:
-                        width, height = img.size
+                    width, height = await sync_to_async(get_image_size, thumb)
                 else:
                     width = 480
                     height = 320
@@ -502,6 +506,7 @@ class TelegramUploader:
             if (
                 self._thumb is None
                 and thumb is not None
+                and not thumb_cache.owns(thumb)
                 and await aiopath.exists(thumb)
             ):
                 await remove(thumb)
@@ -511,6 +516,7 @@ class TelegramUploader:
             if (
                 self._thumb is None
                 and thumb is not None
+                and not thumb_cache.owns(thumb)
                 and await aiopath.exists(thumb)
             ):
                 await remove(thumb)
@@ -519,6 +525,7 @@ class TelegramUploader:
             if (
                 self._thumb is None
                 and thumb is not None
+                and not thumb_cache.owns(thumb)
                 and await aiopath.exists(thumb)
             ):
                 await remove(thumb)
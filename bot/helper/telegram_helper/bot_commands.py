@@ -45,3 +45,5 @@ class BotCommands:
     SelectCommand = f"sel{i}"
     RssCommand = f"rss{i}"
     SoxCommand = [f"spectrum{i}", f"sox{i}"]
+    ZipBenchCommand = f"zipbench{i}"
+    BlockingCommand = f"blocking{i}"
@@ -188,8 +188,12 @@ async def delete_status():
 
 
 async def get_tg_link_message(link, user_id=""):
+    """
+    Resolves a Telegram message link to its message and the session that can
+    read it. A `start-end` range resolves to `(chat_id, message_ids)` instead.
+    """
     message = None
-    links = []
+    msg_range = None
     user_session = None
 
     if user_id:
@@ -233,19 +237,7 @@ async def get_tg_link_message(link, user_id=""):
     if "-" in msg_id:
         start_id, end_id = map(int, msg_id.split("-"))
         msg_id = start_id
-        btw = end_id - start_id
-        if private:
-            link = link.split("&message_id=")[0]
-            links.append(f"{link}&message_id={start_id}")
-            for _ in range(btw):
-                start_id += 1
-                links.append(f"{link}&message_id={start_id}")
-        else:
-            link = link.rsplit("/", 1)[0]
-            links.append(f"{link}/{start_id}")
-            for _ in range(btw):
-                start_id += 1
-                links.append(f"{link}/{start_id}")
+        msg_range = range(start_id, end_id + 1)
     else:
         msg_id = int(msg_id)
 
@@ -266,7 +258,9 @@ async def get_tg_link_message(link, user_id=""):
                 raise e
 
     if not private:
-        return (links, TgClient.bot) if links else (message, TgClient.bot)
+        if msg_range:
+            return (chat, msg_range), TgClient.bot
+        return message, TgClient.bot
     if user_session:
         try:
             user_message = await user_session.get_messages(
@@ -276,7 +270,9 @@ async def get_tg_link_message(link, user_id=""):
         except Exception as e:
             raise TgLinkException("We don't have access to this chat!") from e
         if not user_message.empty:
-            return (links, user_session) if links else (user_message, user_session)
+            if msg_range:
+                return (chat, msg_range), user_session
+            return user_message, user_session
         return None, None
     raise TgLinkException("Private: Please report!")
 
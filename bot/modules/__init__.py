@@ -1,24 +1,17 @@
+from importlib import import_module
+
+from bot.helper.ext_utils.bot_utils import sync_to_async
+
+from .blocking import blocking_sites
 from .bot_settings import edit_bot_settings, send_bot_settings
 from .broadcast import broadcast
 from .cancel_task import cancel, cancel_all_buttons, cancel_all_update, cancel_multi
 from .chat_permission import add_sudo, authorize, remove_sudo, unauthorize
-from .clone import clone_node
 from .exec import aioexecute, clear, execute
 from .file_selector import confirm_selection, select
 from .force_start import remove_from_queue
-from .gd_count import count_node
-from .gd_delete import delete_file
-from .gd_search import gdrive_search, select_type
 from .help import arg_usage, bot_help
 from .mediainfo import mediainfo
-from .mirror_leech import (
-    jd_leech,
-    jd_mirror,
-    leech,
-    mirror,
-    nzb_leech,
-    nzb_mirror,
-)
 from .nzb_search import hydra_search
 from .restart import (
     confirm_restart,
@@ -30,7 +23,6 @@ from .search import initiate_search_tools, torrent_search, torrent_search_update
 from .services import aeon_callback, log, ping, start
 from .shell import run_shell
 from .sox import spectrum_handler
-from .speedtest import speedtest
 from .stats import bot_stats, get_packages_version
 from .status import status_pages, task_status
 from .users_settings import (
@@ -38,7 +30,43 @@ from .users_settings import (
     get_users_settings,
     send_user_settings,
 )
-from .ytdlp import ytdl, ytdl_leech
+from .zip_bench import zip_benchmark
+
+
+def _lazy(module, name):
+    """
+    A handler that imports `module` on its first call. The command modules
+    below pull in yt-dlp, cloudscraper, lxml and speedtest, which would
+    otherwise be loaded on every boot whether used or not. The import runs on
+    the net pool so it neither blocks the loop nor takes a file I/O slot.
+    """
+    func = None
+
+    async def handler(*args, **kwargs):
+        nonlocal func
+        if func is None:
+            mod = await sync_to_async(import_module, module, __name__, pool="net")
+            func = getattr(mod, name)
+        return await func(*args, **kwargs)
+
+    handler.__name__ = handler.__qualname__ = name
+    return handler
+
+
+clone_node = _lazy(".clone", "clone_node")
+count_node = _lazy(".gd_count", "count_node")
+delete_file = _lazy(".gd_delete", "delete_file")
+gdrive_search = _lazy(".gd_search", "gdrive_search")
+select_type = _lazy(".gd_search", "select_type")
+jd_leech = _lazy(".mirror_leech", "jd_leech")
+jd_mirror = _lazy(".mirror_leech", "jd_mirror")
+leech = _lazy(".mirror_leech", "leech")
+mirror = _lazy(".mirror_leech", "mirror")
+nzb_leech = _lazy(".mirror_leech", "nzb_leech")
+nzb_mirror = _lazy(".mirror_leech", "nzb_mirror")
+speedtest = _lazy(".speedtest", "speedtest")
+ytdl = _lazy(".ytdlp", "ytdl")
+ytdl_leech = _lazy(".ytdlp", "ytdl_leech")
 
 __all__ = [
     "add_sudo",
@@ -46,6 +74,7 @@ __all__ = [
     "aioexecute",
     "arg_usage",
     "authorize",
+    "blocking_sites",
     "bot_help",
     "bot_stats",
     "broadcast",
@@ -97,4 +126,5 @@ __all__ = [
     "unauthorize",
     "ytdl",
     "ytdl_leech",
+    "zip_benchmark",
 ]
@@ -0,0 +1,30 @@
+from html import escape
+
+from bot.helper.ext_utils.bot_utils import new_task
+from bot.helper.ext_utils.loop_watchdog import STALL_THRESHOLD, loop_watchdog
+from bot.helper.telegram_helper.message_utils import send_message
+
+
+@new_task
+async def blocking_sites(_, message):
+    args = message.text.split()
+    if len(args) > 1 and args[1] == "reset":
+        loop_watchdog.reset()
+        await send_message(message, "Blocking call stats cleared.")
+        return
+    sites = loop_watchdog.top()
+    if not sites:
+        await send_message(
+            message,
+            f"No callback has blocked the event loop for more than {STALL_THRESHOLD}s.",
+        )
+        return
+    text = "<b>Top Blocking Sites</b>\n"
+    for site, count, total, worst, _ in sites:
+        text += (
+            f"\n<code>{escape(site)}</code>\n"
+            f"{count} times | {total:.2f}s total | {worst:.2f}s max\n"
+        )
+    stack = loop_watchdog.format_stack(sites[0][4])
+    text += f"\n<b>Worst stack:</b>\n<pre>{escape(stack[-2500:])}</pre>"
+    await send_message(message, text)
@@ -32,7 +32,7 @@ from bot import (
 )
 from bot.core.aeon_client import TgClient
 from bot.core.config_manager import Config
-from bot.core.jdownloader_booter import jdownloader
+from bot.core.jdownloader_booter import jd_engine, jdownloader
 from bot.core.startup import update_nzb_options, update_variables
 from bot.core.torrent_manager import TorrentManager
 from bot.helper.ext_utils.bot_utils import SetInterval, new_task
@@ -250,7 +250,13 @@ async def edit_variable(_, message, pre_message, key):
     await update_buttons(pre_message, "var")
     await delete_message(message)
     await database.update_config({key: value})
-    if key in ["QUEUE_ALL", "QUEUE_DOWNLOAD", "QUEUE_UPLOAD"]:
+    if key in [
+        "QUEUE_ALL",
+        "QUEUE_DOWNLOAD",
+        "QUEUE_UPLOAD",
+        "QUEUE_ENGINE_LIMITS",
+        "QUEUE_FREE_SPACE",
+    ]:
         await start_from_queued()
     elif key in [
         "RCLONE_SERVE_URL",
@@ -330,6 +336,7 @@ async def sync_jdownloader():
     async with jd_listener_lock:
         if not Config.DATABASE_URL or not jdownloader.is_connected:
             return
+        jd_engine.expect_exit()
         await jdownloader.device.system.exit_jd()
     if await aiopath.exists("cfg.zip"):
         await remove("cfg.zip")
@@ -510,7 +517,7 @@ async def edit_bot_settings(client, query):
         elif data[2] == "INCOMPLETE_TASK_NOTIFIER":
             await database.trunc_table("tasks")
         elif data[2] in ["JD_EMAIL", "JD_PASS"]:
-            await create_subprocess_exec("pkill", "-9", "-f", "java")
+            await jd_engine.stop()
         elif data[2] == "USENET_SERVERS":
             for s in Config.USENET_SERVERS:
                 await sabnzbd_client.delete_config("servers", s["name"])
@@ -523,7 +530,13 @@ async def edit_bot_settings(client, query):
         if data[2] == "DATABASE_URL":
             await database.disconnect()
         await database.update_config({data[2]: value})
-        if data[2] in ["QUEUE_ALL", "QUEUE_DOWNLOAD", "QUEUE_UPLOAD"]:
+        if data[2] in [
+            "QUEUE_ALL",
+            "QUEUE_DOWNLOAD",
+            "QUEUE_UPLOAD",
+            "QUEUE_ENGINE_LIMITS",
+            "QUEUE_FREE_SPACE",
+        ]:
             await start_from_queued()
         elif data[2] in [
             "RCLONE_SERVE_URL",
@@ -1,6 +1,6 @@
-from asyncio import sleep
+from asyncio import gather
 
-from bot import multi_tags, task_dict, task_dict_lock, user_data
+from bot import LOGGER, bot_loop, multi_tags, task_dict, task_dict_lock, user_data
 from bot.core.aeon_client import Config
 from bot.helper.ext_utils.bot_utils import new_task
 from bot.helper.ext_utils.status_utils import (
@@ -8,6 +8,7 @@ from bot.helper.ext_utils.status_utils import (
     get_all_tasks,
     get_task_by_gid,
 )
+from bot.helper.ext_utils.task_manager import start_from_queued
 from bot.helper.telegram_helper import button_build
 from bot.helper.telegram_helper.filters import CustomFilters
 from bot.helper.telegram_helper.message_utils import (
@@ -15,6 +16,7 @@ from bot.helper.telegram_helper.message_utils import (
     delete_message,
     edit_message,
     send_message,
+    update_status_message,
 )
 
 
@@ -66,13 +68,52 @@ async def cancel_multi(_, query):
 
 
 async def cancel_all(status, user_id):
+    """
+    Cancels every matching task at once. Tasks of one engine are removed
+    together through the status class's cancel_many, the rest concurrently,
+    and each chat gets a single summary and status refresh.
+    """
     matches = await get_all_tasks(status.strip(), user_id)
     if not matches:
         return False
+    chats = {}
     for task in matches:
-        obj = task.task()
-        await obj.cancel_task()
-        await sleep(2)
+        task.listener.is_cancelled = True
+        task.listener.bulk_cancelled = True
+        chats.setdefault(task.listener.message.chat.id, []).append(task)
+    async with task_dict_lock:
+        for task in matches:
+            task_dict.pop(task.listener.mid, None)
+        count = len(task_dict)
+    batches = {}
+    single = []
+    for task in matches:
+        if hasattr(task, "cancel_many"):
+            batches.setdefault(type(task), []).append(task)
+        else:
+            single.append(task.task())
+    results = await gather(
+        *(
+            status_class.cancel_many(tasks)
+            for status_class, tasks in batches.items()
+        ),
+        *(obj.cancel_task() for obj in single),
+        return_exceptions=True,
+    )
+    for result in results:
+        if isinstance(result, Exception):
+            LOGGER.error(f"Cancelling tasks failed: {result}")
+    await start_from_queued()
+    if count == 0:
+        await matches[0].listener.clean()
+    for chat_id, tasks in chats.items():
+        msg = await send_message(
+            tasks[0].listener.message,
+            f"{len(tasks)} task(s) stopped by user!",
+        )
+        bot_loop.create_task(auto_delete_message(msg, time=300))
+        if count:
+            await update_status_message(chat_id)
     return True
 
 
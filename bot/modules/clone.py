@@ -137,7 +137,11 @@ class Clone(TaskListener):
     async def _proceed_to_clone(self, sync):
         if is_share_link(self.link):
             try:
-                self.link = await sync_to_async(direct_link_generator, self.link)
+                self.link = await sync_to_async(
+                    direct_link_generator,
+                    self.link,
+                    pool="net",
+                )
                 LOGGER.info(f"Generated link: {self.link}")
             except DirectDownloadLinkException as e:
                 LOGGER.error(str(e))
@@ -149,6 +153,7 @@ class Clone(TaskListener):
                 GoogleDriveCount().count,
                 self.link,
                 self.user_id,
+                pool="net",
             )
             if mime_type is None:
                 await send_message(self.message, self.name)
@@ -174,6 +179,7 @@ class Clone(TaskListener):
                     await send_status_message(self.message)
             flink, mime_type, files, folders, dir_id = await sync_to_async(
                 drive.clone,
+                pool="transfer",
             )
             if msg:
                 await delete_message(msg)
@@ -20,7 +20,12 @@ async def delete_file(_, message):
         link = ""
     if is_gdrive_link(link):
         LOGGER.info(link)
-        msg = await sync_to_async(GoogleDriveDelete().deletefile, link, user.id)
+        msg = await sync_to_async(
+            GoogleDriveDelete().deletefile,
+            link,
+            user.id,
+            pool="net",
+        )
     else:
         msg = "Send Gdrive link along with command or by replying to the link by command"
     reply_message = await send_message(message, msg)
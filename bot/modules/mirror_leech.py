@@ -11,10 +11,10 @@ from bot.helper.aeon_utils.access_check import error_check
 from bot.helper.ext_utils.bot_utils import (
     COMMAND_USAGE,
     arg_parser,
-    get_content_type,
     sync_to_async,
 )
 from bot.helper.ext_utils.exceptions import DirectDownloadLinkException
+from bot.helper.ext_utils.link_probe import probe_link
 from bot.helper.ext_utils.links_utils import (
     is_gdrive_id,
     is_gdrive_link,
@@ -111,6 +111,7 @@ class Mirror(TaskListener):
             "-sp": 0,
             "link": "",
             "-n": "",
+            "-zp": "",
             "-m": "",
             "-up": "",
             "-rcf": "",
@@ -136,6 +137,7 @@ class Mirror(TaskListener):
         self.rc_flags = args["-rcf"]
         self.link = args["link"]
         self.compress = args["-z"]
+        self.compress_profile = args["-zp"]
         self.extract = args["-e"]
         self.join = args["-j"]
         self.thumb = args["-t"]
@@ -248,33 +250,9 @@ class Mirror(TaskListener):
                 await delete_links(self.message)
                 return await auto_delete_message(x, time=300)
 
-        if isinstance(reply_to, list):
-            self.bulk = reply_to
-            b_msg = input_list[:1]
-            self.options = " ".join(input_list[1:])
-            b_msg.append(f"{self.bulk[0]} -i {len(self.bulk)} {self.options}")
-            nextmsg = await send_message(self.message, " ".join(b_msg))
-            nextmsg = await self.client.get_messages(
-                chat_id=self.message.chat.id,
-                message_ids=nextmsg.id,
-            )
-            if self.message.from_user:
-                nextmsg.from_user = self.user
-            else:
-                nextmsg.sender_chat = self.user
-            await Mirror(
-                self.client,
-                nextmsg,
-                self.is_qbit,
-                self.is_leech,
-                self.is_jd,
-                self.is_nzb,
-                self.same_dir,
-                self.bulk,
-                self.multi_tag,
-                self.options,
-            ).new_event()
-            return await delete_links(self.message)
+        msg_range = None
+        if isinstance(reply_to, tuple):
+            msg_range, reply_to = reply_to, None
 
         if reply_to:
             file_ = (
@@ -312,7 +290,7 @@ class Mirror(TaskListener):
         except Exception:
             pass
 
-        if (
+        if msg_range is None and (
             (not self.link and file_ is None)
             or (is_telegram_link(self.link) and reply_to is None)
             or (
@@ -345,6 +323,17 @@ class Mirror(TaskListener):
             await delete_links(self.message)
             return await auto_delete_message(x, time=300)
 
+        if msg_range is not None:
+            create_task(
+                TelegramDownloadHelper(self).add_range_download(
+                    *msg_range,
+                    f"{path}/",
+                    session,
+                ),
+            )
+            await delete_links(self.message)
+            return None
+
         if (
             not self.is_jd
             and not self.is_qbit
@@ -356,13 +345,18 @@ class Mirror(TaskListener):
             and file_ is None
             and not is_gdrive_id(self.link)
         ):
-            content_type = await get_content_type(self.link)
-            if content_type is None or re_match(
-                r"text/html|text/plain",
-                content_type,
+            info = await probe_link(self.link)
+            if (
+                info is None
+                or not info.content_type
+                or re_match(r"text/html|text/plain", info.content_type)
             ):
                 try:
-                    self.link = await sync_to_async(direct_link_generator, self.link)
+                    self.link = await sync_to_async(
+                        direct_link_generator,
+                        self.link,
+                        pool="net",
+                    )
                     if isinstance(self.link, tuple):
                         self.link, headers = self.link
                     elif isinstance(self.link, str):
@@ -381,8 +375,8 @@ class Mirror(TaskListener):
                     await self.remove_from_same_dir()
                     await delete_links(self.message)
                     return await auto_delete_message(x, time=300)
-            content_type = await get_content_type(self.link)  # recheck with new link
-            if content_type and "x-bittorrent" in content_type:
+            info = await probe_link(self.link)  # recheck with new link
+            if info and info.content_type and "x-bittorrent" in info.content_type:
                 self.is_qbit = True
 
         if file_ is not None:
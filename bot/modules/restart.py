@@ -10,11 +10,13 @@ from aiofiles.os import remove
 from bot import LOGGER, intervals, sabnzbd_client, scheduler
 from bot.core.aeon_client import TgClient
 from bot.core.config_manager import Config
+from bot.core.engine_supervisor import supervisor
 from bot.core.jdownloader_booter import jdownloader
 from bot.core.torrent_manager import TorrentManager
 from bot.helper.ext_utils.bot_utils import new_task
 from bot.helper.ext_utils.db_handler import database
 from bot.helper.ext_utils.files_utils import clean_all
+from bot.helper.mirror_leech_utils.rclone_utils.rcd import stop_rcds
 from bot.helper.telegram_helper import button_build
 from bot.helper.telegram_helper.message_utils import delete_message, send_message
 
@@ -132,6 +134,7 @@ async def confirm_restart(_, query):
                 ),
             )
             await jdownloader.close()
+        await gather(supervisor.stop_all(), stop_rcds())
         proc1 = await create_subprocess_exec(
             "pkill",
             "-9",
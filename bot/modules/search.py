@@ -1,6 +1,14 @@
+from asyncio import gather, sleep
+from base64 import b32decode
+from hashlib import sha1
 from html import escape
+from re import search as re_search
+from time import monotonic
 from urllib.parse import quote
 
+from aiofiles import open as aiopen
+from aiofiles.os import path as aiopath
+
 from bot import LOGGER
 from bot.core.torrent_manager import TorrentManager
 from bot.helper.ext_utils.bot_utils import new_task
@@ -11,6 +19,13 @@ from bot.helper.telegram_helper.message_utils import edit_message, send_message
 
 PLUGINS = []
 TELEGRAPH_LIMIT = 300
+# seconds a plugin may run, and how long its results are reused for the same key
+SEARCH_TIMEOUT = 60
+CACHE_TTL = 600
+# (key, plugin) -> (expiry, results)
+_search_cache = {}
+# hash of the SEARCH_PLUGINS installed last, to skip reinstalling them on boot
+PLUGINS_VERSION_FILE = "search_plugins.version"
 SEARCH_PLUGINS = [
     "https://raw.githubusercontent.com/qbittorrent/search-plugins/master/nova3/engines/piratebay.py",
     "https://raw.githubusercontent.com/qbittorrent/search-plugins/master/nova3/engines/limetorrents.py",
@@ -33,42 +48,120 @@ SEARCH_PLUGINS = [
 
 
 async def initiate_search_tools():
+    """
+    Installs SEARCH_PLUGINS into qBittorrent, unless the same list was
+    installed before and every plugin of it is still there.
+    """
+    version = sha1("\n".join(SEARCH_PLUGINS).encode()).hexdigest()
     qb_plugins = await TorrentManager.qbittorrent.search.plugins()
-    if qb_plugins:
-        names = [plugin.name for plugin in qb_plugins]
-        await TorrentManager.qbittorrent.search.uninstall_plugin(names)
+    names = {plugin.name for plugin in qb_plugins or []}
+    wanted = {url.rsplit("/", 1)[-1].removesuffix(".py") for url in SEARCH_PLUGINS}
+    if wanted <= names and await _installed_version() == version:
+        LOGGER.info("Search plugins are up to date")
+        return
+    if names:
+        await TorrentManager.qbittorrent.search.uninstall_plugin(list(names))
         PLUGINS.clear()
+    _search_cache.clear()
     await TorrentManager.qbittorrent.search.install_plugin(SEARCH_PLUGINS)
+    async with aiopen(PLUGINS_VERSION_FILE, "w") as f:
+        await f.write(version)
 
 
-async def search(key, site, message):
-    LOGGER.info(f"PLUGINS Searching: {key} from {site}")
-    search = await TorrentManager.qbittorrent.search.start(
-        pattern=key,
-        plugins=[site],
-        category="all",
-    )
-    search_id = search.id
+async def _installed_version():
+    if not await aiopath.exists(PLUGINS_VERSION_FILE):
+        return None
+    async with aiopen(PLUGINS_VERSION_FILE) as f:
+        return (await f.read()).strip()
+
+
+async def _wait_search(search_id):
+    """Waits for a plugin search with back-off, stopping it after SEARCH_TIMEOUT."""
+    delay = 0.5
+    deadline = monotonic() + SEARCH_TIMEOUT
     while True:
         result_status = await TorrentManager.qbittorrent.search.status(search_id)
-        status = result_status[0].status
-        if status != "Running":
-            break
-    dict_search_results = await TorrentManager.qbittorrent.search.results(
-        id=search_id,
-        limit=TELEGRAPH_LIMIT,
-    )
-    search_results = dict_search_results.results
-    total_results = dict_search_results.total
+        if result_status[0].status != "Running":
+            return
+        if monotonic() > deadline:
+            await TorrentManager.qbittorrent.search.stop(search_id)
+            return
+        await sleep(delay)
+        delay = min(delay * 1.5, 3)
+
+
+async def _plugin_search(key, plugin):
+    cache_key = (key.lower(), plugin)
+    if (cached := _search_cache.get(cache_key)) and cached[0] > monotonic():
+        return cached[1]
+    try:
+        search = await TorrentManager.qbittorrent.search.start(
+            pattern=key,
+            plugins=[plugin],
+            category="all",
+        )
+        try:
+            await _wait_search(search.id)
+            dict_search_results = await TorrentManager.qbittorrent.search.results(
+                id=search.id,
+                limit=TELEGRAPH_LIMIT,
+            )
+        finally:
+            await TorrentManager.qbittorrent.search.delete(search.id)
+    except Exception as e:
+        LOGGER.error(f"Search plugin {plugin} failed: {e}")
+        return []
+    results = dict_search_results.results
+    now = monotonic()
+    for k in [k for k, v in _search_cache.items() if v[0] < now]:
+        del _search_cache[k]
+    _search_cache[cache_key] = (now + CACHE_TTL, results)
+    return results
+
+
+def _result_key(result):
+    """The lowercase hex infohash of a result, or its link when there's none."""
+    link = result.fileUrl
+    if match := re_search(r"urn:btih:([a-zA-Z0-9]+)", link):
+        info_hash = match.group(1)
+        if len(info_hash) == 32:
+            try:
+                return b32decode(info_hash.upper()).hex()
+            except ValueError:
+                pass
+        return info_hash.lower()
+    return link
+
+
+async def search(key, site, message):
+    LOGGER.info(f"PLUGINS Searching: {key} from {site}")
+    if site == "all":
+        if not PLUGINS:
+            pl = await TorrentManager.qbittorrent.search.plugins()
+            PLUGINS.extend(i.name for i in pl)
+        plugins = PLUGINS
+    else:
+        plugins = [site]
+    merged = {}
+    for results in await gather(*(_plugin_search(key, p) for p in plugins)):
+        for result in results:
+            rkey = _result_key(result)
+            if rkey not in merged or result.nbSeeders > merged[rkey].nbSeeders:
+                merged[rkey] = result
+    search_results = sorted(
+        merged.values(),
+        key=lambda r: r.nbSeeders,
+        reverse=True,
+    )[:TELEGRAPH_LIMIT]
+    total_results = len(search_results)
     if total_results == 0:
         await edit_message(
             message,
             f"No result found for <i>{key}</i>\nTorrent Site:- <i>{site.capitalize()}</i>",
         )
         return
-    msg = f"<b>Found {min(total_results, TELEGRAPH_LIMIT)}</b>"
+    msg = f"<b>Found {total_results}</b>"
     msg += f" <b>result(s) for <i>{key}</i>\nTorrent Site:- <i>{site.capitalize()}</i></b>"
-    await TorrentManager.qbittorrent.search.delete(search_id)
     link = await get_result(search_results, key, message)
     buttons = ButtonMaker()
     buttons.url_button("🔎 VIEW", link)
@@ -14,6 +14,7 @@ from psutil import (
 )
 
 from bot import bot_start_time
+from bot.core.engine_supervisor import supervisor
 from bot.helper.ext_utils.bot_utils import cmd_exec, new_task
 from bot.helper.ext_utils.status_utils import (
     get_readable_file_size,
@@ -75,6 +76,10 @@ async def bot_stats(_, message):
 <b>ffmpeg:</b> {commands["ffmpeg"]}
 <b>7z:</b> {commands["7z"]}
 """
+    stats += "\n<b>Engines:</b>\n"
+    for name, state, restarts, since in supervisor.states():
+        stats += f"<b>{name}:</b> {state} for {get_readable_time(since)}"
+        stats += f" | <b>Restarts:</b> {restarts}\n" if restarts else "\n"
     reply_message = await send_message(message, stats)
     await delete_message(message)
     await auto_delete_message(reply_message)
@@ -327,6 +327,7 @@ class YtDlp(TaskListener):
             "-m": "",
             "-opt": {},
             "-n": "",
+            "-zp": "",
             "-up": "",
             "-rcf": "",
             "-t": "",
@@ -359,6 +360,7 @@ class YtDlp(TaskListener):
         self.rc_flags = args["-rcf"]
         self.link = args["link"]
         self.compress = args["-z"]
+        self.compress_profile = args["-zp"]
         self.thumb = args["-t"]
         self.split_size = args["-sp"]
         self.sample_video = args["-sv"]
@@ -471,7 +473,12 @@ class YtDlp(TaskListener):
         options["playlist_items"] = "0"
 
         try:
-            result = await sync_to_async(extract_info, self.link, options)
+            result = await sync_to_async(
+                extract_info,
+                self.link,
+                options,
+                pool="net",
+            )
         except Exception as e:
             msg = str(e).replace("<", " ").replace(">", " ")
             await send_message(self.message, f"{self.tag} {msg}")
@@ -0,0 +1,74 @@
+from os import path as ospath
+from shlex import join
+from time import monotonic
+
+from aiofiles.os import makedirs
+from aiofiles.os import path as aiopath
+
+from bot import DOWNLOAD_DIR, cpu_eater_lock
+from bot.helper.ext_utils.bot_utils import cmd_exec, new_task
+from bot.helper.ext_utils.dir_index import DirIndex
+from bot.helper.ext_utils.files_utils import ZIP_PROFILES, clean_target, get_zip_cmd
+from bot.helper.ext_utils.status_utils import get_readable_file_size
+from bot.helper.telegram_helper.message_utils import edit_message, send_message
+
+
+async def _bench_profile(profile, src, out_dir):
+    ext, _, cpu_bound = ZIP_PROFILES[profile]
+    dst = f"{out_dir}/{ospath.basename(src.rstrip('/'))}{ext}"
+    cmd = get_zip_cmd(profile, src, dst)
+    if isinstance(cmd, tuple):
+        cmd = f"{join(cmd[0])} | {join(cmd[1])}"
+    shell = isinstance(cmd, str)
+    if cpu_bound:
+        async with cpu_eater_lock:
+            start = monotonic()
+            _, stderr, code = await cmd_exec(cmd, shell)
+            elapsed = monotonic() - start
+    else:
+        start = monotonic()
+        _, stderr, code = await cmd_exec(cmd, shell)
+        elapsed = monotonic() - start
+    out_size = (await DirIndex.build(out_dir)).total_size
+    await clean_target(out_dir)
+    await makedirs(out_dir, exist_ok=True)
+    if code != 0:
+        return None, stderr
+    return (elapsed, out_size), None
+
+
+@new_task
+async def zip_benchmark(_, message):
+    args = message.text.split(maxsplit=1)
+    if len(args) < 2 or not await aiopath.exists(args[1].strip()):
+        await send_message(
+            message,
+            "Send a local file or folder path to benchmark the zip profiles on.\n"
+            f"Profiles: {', '.join(ZIP_PROFILES)}",
+        )
+        return
+    src = args[1].strip()
+    size = (await DirIndex.build(src)).total_size
+    msg = await send_message(
+        message,
+        f"Benchmarking zip profiles on {get_readable_file_size(size)}...",
+    )
+    out_dir = f"{DOWNLOAD_DIR}zipbench"
+    await makedirs(out_dir, exist_ok=True)
+    text = f"<b>Zip Profiles</b> ({get_readable_file_size(size)})\n"
+    try:
+        for profile in ZIP_PROFILES:
+            result, error = await _bench_profile(profile, src, out_dir)
+            if result is None:
+                text += f"\n<b>{profile}:</b> failed - <code>{error[:200]}</code>"
+                continue
+            elapsed, out_size = result
+            speed = size / elapsed if elapsed else 0
+            ratio = out_size / size if size else 0
+            text += (
+                f"\n<b>{profile}:</b> {get_readable_file_size(speed)}/s"
+                f" | ratio {ratio:.3f} | {elapsed:.1f}s"
+            )
+    finally:
+        await clean_target(out_dir)
+    await edit_message(msg, text)
@@ -48,6 +48,8 @@ GDRIVE_ID = ""  # Default Google Drive Folder/TeamDrive ID or "root"
 IS_TEAM_DRIVE = False  # Set True if GDRIVE_ID is a TeamDrive
 STOP_DUPLICATE = False  # Check for duplicate file/folder names before uploading
 INDEX_URL = ""  # Index URL for the GDrive_ID
+GDRIVE_DOWNLOAD_WORKERS = 1  # Files downloaded at once from a GDrive folder
+GDRIVE_DOWNLOAD_SEGMENTS = 0  # Range segments per large GDrive file (0 to disable)
 
 # Rclone
 RCLONE_PATH = ""  # Default Rclone upload path (e.g., myremote:path)
@@ -96,17 +98,30 @@ HYBRID_LEECH = (
 LEECH_FILENAME_PREFIX = ""  # Prefix for leeched filenames
 LEECH_DUMP_CHAT = []  # List of chat_ids or channel_ids to dump leeched files, e.g., [-100123456789, "channel_username"]
 THUMBNAIL_LAYOUT = ""  # Thumbnail layout for uploads (e.g., 2x2, 3x3)
+TG_DOWNLOAD_CONNECTIONS = (
+    4  # Parallel connections per Telegram file download (1 to disable)
+)
 
 # qBittorrent/Aria2c
 TORRENT_TIMEOUT = 0  # Timeout in seconds for dead torrents. 0 for no timeout.
 BASE_URL = ""  # Base URL of the bot, for web file selection (e.g., http://myip or http://myip:port)
 BASE_URL_PORT = 80  # Port for the BASE_URL (Default: 80)
 WEB_PINCODE = False  # Require a PIN code for web file selection
+METRICS_ENABLED = False  # Serve Prometheus metrics on BASE_URL/metrics
+METRICS_TOKEN = ""  # Bearer token remote scrapers need for /metrics
+
+# Zip (-z) profiles per destination: "store", "lzma2-mt" or "zstd-fast", e.g.
+# {"default": "store", "gd": "lzma2-mt", "rc": "zstd-fast"}. Override per task with -zp.
+COMPRESS_PROFILES = {}
 
 # Queueing system
 QUEUE_ALL = 0  # Max concurrent tasks (upload + download)
 QUEUE_DOWNLOAD = 0  # Max concurrent download tasks
 QUEUE_UPLOAD = 0  # Max concurrent upload tasks
+# Max concurrent downloads per engine, e.g. {"qbittorrent": 3, "yt-dlp": 2}. Engines:
+# aria2, qbittorrent, sabnzbd, jdownloader, yt-dlp, telegram, gdriveAPI, rclone
+QUEUE_ENGINE_LIMITS = {}
+QUEUE_FREE_SPACE = 0  # Bytes to keep free on the download disk when starting tasks
 
 # RSS
 RSS_DELAY = 600  # RSS feed check interval in seconds (Default: 600)
@@ -0,0 +1,3 @@
+from .jobs import calculate_md5, convert_to_jpeg
+
+__all__ = ["calculate_md5", "convert_to_jpeg"]
@@ -0,0 +1,29 @@
+# Jobs for the bot's "cpu" process pool. Its workers are spawned and import the
+# module of every job they run, so this package sits outside `bot`, whose
+# __init__ sets up the event loop, logging and scheduler, and keeps to the
+# standard library and PIL.
+from hashlib import md5
+
+from PIL import Image
+
+
+def calculate_md5(file_path):
+    """
+    Calculates the MD5 hash of the given file.
+
+    Args:
+        file_path: The path to the file.
+
+    Returns:
+        A hexadecimal string representing the MD5 hash.
+    """
+    md5_hash = md5()
+    with open(file_path, "rb") as file:
+        for chunk in iter(lambda: file.read(4096), b""):
+            md5_hash.update(chunk)
+    return md5_hash.hexdigest()
+
+
+def convert_to_jpeg(src, dst):
+    with Image.open(src) as img:
+        img.convert("RGB").save(dst, "JPEG")
@@ -1,7 +1,7 @@
 from functools import wraps
 from json import JSONDecodeError, dumps, loads
 
-from httpx import AsyncClient, AsyncHTTPTransport, RequestError
+from httpx import AsyncClient, AsyncHTTPTransport, Limits, RequestError
 
 from .exception import (
     MYJDApiException,
@@ -744,7 +744,16 @@ class MyJdApi:
         if self._http_session is not None:
             return self._http_session
 
-        transport = AsyncHTTPTransport(retries=10, verify=False)
+        # the local API is plain HTTP/1.1, keep its connections open between calls
+        transport = AsyncHTTPTransport(
+            retries=10,
+            verify=False,
+            limits=Limits(
+                max_connections=20,
+                max_keepalive_connections=10,
+                keepalive_expiry=60,
+            ),
+        )
 
         self._http_session = clientSession(transport=transport)
 
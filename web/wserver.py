@@ -4,14 +4,16 @@ from uvloop import install
 install()
 from asyncio import sleep
 from contextlib import asynccontextmanager
+from hmac import compare_digest
 from logging import INFO, WARNING, FileHandler, StreamHandler, basicConfig, getLogger
 
 from aioaria2 import Aria2HttpClient
+from aiofiles import open as aiopen
 from aiohttp.client_exceptions import ClientError
 from aioqbt.client import create_client
 from aioqbt.exc import AQError
 from fastapi import FastAPI, Request
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi.responses import HTMLResponse, JSONResponse, PlainTextResponse
 from fastapi.templating import Jinja2Templates
 
 from sabnzbdapi import SabnzbdClient
@@ -20,6 +22,12 @@ from web.nodes import extract_file_ids, make_tree
 getLogger("httpx").setLevel(WARNING)
 getLogger("aiohttp").setLevel(WARNING)
 
+# written by the bot every few seconds while METRICS_ENABLED is set, with the
+# METRICS_TOKEN other hosts must send to read it
+METRICS_FILE = "metrics.prom"
+METRICS_TOKEN_FILE = "metrics.token"
+LOCAL_HOSTS = ("127.0.0.1", "::1", "localhost")
+
 aria2 = None
 qbittorrent = None
 sabnzbd_client = SabnzbdClient(
@@ -253,6 +261,35 @@ async def set_aria2(gid, selected_files):
         LOGGER.info(f"Verification Failed! Report! gid: {gid}")
 
 
+async def _metrics_allowed(request):
+    if request.client is not None and request.client.host in LOCAL_HOSTS:
+        return True
+    try:
+        async with aiopen(METRICS_TOKEN_FILE) as f:
+            token = await f.read()
+    except FileNotFoundError:
+        return False
+    return bool(token) and compare_digest(
+        request.headers.get("authorization", "").encode(),
+        f"Bearer {token}".encode(),
+    )
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    if not await _metrics_allowed(request):
+        return PlainTextResponse("Forbidden\n", status_code=403)
+    try:
+        async with aiopen(METRICS_FILE) as f:
+            content = await f.read()
+    except FileNotFoundError:
+        return PlainTextResponse("Metrics are disabled\n", status_code=404)
+    return PlainTextResponse(
+        content,
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
+
+
 @app.get("/", response_class=HTMLResponse)
 async def homepage():
     return (